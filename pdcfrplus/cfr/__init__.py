@@ -5,3 +5,4 @@ from .dcfr_plus import DCFRPlus
 from .linear_cfr import LinearCFR
 from .pcfr_plus import PCFRPlus
 from .pdcfr_plus import PDCFRPlus
+from .policy_export import CompactPolicy
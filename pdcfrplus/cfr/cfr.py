@@ -1,7 +1,13 @@
+import copy
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
 import numpy as np
 from pdcfrplus.utils.logger import Logger
+from pdcfrplus.utils.utils import load_pickle, save_pickle
 
 from pdcfrplus.cfr.cfr_base import SolverBase, StateBase
+from pdcfrplus.cfr.parallel import ShardedTraversal
 from pdcfrplus.game import GameConfig
 
 
@@ -12,6 +18,8 @@ class CFRState(StateBase):
         self.imm_regrets = {a: 0 for a in self.legal_actions}
         self.imm_regrets_copy = {a: 0 for a in self.legal_actions}
         self.regrets = {a: 0 for a in self.legal_actions}
+        # largest positive regret, see CFR.positive_regrets
+        self.max_regret = 0
 
     def update_regret(self):
         for a in self.legal_actions:
@@ -27,14 +35,15 @@ class CFRState(StateBase):
             else:
                 self.policy[a] = max(0, regret) / regret_sum
 
-    def cumulate_policy(self, T, gamma):
+    def cumulate_policy(self, scale=1):
+        """
+        cum_policy is stored divided by scale, which carries the discount of all
+        states of the player, see CFR.discount.
+        """
+        if self.reach == 0:
+            return
         for a, p in self.policy.items():
-            if T == 1:
-                self.cum_policy[a] = self.reach * p
-                continue
-            self.cum_policy[a] = (
-                self.cum_policy[a] * np.power((T - 1) / T, gamma) + self.reach * p
-            )
+            self.cum_policy[a] += self.reach * p / scale
 
     def clear_temp(self):
         for a in self.regrets.keys():
@@ -43,87 +52,393 @@ class CFRState(StateBase):
         self.reach = 0
 
 
+class _UnitHistory:
+    """
+    Stand-in for a pyspiel.State with a single legal action, to run the update rules of
+    a solver on a state outside of the game.
+    """
+
+    def legal_actions(self):
+        return [0]
+
+    def current_player(self):
+        return 0
+
+
+# scales of the discounted tables below which the entries are renormalized
+MIN_SCALE = 1e-100
+
+
 class CFR(SolverBase):
-    def __init__(self, game_config: GameConfig, logger: Logger = None, gamma: int = 0):
-        super().__init__(game_config, logger)
+    profiled_methods = [
+        "iteration",
+        "calc_regret",
+        "clear_temp",
+        "update_state",
+        "calc_exp",
+    ]
+    stored_tables = [
+        "policy",
+        "cum_policy",
+        "regrets",
+        "imm_regrets",
+        "imm_regrets_copy",
+    ]
+
+    def __init__(
+        self,
+        game_config: GameConfig,
+        logger: Logger = None,
+        gamma: int = 0,
+        storage_folder: Optional[str] = None,
+        memory_budget_mb: Optional[float] = None,
+    ):
+        super().__init__(game_config, logger, storage_folder, memory_budget_mb)
         self.gamma = gamma
+        self.parallel = None
+        # the regrets (by sign) and cum_policy of the states of a player are stored
+        # divided by one scale per player, see discount
+        self.scales = {
+            name: [1.0 for _ in range(self.num_players)]
+            for name in ["regrets_pos", "regrets_neg", "cum_policy"]
+        }
+        # total weight of the immediate regrets in the positive regrets, see exp_bound
+        self.regret_weight = 0
+        # ids of the states of each player whose imm_regrets or reach the current and
+        # the previous traversal changed, and of those updated by the previous
+        # iteration, None for all states. Other states are left alone, see iteration
+        self.touched = [set() for _ in range(self.num_players)]
+        self.last_touched = [None for _ in range(self.num_players)]
+        self.last_updated = [None for _ in range(self.num_players)]
+        # sum of the max_regret of the states of each player, in stored units
+        self.positive_regrets = [0.0 for _ in range(self.num_players)]
 
     def init_state(self, h):
         return CFRState(h)
 
+    def parallelize(self, num_workers: int, tasks_per_worker: int = 4):
+        """
+        Traverses the subtrees below the root chance outcomes (or the first tree level
+        with enough nodes) in num_workers forked processes, see ShardedTraversal.
+        """
+        self.parallel = ShardedTraversal(self, num_workers, tasks_per_worker)
+
+    def close(self):
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
+    def record_instrumentation(self):
+        calls = self.instrumentation.calls["calc_regret"]
+        entries = self.instrumentation.entries["calc_regret"]
+        self.logger.record("prof/nodes", calls)
+        # every node below the root of a traversal is created by h.child
+        self.logger.record("prof/clones", calls - entries)
+        super().record_instrumentation()
+
     def get_state_dict(self):
         state_dict = {}
         state_dict["states"] = {}
-        for feature, state in self.states.items():
+        keys = self.get_infoset_keys()
+        for state in self.states:
+            feature = self.add_player_info_in_feature(keys[state.id], state.player)
             state_policy = state.policy
-            state_regrets = state.regrets
+            state_regrets = self.get_table(state, "regrets")
             state_imm_regrets = state.imm_regrets_copy
-            state_cum_policy = state.cum_policy
+            state_cum_policy = self.get_table(state, "cum_policy")
             state_ave_policy = state.get_average_policy()
             state_dict["states"][feature] = {
-                "policy": state_policy,
-                "regrets": state_regrets,
-                "cum_policy": state_cum_policy,
+                "policy": dict(state_policy),
+                "regrets": dict(state_regrets),
+                "cum_policy": dict(state_cum_policy),
                 "ave_policy": state_ave_policy,
-                "imm_regret": state_imm_regrets,
+                "imm_regret": dict(state_imm_regrets),
             }
         state_dict["iteration"] = self.num_iteration
 
         return state_dict
 
+    def save_solution(self, path):
+        """
+        Saves the tables of all infosets to path + ".pkl", to warm-start other solves.
+        """
+        save_pickle(
+            {
+                "game": self.game_config.name,
+                "algo": self.__class__.__name__,
+                "iteration": self.num_iteration,
+                "weights": self.accumulator_weights(self.num_iteration),
+                "states": self.get_state_dict()["states"],
+            },
+            Path(path),
+        )
+
+    def warm_start(self, path, iteration: Optional[int] = None):
+        """
+        Seeds the regrets, cumulative and current policies from a solution saved by
+        save_solution, possibly of another algorithm. Infosets are matched by their
+        information state string and actions by id, the others keep their initial
+        values. The solver continues at iteration (by default the saved one). The
+        accumulators are rescaled to the weight the iterations before it have in the
+        discounting schedule of this solver, see accumulator_weights.
+        """
+        solution = load_pickle(Path(path))
+        T = min(
+            solution["iteration"] if iteration is None else iteration,
+            self.total_iterations,
+        )
+        weights = self.accumulator_weights(T)
+        scale = {
+            k: weights[k] / solution["weights"][k] if solution["weights"][k] > 0 else 0
+            for k in weights
+        }
+        keys = self.get_infoset_keys()
+        for s in self.states:
+            saved = solution["states"].get(
+                self.add_player_info_in_feature(keys[s.id], s.player)
+            )
+            if saved is None:
+                continue
+            actions = [a for a in s.legal_actions if a in saved["regrets"]]
+            regrets, cum_policy = {}, {}
+            for a in actions:
+                regret = saved["regrets"][a]
+                if regret > 0:
+                    regrets[a] = regret * scale["regrets_pos"]
+                else:
+                    regrets[a] = regret * scale["regrets_neg"]
+                cum_policy[a] = saved["cum_policy"][a] * scale["cum_policy"]
+                s.imm_regrets_copy[a] = saved["imm_regret"][a]
+            self.set_table(s, "regrets", regrets)
+            self.set_table(s, "cum_policy", cum_policy)
+            policy_sum = sum(saved["policy"][a] for a in actions)
+            if policy_sum > 0:
+                for a in s.legal_actions:
+                    s.policy[a] = saved["policy"].get(a, 0) / policy_sum
+        self.num_iteration = T
+        self.regret_weight = weights["regrets_pos"]
+        # the next iteration updates all states
+        self.last_touched = [None for _ in range(self.num_players)]
+        if self.parallel is not None:
+            for player in range(self.num_players):
+                self.parallel.sync_policies(player)
+
+    def accumulator_weights(self, T: int) -> Dict[str, float]:
+        """
+        Total weight of the immediate regrets (positive and negative) and reach-weighted
+        policies of iterations 1..T in the accumulators, found by running the updates
+        of a copy of the solver on a one-action state with unit immediate regret and
+        reach. The methods are called through the class, instrument() wraps them on the
+        instance.
+        """
+        cls = type(self)
+        weights = {}
+        for sign, name in [(1, "regrets_pos"), (-1, "regrets_neg")]:
+            s = self.init_state(_UnitHistory())
+            solver = copy.copy(self)
+            solver.storage = None
+            solver.player_states = [[s] for _ in range(self.num_players)]
+            solver.scales = {
+                k: [1.0 for _ in range(self.num_players)] for k in self.scales
+            }
+            solver.positive_regrets = [0.0 for _ in range(self.num_players)]
+            for solver.num_iteration in range(1, T + 1):
+                cls.discount(solver, s.player)
+                s.imm_regrets[0] = sign
+                s.reach = 1
+                cls.update_state(solver, s)
+            weights[name] = max(sign * solver.get_table(s, "regrets")[0], 0)
+            weights.setdefault("cum_policy", solver.get_table(s, "cum_policy")[0])
+        return weights
+
+    def regret_discount(self, T: int) -> Tuple[float, float]:
+        """
+        Factors of the positive and negative regrets before iteration T adds its
+        immediate regrets.
+        """
+        return 1, 1
+
+    def imm_regret_weight(self, T: int) -> float:
+        """
+        Weight of the immediate regrets of iteration T in the regrets.
+        """
+        return 1
+
+    def policy_discount(self, T: int) -> float:
+        """
+        Factor of cum_policy before iteration T adds its reach-weighted policy.
+        """
+        if T == 1:
+            return 0
+        return np.power((T - 1) / T, self.gamma)
+
+    def discount(self, player: int):
+        """
+        Applies the discounts of the current iteration to the tables of player by
+        multiplying their scales, the stored entries are only touched when a scale
+        drops below MIN_SCALE (always for a discount of 0) and they are renormalized.
+        """
+        T = self.num_iteration
+        regrets_pos, regrets_neg = self.regret_discount(T)
+        discounts = {
+            "regrets_pos": regrets_pos,
+            "regrets_neg": regrets_neg,
+            "cum_policy": self.policy_discount(T),
+        }
+        for name, d in discounts.items():
+            self.scales[name][player] *= d
+            if self.scales[name][player] < MIN_SCALE:
+                self.renormalize(player, name)
+
+    def renormalize(self, player: int, name: str):
+        scale = self.scales[name][player]
+        for s in self.stream_states(player):
+            if name == "cum_policy":
+                for a in s.legal_actions:
+                    s.cum_policy[a] *= scale
+                continue
+            for a in s.legal_actions:
+                if (s.regrets[a] > 0) == (name == "regrets_pos"):
+                    s.regrets[a] *= scale
+            if name == "regrets_pos":
+                s.max_regret *= scale
+        if name == "regrets_pos":
+            self.positive_regrets[player] *= scale
+        self.scales[name][player] = 1.0
+
+    def get_table(self, s, name: str) -> Dict[int, float]:
+        """
+        Values of the regrets or cum_policy of s, with the scale of the player applied.
+        """
+        if name == "cum_policy":
+            scale = self.scales["cum_policy"][s.player]
+            return {a: value * scale for a, value in s.cum_policy.items()}
+        pos = self.scales["regrets_pos"][s.player]
+        neg = self.scales["regrets_neg"][s.player]
+        return {
+            a: value * (pos if value > 0 else neg) for a, value in s.regrets.items()
+        }
+
+    def set_table(self, s, name: str, values: Dict[int, float]):
+        """
+        Inverse of get_table for the actions in values.
+        """
+        if name == "cum_policy":
+            scale = self.scales["cum_policy"][s.player]
+            for a, value in values.items():
+                s.cum_policy[a] = value / scale
+            return
+        pos = self.scales["regrets_pos"][s.player]
+        neg = self.scales["regrets_neg"][s.player]
+        for a, value in values.items():
+            s.regrets[a] = value / (pos if value > 0 else neg)
+
     def iteration(self):
+        """
+        Also sets exp_bounds[T], the sum over infosets of the largest positive regret,
+        divided by the total weight of the immediate regrets and averaged over the
+        players. For CFR it bounds the exploitability of the average policy, for the
+        variants with other weights of regrets and policies it is an estimate.
+
+        Only the states touched by this or the previous traversal are updated: the
+        others have no immediate regrets or reach, and with the lazy scales neither
+        their regrets nor their policies change. The predictive variants need the
+        previous traversal too, its immediate regrets are in the current policies.
+        """
         self.num_iteration += 1
+        T = self.num_iteration
+        d_pos, _ = self.regret_discount(T)
+        self.regret_weight = self.regret_weight * d_pos + self.imm_regret_weight(T)
+        exp_bound = 0
         for i in range(self.num_players):
             self.clear_temp(i)
-            h = self.game.new_initial_state()
-            self.calc_regret(h, i, 1, 1)
-
-            pending_states = [s for s in self.states.values() if s.player == i]
+            self.touched[i] = set()
+            if self.parallel is None:
+                h = self.game.new_initial_state()
+                self.calc_regret(h, i, 1, 1)
+            else:
+                self.parallel.calc_regret(i)
+            if self.storage is not None:
+                self.storage.trim()
 
-            for s in pending_states:
+            self.discount(i)
+            updated = None
+            positive_regrets = 0
+            if self.last_touched[i] is not None:
+                updated = self.touched[i] | self.last_touched[i]
+                positive_regrets = self.positive_regrets[i]
+            for s in self.stream_states(i, updated):
                 self.update_state(s)
+                max_regret = max(max(s.regrets.values()), 0)
+                if updated is not None:
+                    positive_regrets -= s.max_regret
+                positive_regrets += max_regret
+                s.max_regret = max_regret
+            self.positive_regrets[i] = positive_regrets
+            self.last_touched[i] = self.touched[i]
+            self.last_updated[i] = updated
+            exp_bound += (
+                positive_regrets
+                * self.scales["regrets_pos"][i]
+                / (self.regret_weight * self.num_players)
+            )
+            if self.parallel is not None:
+                self.parallel.sync_policies(i, updated)
+        self.exp_bounds[T] = exp_bound
 
-    def calc_regret(self, h, traveser, my_reach, opp_reach):
+    def calc_regret(self, h, traveser, my_reach, opp_reach, node=0):
         if h.is_terminal():
             return h.returns()[traveser]
 
         if h.is_chance_node():
             v = 0
-            for a, p in h.chance_outcomes():
-                v += p * self.calc_regret(h.child(a), traveser, my_reach, opp_reach * p)
+            for (a, p), child in zip(h.chance_outcomes(), self.child_nodes(node)):
+                v += p * self.calc_regret(
+                    h.child(a), traveser, my_reach, opp_reach * p, child
+                )
             return v
 
         cur_player = h.current_player()
-        s = self.lookup_state(h, cur_player)
+        s = self.node_state(node)
+        children = list(zip(h.legal_actions(), self.child_nodes(node)))
 
         if cur_player != traveser:
             v = 0
-            for a in h.legal_actions():
+            for a, child in children:
                 p = s.policy[a]
-                v += p * self.calc_regret(h.child(a), traveser, my_reach, opp_reach * p)
+                v += p * self.calc_regret(
+                    h.child(a), traveser, my_reach, opp_reach * p, child
+                )
             return v
 
         child_v = {}
         v = 0
-        for a in h.legal_actions():
+        for a, child in children:
             p = s.policy[a]
-            child_v[a] = self.calc_regret(h.child(a), traveser, my_reach * p, opp_reach)
+            child_v[a] = self.calc_regret(
+                h.child(a), traveser, my_reach * p, opp_reach, child
+            )
             v += p * child_v[a]
 
-        for a in h.legal_actions():
+        for a, _ in children:
             s.imm_regrets[a] += opp_reach * (child_v[a] - v)
 
         s.reach += my_reach
+        if my_reach or opp_reach:
+            self.touched[traveser].add(s.id)
         return v
 
     def clear_temp(self, player):
-        for state in self.states.values():
-            if state.player == player:
-                state.clear_temp()
+        """
+        The states updated by the previous iteration hold its immediate regrets, or
+        the copies of those of the iteration before.
+        """
+        for state in self.stream_states(player, self.last_updated[player]):
+            state.clear_temp()
 
     def update_state(self, s):
         s.update_regret()
 
-        s.cumulate_policy(self.num_iteration, self.gamma)
- 
+        s.cumulate_policy(self.scales["cum_policy"][s.player])
+
         s.update_current_policy()
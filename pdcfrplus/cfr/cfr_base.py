@@ -1,22 +1,67 @@
-from typing import Dict
+import copy
+from array import array
+from typing import Dict, Iterable, List, Optional
 
 import pyspiel
 from open_spiel.python import policy
 from open_spiel.python.algorithms import exploitability
+from pdcfrplus.utils.evaluation import (
+    AsyncEvaluator,
+    TargetStopping,
+    get_eval_iterations,
+)
+from pdcfrplus.utils.forecast import COUNT_NAMES, cache_counts, game_key
+from pdcfrplus.utils.instrument import Instrumentation
 from pdcfrplus.utils.logger import Logger
 
+from pdcfrplus.cfr.policy_export import save_compact_policy
+from pdcfrplus.cfr.storage import TableStorage
 from pdcfrplus.game import GameConfig
 
 
-class StateBase:
-    id = 0
+class InfosetIndex:
+    """
+    Maps information state strings to dense integer ids.
+    Each player has its own table keyed by the 64-bit hash of the string, so a lookup
+    neither concatenates nor stores strings. The strings are kept while the index is
+    built to check for hash collisions and dropped by ``compact`` afterwards.
+    """
+
+    def __init__(self, num_players: int):
+        self.tables: List[Dict[int, int]] = [{} for _ in range(num_players)]
+        self.keys: Optional[List[str]] = []
+        self.size = 0
+
+    def add(self, feature: str, player: int) -> int:
+        table = self.tables[player]
+        digest = hash(feature)
+        infoset_id = table.get(digest)
+        if infoset_id is None:
+            infoset_id = self.size
+            table[digest] = infoset_id
+            self.size += 1
+            if self.keys is not None:
+                self.keys.append(feature)
+        elif self.keys is not None and self.keys[infoset_id] != feature:
+            raise ValueError(
+                "Hash collision between infosets {} and {}".format(
+                    self.keys[infoset_id], feature
+                )
+            )
+        return infoset_id
+
+    def lookup(self, feature: str, player: int) -> int:
+        return self.tables[player][hash(feature)]
 
+    def compact(self):
+        self.keys = None
+
+
+class StateBase:
     def __init__(self, h: pyspiel.State):
-        StateBase.id += 1
-        self.id = StateBase.id + 1
+        self.id = None
         self.legal_actions = h.legal_actions()
         self.player = h.current_player()
-        self.feature = h.information_state_string(self.player)
         self.num_actions = len(self.legal_actions)
         self.children = {a: [] for a in self.legal_actions}
         self.max_utility, self.min_utility = -1e5, 1e5
@@ -41,39 +86,182 @@ class StateBase:
         return uniform_policy
 
     def __str__(self):
-        return "{}/{}".format(self.feature, str(self.player))
+        return "{}/{}".format(self.id, str(self.player))
 
 
 class SolverBase:
-    def __init__(self, game_config: GameConfig, logger: Logger = None):
+    profiled_methods = ["iteration", "calc_exp"]
+    # per-action dicts of the states moved into the storage, if there is one
+    stored_tables: List[str] = []
+
+    def __init__(
+        self,
+        game_config: GameConfig,
+        logger: Logger = None,
+        storage_folder: Optional[str] = None,
+        memory_budget_mb: Optional[float] = None,
+    ):
+        """
+        With a storage_folder, the tables of the states are kept in memory-mapped files
+        in that folder instead of dicts, see TableStorage.
+        """
         self.game_config = game_config
         if logger is None:
             logger = Logger(writer_strings=[])
         self.logger = logger
         self.game = game_config.load_game()
-        self.states: Dict[str, StateBase] = {}
         self.num_iteration = 0
         self.num_players = self.game.num_players()
         self.total_iterations = self.game_config.iterations
         self.exps = [0 for _ in range(self.total_iterations + 1)]
+        # regret-based exploitability bounds, set by the solvers that track them
+        self.exp_bounds = [None for _ in range(self.total_iterations + 1)]
+        self.instrumentation = None
+        self.infosets = InfosetIndex(self.num_players)
+        self.states: List[StateBase] = []
+        self.player_states: List[List[StateBase]] = [
+            [] for _ in range(self.num_players)
+        ]
+        # the game tree in preorder: infoset id of every node (-1 for chance and
+        # terminal nodes) and size of its subtree, so traversals find the state of a
+        # node without building its information state string, see child_nodes
+        self.node_infosets = array("q")
+        self.node_sizes = array("q")
+        self.storage = None
+        if storage_folder is not None:
+            self.storage = TableStorage(
+                self.stored_tables, storage_folder, memory_budget_mb
+            )
+        # exact size of the game tree, counted by init_states
+        self.tree_counts = {name: 0 for name in COUNT_NAMES}
         self.init_states(self.game.new_initial_state())
+        self.infosets.compact()
+        self.tree_counts["infosets"] = len(self.states)
+        self.tree_counts["infoset_actions"] = sum(s.num_actions for s in self.states)
+
+    def clone(
+        self,
+        iterations: Optional[int] = None,
+        logger: Optional[Logger] = None,
+        **params,
+    ) -> "SolverBase":
+        """
+        Returns a copy of the solver with other iterations, logger and parameters
+        (constructor arguments kept as attributes, e.g. alpha or gamma). The game, the
+        infoset index and the node arrays are read-only after construction and shared,
+        so cloning a fresh solver is much cheaper than building one, which walks the
+        game tree.
+        """
+        if self.storage is not None or self.instrumentation is not None:
+            raise ValueError("Solvers with storage or instrumentation are not cloned")
+        if getattr(self, "parallel", None) is not None:
+            raise ValueError("Solvers with workers are not cloned")
+        for name in params:
+            if not hasattr(self, name):
+                raise ValueError(
+                    "{} has no parameter {}".format(self.__class__.__name__, name)
+                )
+        if logger is None:
+            logger = Logger(writer_strings=[])
+        memo = {
+            id(self.game): self.game,
+            id(self.infosets): self.infosets,
+            id(self.node_infosets): self.node_infosets,
+            id(self.node_sizes): self.node_sizes,
+            id(self.logger): logger,
+        }
+        solver = copy.deepcopy(self, memo)
+        for name, value in params.items():
+            setattr(solver, name, value)
+        if iterations is not None:
+            solver.game_config.iterations = iterations
+            solver.total_iterations = iterations
+            solver.exps = [0 for _ in range(iterations + 1)]
+            solver.exp_bounds = [None for _ in range(iterations + 1)]
+        return solver
+
+    def instrument(self, profile_iteration=None, profile_folder=None):
+        """
+        Records phase timings through the logger at every evaluation. If
+        profile_iteration is given, a flame graph of that iteration is saved.
+        """
+        self.instrumentation = Instrumentation(profile_iteration, profile_folder)
+        self.instrumentation.instrument(self, self.profiled_methods)
 
-    def learn(self, eval_interval: int = 1):
-        self.evaluate()
+    def learn(
+        self,
+        eval_interval: int = 1,
+        eval_log_points: Optional[int] = None,
+        async_eval: bool = False,
+        eval_workers: int = 2,
+        target_exp: Optional[float] = None,
+    ):
+        """
+        Runs all iterations. The exploitability is evaluated at the iterations given by
+        get_eval_iterations; with async_eval it is computed in forked processes and
+        logged when ready, while the iterations continue (not with a storage_folder).
+        With target_exp, the solve stops early once the exploitability is at most
+        target_exp, see TargetStopping.
+        """
+        if async_eval and self.storage is not None:
+            # the mapped tables are shared with the forked evaluators, not copied
+            raise ValueError("Asynchronous evaluation needs the tables in memory")
+        eval_iterations = get_eval_iterations(
+            self.total_iterations, eval_interval, eval_log_points
+        )
+        evaluator = AsyncEvaluator(self.calc_exp, eval_workers) if async_eval else None
+        stopping = None
+        if target_exp is not None:
+            stopping = TargetStopping(target_exp, self.calc_exp)
+        if 0 in eval_iterations:
+            self.evaluate(evaluator)
         while self.num_iteration < self.total_iterations:
             # for self.num_iteration in range(1, self.total_iterations + 1):
+            if self.instrumentation is not None:
+                self.instrumentation.begin_iteration(self.num_iteration + 1)
             self.iteration()
-            if self.num_iteration % eval_interval == 0:
-                self.evaluate()
+            if self.instrumentation is not None:
+                self.instrumentation.end_iteration(self.num_iteration)
+            exp = None
+            if stopping is not None:
+                exp = stopping.check(self.exp_bounds[self.num_iteration])
+            if exp is not None:
+                self.log_exp(self.num_iteration, exp)
+            elif self.num_iteration in eval_iterations:
+                self.evaluate(evaluator)
+            if evaluator is not None:
+                for step, exp in evaluator.poll():
+                    self.log_exp(step, exp)
+            if stopping is not None and stopping.reached:
+                break
+        if evaluator is not None:
+            for step, exp in evaluator.close():
+                self.log_exp(step, exp)
 
-    def evaluate(self):
+    def evaluate(self, evaluator: Optional[AsyncEvaluator] = None):
+        if evaluator is not None:
+            evaluator.submit(self.num_iteration)
+            if self.instrumentation is not None:
+                self.record_instrumentation()
+                self.logger.dump(step=self.num_iteration)
+            return
         exp = self.calc_exp()
+        if self.instrumentation is not None:
+            self.record_instrumentation()
         # state_dict = self.get_state_dict()
         # self.logger.record("state_dict", state_dict)
+        self.log_exp(self.num_iteration, exp)
+
+    def log_exp(self, step: int, exp: float):
         self.logger.record("exp", exp)
-        self.logger.record("iter", self.num_iteration)
-        self.logger.dump(step=self.num_iteration)
-        self.exps[self.num_iteration] = exp
+        if self.exp_bounds[step] is not None:
+            self.logger.record("exp_bound", self.exp_bounds[step])
+        self.logger.record("iter", step)
+        self.logger.dump(step=step)
+        self.exps[step] = exp
+
+    def record_instrumentation(self):
+        self.instrumentation.record(self.logger)
 
     def get_state_dict(self):
         raise NotImplemented
@@ -82,22 +270,92 @@ class SolverBase:
         raise NotImplemented
 
     def init_states(self, h: pyspiel.State):
+        node = len(self.node_infosets)
+        self.node_infosets.append(-1)
+        self.node_sizes.append(1)
+        self.tree_counts["nodes"] += 1
         if h.is_terminal():
+            self.tree_counts["terminal_nodes"] += 1
             return
         if h.is_chance_node():
             for a in h.legal_actions():
                 self.init_states(h.child(a))
+            self.node_sizes[node] = len(self.node_infosets) - node
             return
-        self.lookup_state(h, h.current_player())
+        self.tree_counts["decision_nodes"] += 1
+        player = h.current_player()
+        infoset_id = self.infosets.add(h.information_state_string(player), player)
+        if infoset_id == len(self.states):
+            s = self.init_state(h)
+            s.id = infoset_id
+            if self.storage is not None:
+                self.storage.attach(s)
+            self.states.append(s)
+            self.player_states[player].append(s)
+        self.node_infosets[node] = infoset_id
         for a in h.legal_actions():
             self.init_states(h.child(a))
+        self.node_sizes[node] = len(self.node_infosets) - node
+
+    def cache_tree_counts(self) -> bool:
+        """
+        Saves the exact size of the game for forecast_game, unless it is known already.
+        Only called on request (see scripts/run.py), the file is shared by all runs.
+        """
+        return cache_counts(game_key(self.game_config), self.tree_counts)
+
+    def stream_states(
+        self, player: int, ids: Optional[Iterable[int]] = None
+    ) -> Iterable[StateBase]:
+        """
+        Sweeps the states of a player, or only those with the given ids, in storage
+        order.
+        """
+        if ids is None:
+            states = self.player_states[player]
+        else:
+            states = [self.states[i] for i in sorted(ids)]
+        if self.storage is None:
+            return states
+        return self.storage.stream(states)
+
+    def child_nodes(self, node: int) -> Iterable[int]:
+        """
+        Yields the children of a node of the game tree in the order of its legal
+        actions (or chance outcomes). The root is node 0.
+        """
+        end = node + self.node_sizes[node]
+        child = node + 1
+        while child < end:
+            yield child
+            child += self.node_sizes[child]
+
+    def node_state(self, node: int) -> StateBase:
+        return self.states[self.node_infosets[node]]
 
     def lookup_state(self, h: pyspiel.State, player: int) -> StateBase:
-        feature = h.information_state_string(player)
-        feature = self.add_player_info_in_feature(feature, player)
-        if self.states.get(feature) is None:
-            self.states[feature] = self.init_state(h)
-        return self.states[feature]
+        infoset_id = self.infosets.lookup(h.information_state_string(player), player)
+        return self.states[infoset_id]
+
+    def get_infoset_keys(self) -> List[str]:
+        """
+        Returns the information state string of every infoset, indexed by infoset id.
+        The strings are not kept after construction, so the game tree is walked again.
+        """
+        keys = [None for _ in range(len(self.states))]
+
+        def walk(h):
+            if h.is_terminal():
+                return
+            if not h.is_chance_node():
+                player = h.current_player()
+                feature = h.information_state_string(player)
+                keys[self.infosets.lookup(feature, player)] = feature
+            for a in h.legal_actions():
+                walk(h.child(a))
+
+        walk(self.game.new_initial_state())
+        return keys
 
     def add_player_info_in_feature(self, feature, player):
         feature = feature + "/" + str(player)
@@ -114,12 +372,27 @@ class SolverBase:
         exp = max(exp, 1e-12)
         return exp
 
+    def export_average_policy(self, folder, dtype="float32"):
+        """
+        Saves the average policy in the format read by CompactPolicy.
+        """
+        keys = self.get_infoset_keys()
+        save_compact_policy(
+            folder,
+            features=keys,
+            players=[s.player for s in self.states],
+            policies=[s.get_average_policy() for s in self.states],
+            dtype=dtype,
+            meta={
+                "game": self.game_config.name,
+                "algo": self.__class__.__name__,
+                "iteration": self.num_iteration,
+            },
+        )
+
     def average_policy(self):
         def wrap(h):
-            feature = h.information_state_string()
-            player = h.current_player()
-            feature = self.add_player_info_in_feature(feature, player)
-            s = self.states[feature]
+            s = self.lookup_state(h, h.current_player())
             return s.get_average_policy()
 
         return wrap
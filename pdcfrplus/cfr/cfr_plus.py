@@ -8,8 +8,21 @@ class CFRPlusState(CFRState):
 
 
 class CFRPlus(CFR):
-    def __init__(self, game_config, logger=None, gamma=1):
-        super().__init__(game_config, logger, gamma)
+    def __init__(
+        self,
+        game_config,
+        logger=None,
+        gamma=1,
+        storage_folder=None,
+        memory_budget_mb=None,
+    ):
+        super().__init__(
+            game_config,
+            logger,
+            gamma,
+            storage_folder=storage_folder,
+            memory_budget_mb=memory_budget_mb,
+        )
 
     def init_state(self, h):
         return CFRPlusState(h)
@@ -4,38 +4,59 @@ from pdcfrplus.cfr.cfr import CFR, CFRState
 
 
 class DCFRState(CFRState):
-    def update_regret(self, T, alpha=1.5, beta=0):
-        T = float(T)
+    def update_regret(self, pos_scale=1, neg_scale=1):
+        """
+        Positive and negative regrets are stored divided by pos_scale and neg_scale,
+        which carry their discounts, see DCFR.regret_discount.
+        """
         for a in self.legal_actions:
-            if T == 1:
-                self.regrets[a] = self.imm_regrets[a]
+            if self.imm_regrets[a] == 0:
                 continue
-            if self.regrets[a] > 0:
-                self.regrets[a] = (
-                    self.regrets[a]
-                    * (np.power(T - 1, alpha) / (np.power(T - 1, alpha) + 1))
-                    + self.imm_regrets[a]
-                )
-            else:
-                self.regrets[a] = (
-                    self.regrets[a]
-                    * (np.power(T - 1, beta) / (np.power(T - 1, beta) + 1))
-                    + self.imm_regrets[a]
-                )
+            regret = self.regrets[a]
+            regret = (
+                regret * (pos_scale if regret > 0 else neg_scale) + self.imm_regrets[a]
+            )
+            self.regrets[a] = regret / (pos_scale if regret > 0 else neg_scale)
 
 
 class DCFR(CFR):
-    def __init__(self, game_config, logger=None, alpha=1.5, beta=0, gamma=2):
-        super().__init__(game_config, logger, gamma)
+    def __init__(
+        self,
+        game_config,
+        logger=None,
+        alpha=1.5,
+        beta=0,
+        gamma=2,
+        storage_folder=None,
+        memory_budget_mb=None,
+    ):
+        super().__init__(
+            game_config,
+            logger,
+            gamma,
+            storage_folder=storage_folder,
+            memory_budget_mb=memory_budget_mb,
+        )
         self.alpha = alpha
         self.beta = beta
 
     def init_state(self, h):
         return DCFRState(h)
 
+    def regret_discount(self, T):
+        if T == 1:
+            return 0, 0
+        T = float(T)
+        return (
+            np.power(T - 1, self.alpha) / (np.power(T - 1, self.alpha) + 1),
+            np.power(T - 1, self.beta) / (np.power(T - 1, self.beta) + 1),
+        )
+
     def update_state(self, s):
-        s.update_regret(self.num_iteration, self.alpha, self.beta)
+        s.update_regret(
+            self.scales["regrets_pos"][s.player], self.scales["regrets_neg"][s.player]
+        )
 
-        s.cumulate_policy(self.num_iteration, self.gamma)
+        s.cumulate_policy(self.scales["cum_policy"][s.player])
 
         s.update_current_policy()
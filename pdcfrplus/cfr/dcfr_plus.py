@@ -4,24 +4,47 @@ from pdcfrplus.cfr.cfr import CFR, CFRState
 
 
 class DCFRPlusState(CFRState):
-    def update_regret(self, T, alpha=1.5):
-        T = float(T)
+    def update_regret(self, scale=1):
+        """
+        The regrets are stored divided by scale, which carries their discount, see
+        DCFRPlus.regret_discount.
+        """
         for a in self.legal_actions:
-            w = np.power(T - 1, alpha) / (np.power(T - 1, alpha) + 1.5)
-            self.regrets[a] = max(self.regrets[a] * w + self.imm_regrets[a], 0)
+            if self.imm_regrets[a] == 0:
+                continue
+            self.regrets[a] = max(self.regrets[a] + self.imm_regrets[a] / scale, 0)
 
 
 class DCFRPlus(CFR):
-    def __init__(self, game_config, logger=None, gamma=4, alpha=1.5):
-        super().__init__(game_config, logger, gamma)
+    def __init__(
+        self,
+        game_config,
+        logger=None,
+        gamma=4,
+        alpha=1.5,
+        storage_folder=None,
+        memory_budget_mb=None,
+    ):
+        super().__init__(
+            game_config,
+            logger,
+            gamma,
+            storage_folder=storage_folder,
+            memory_budget_mb=memory_budget_mb,
+        )
         self.alpha = alpha
 
     def init_state(self, h):
         return DCFRPlusState(h)
 
+    def regret_discount(self, T):
+        T = float(T)
+        w = np.power(T - 1, self.alpha) / (np.power(T - 1, self.alpha) + 1.5)
+        return w, w
+
     def update_state(self, s):
-        s.update_regret(self.num_iteration, self.alpha)
+        s.update_regret(self.scales["regrets_pos"][s.player])
 
-        s.cumulate_policy(self.num_iteration, self.gamma)
+        s.cumulate_policy(self.scales["cum_policy"][s.player])
 
         s.update_current_policy()
@@ -8,16 +8,31 @@ class LinearCFRState(CFRState):
 
 
 class LinearCFR(CFR):
-    def __init__(self, game_config, logger=None, gamma=1):
-        super().__init__(game_config, logger)
+    def __init__(
+        self,
+        game_config,
+        logger=None,
+        gamma=1,
+        storage_folder=None,
+        memory_budget_mb=None,
+    ):
+        super().__init__(
+            game_config,
+            logger,
+            storage_folder=storage_folder,
+            memory_budget_mb=memory_budget_mb,
+        )
         self.gamma = gamma
 
     def init_state(self, h):
         return LinearCFRState(h)
 
+    def imm_regret_weight(self, T):
+        return T
+
     def update_state(self, s):
         s.update_regret(self.num_iteration)
 
-        s.cumulate_policy(self.num_iteration, self.gamma)
+        s.cumulate_policy(self.scales["cum_policy"][s.player])
 
         s.update_current_policy()
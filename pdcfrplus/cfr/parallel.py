@@ -0,0 +1,321 @@
+import mmap
+import multiprocessing
+import traceback
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pyspiel
+
+
+def _shared_array(shape) -> np.ndarray:
+    """
+    Zero-initialized float64 array in anonymous shared memory, inherited by forked
+    processes.
+    """
+    size = max(int(np.prod(shape)), 1) * 8
+    return np.frombuffer(mmap.mmap(-1, size), dtype=np.float64)[
+        : int(np.prod(shape))
+    ].reshape(shape)
+
+
+class ShardedTraversal:
+    """
+    Runs the regret traversal of a CFR solver in a pool of forked processes.
+    The top of the game tree is cut at the first depth with at least
+    tasks_per_worker * num_workers non-terminal nodes, e.g. the root chance outcomes of
+    Liar's Dice, Kuhn or Leduc. The subtrees below the cut are assigned to the workers
+    once, balanced by size. Every traversal, the workers walk their subtrees with the
+    current policies read from a shared array indexed by infoset id and accumulate
+    immediate regrets and reach into their own rows of shared arrays. The solver walks
+    the top of the tree with the returned subtree values and the rows are reduced into
+    the states before ``update_state``.
+    """
+
+    def __init__(self, solver, num_workers: int, tasks_per_worker: int = 4):
+        self.solver = solver
+        self.num_workers = num_workers
+        states = solver.states
+        self.offsets = np.zeros(len(states) + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum([s.num_actions for s in states])
+        num_values = int(self.offsets[-1])
+        self.players = np.array([s.player for s in states], dtype=np.int64)
+        self.policy = _shared_array((num_values,))
+        self.imm_regrets = _shared_array((num_workers, num_values))
+        self.reach = _shared_array((num_workers, len(states)))
+        for player in range(solver.num_players):
+            self.sync_policies(player)
+
+        frontier = self._find_frontier(num_workers * tasks_per_worker)
+        self.frontier = [path for path, _ in frontier]
+        self.frontier_nodes = [node for _, node in frontier]
+        self.frontier_index = {node: i for i, (_, node) in enumerate(frontier)}
+        self.assignment = self._assign(self.frontier_nodes)
+
+        ctx = multiprocessing.get_context("fork")
+        self.workers = []
+        for worker_id, tasks in enumerate(self.assignment):
+            recv_conn, send_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=self._run_worker,
+                args=(worker_id, tasks, send_conn),
+                daemon=True,
+            )
+            process.start()
+            send_conn.close()
+            self.workers.append((process, recv_conn))
+
+    def _find_frontier(self, min_nodes: int) -> List[Tuple[Tuple[int, ...], int]]:
+        """
+        Returns the path and the node (see SolverBase.child_nodes) of the cut nodes.
+        """
+        level = [((), 0, self.solver.game.new_initial_state())]
+        while True:
+            next_level = []
+            for path, node, h in level:
+                if h.is_terminal():
+                    continue
+                for a, child in zip(h.legal_actions(), self.solver.child_nodes(node)):
+                    next_level.append((path + (a,), child, h.child(a)))
+            if not next_level:
+                return [(path, node) for path, node, h in level if not h.is_terminal()]
+            non_terminal = [
+                (path, node) for path, node, h in next_level if not h.is_terminal()
+            ]
+            if len(non_terminal) >= min_nodes:
+                return non_terminal
+            level = next_level
+
+    def _assign(self, frontier: List[int]) -> List[List[int]]:
+        sizes = [self.solver.node_sizes[node] for node in frontier]
+        assignment = [[] for _ in range(self.num_workers)]
+        loads = [0 for _ in range(self.num_workers)]
+        for i in sorted(range(len(frontier)), key=lambda i: -sizes[i]):
+            worker_id = int(np.argmin(loads))
+            assignment[worker_id].append(i)
+            loads[worker_id] += sizes[i]
+        return assignment
+
+    def _replay(self, path: Tuple[int, ...]) -> pyspiel.State:
+        h = self.solver.game.new_initial_state()
+        for a in path:
+            h = h.child(a)
+        return h
+
+    def sync_policies(self, player: int, ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Copies the policies of the states of player, or only those with the given ids.
+        """
+        if ids is None:
+            states = self.solver.player_states[player]
+        else:
+            states = [self.solver.states[i] for i in ids]
+        for s in states:
+            start = self.offsets[s.id]
+            self.policy[start : start + s.num_actions] = [
+                s.policy[a] for a in s.legal_actions
+            ]
+
+    def _run_worker(self, worker_id, tasks, conn) -> None:
+        roots = [
+            (self._replay(self.frontier[i]), self.frontier_nodes[i]) for i in tasks
+        ]
+        imm_regrets = self.imm_regrets[worker_id]
+        reach = self.reach[worker_id]
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            traverser, reaches = message
+            try:
+                values = [
+                    self._traverse(
+                        h, node, traverser, my_reach, opp_reach, imm_regrets, reach
+                    )
+                    for (h, node), (my_reach, opp_reach) in zip(roots, reaches)
+                ]
+                conn.send((values, None))
+            except Exception:
+                conn.send((None, traceback.format_exc()))
+        conn.close()
+
+    def _traverse(self, h, node, traverser, my_reach, opp_reach, imm_regrets, reach):
+        if h.is_terminal():
+            return h.returns()[traverser]
+
+        child_nodes = self.solver.child_nodes
+        if h.is_chance_node():
+            v = 0
+            for (a, p), child in zip(h.chance_outcomes(), child_nodes(node)):
+                v += p * self._traverse(
+                    h.child(a),
+                    child,
+                    traverser,
+                    my_reach,
+                    opp_reach * p,
+                    imm_regrets,
+                    reach,
+                )
+            return v
+
+        cur_player = h.current_player()
+        infoset_id = self.solver.node_infosets[node]
+        start = self.offsets[infoset_id]
+        policy = self.policy
+        children = list(zip(h.legal_actions(), child_nodes(node)))
+
+        if cur_player != traverser:
+            v = 0
+            for k, (a, child) in enumerate(children):
+                p = policy[start + k]
+                v += p * self._traverse(
+                    h.child(a),
+                    child,
+                    traverser,
+                    my_reach,
+                    opp_reach * p,
+                    imm_regrets,
+                    reach,
+                )
+            return v
+
+        child_v = []
+        v = 0
+        for k, (a, child) in enumerate(children):
+            p = policy[start + k]
+            child_v.append(
+                self._traverse(
+                    h.child(a),
+                    child,
+                    traverser,
+                    my_reach * p,
+                    opp_reach,
+                    imm_regrets,
+                    reach,
+                )
+            )
+            v += p * child_v[k]
+
+        for k in range(len(children)):
+            imm_regrets[start + k] += opp_reach * (child_v[k] - v)
+
+        reach[infoset_id] += my_reach
+        return v
+
+    def calc_regret(self, traverser: int) -> float:
+        """
+        Same as ``CFR.calc_regret`` from the root, with the subtrees below the cut
+        traversed by the workers.
+        """
+        reaches: Dict[int, Tuple[float, float]] = {}
+        root = self.solver.game.new_initial_state()
+        self._walk_top(root, 0, traverser, 1, 1, reaches)
+        for (_, conn), tasks in zip(self.workers, self.assignment):
+            conn.send((traverser, [reaches[i] for i in tasks]))
+        values = {}
+        for (_, conn), tasks in zip(self.workers, self.assignment):
+            worker_values, error = conn.recv()
+            if error is not None:
+                raise RuntimeError("Worker traversal failed:\n{}".format(error))
+            values.update(zip(tasks, worker_values))
+        v = self._walk_top(root, 0, traverser, 1, 1, None, values)
+        self._reduce(traverser)
+        return v
+
+    def _walk_top(self, h, node, traverser, my_reach, opp_reach, reaches, values=None):
+        """
+        Walks the tree above the cut. Without values it only records the reach of every
+        cut node in reaches, with values it computes the regrets like CFR.calc_regret.
+        """
+        if h.is_terminal():
+            return h.returns()[traverser]
+
+        frontier_id = self.frontier_index.get(node)
+        if frontier_id is not None:
+            if values is None:
+                reaches[frontier_id] = (my_reach, opp_reach)
+                return 0
+            return values[frontier_id]
+
+        child_nodes = self.solver.child_nodes
+        if h.is_chance_node():
+            v = 0
+            for (a, p), child in zip(h.chance_outcomes(), child_nodes(node)):
+                v += p * self._walk_top(
+                    h.child(a),
+                    child,
+                    traverser,
+                    my_reach,
+                    opp_reach * p,
+                    reaches,
+                    values,
+                )
+            return v
+
+        cur_player = h.current_player()
+        s = self.solver.node_state(node)
+        children = list(zip(h.legal_actions(), child_nodes(node)))
+
+        if cur_player != traverser:
+            v = 0
+            for a, child in children:
+                p = s.policy[a]
+                v += p * self._walk_top(
+                    h.child(a),
+                    child,
+                    traverser,
+                    my_reach,
+                    opp_reach * p,
+                    reaches,
+                    values,
+                )
+            return v
+
+        child_v = {}
+        v = 0
+        for a, child in children:
+            p = s.policy[a]
+            child_v[a] = self._walk_top(
+                h.child(a),
+                child,
+                traverser,
+                my_reach * p,
+                opp_reach,
+                reaches,
+                values,
+            )
+            v += p * child_v[a]
+
+        if values is not None:
+            for a, _ in children:
+                s.imm_regrets[a] += opp_reach * (child_v[a] - v)
+            s.reach += my_reach
+            if my_reach or opp_reach:
+                self.solver.touched[traverser].add(s.id)
+        return v
+
+    def _reduce(self, traverser: int) -> None:
+        """
+        Adds the rows of the workers to the states of traverser they touched, found
+        with numpy so the states left alone cost nothing in Python.
+        """
+        imm_regrets = self.imm_regrets.sum(axis=0)
+        reach = self.reach.sum(axis=0)
+        nonzero = np.logical_or.reduceat(imm_regrets != 0, self.offsets[:-1])
+        ids = np.nonzero((nonzero | (reach != 0)) & (self.players == traverser))[0]
+        touched = self.solver.touched[traverser]
+        for infoset_id in ids.tolist():
+            s = self.solver.states[infoset_id]
+            start = self.offsets[infoset_id]
+            for k, a in enumerate(s.legal_actions):
+                s.imm_regrets[a] += imm_regrets[start + k]
+            s.reach += reach[infoset_id]
+            touched.add(infoset_id)
+        self.imm_regrets[:] = 0
+        self.reach[:] = 0
+
+    def close(self) -> None:
+        for process, conn in self.workers:
+            conn.send(None)
+            conn.close()
+            process.join()
+        self.workers = []
@@ -4,20 +4,29 @@ from pdcfrplus.cfr.cfr import CFR, CFRState
 
 
 class PDCFRPlusState(CFRState):
-    def weight(self, T, alpha):
+    @staticmethod
+    def weight(T, alpha):
         d, w = np.power(T - 1, alpha) / (np.power(T - 1, alpha) + 1), 1
         return d, w
 
-    def update_regret(self, T, alpha):
-        d, w = self.weight(T, alpha)
+    def update_regret(self, T, alpha, scale=1):
+        """
+        The regrets are stored divided by scale, which carries the discounts d of the
+        previous iterations, see PDCFRPlus.regret_discount.
+        """
+        _, w = self.weight(T, alpha)
         for a in self.legal_actions:
-            self.regrets[a] = max(self.regrets[a] * d + self.imm_regrets[a] * w, 0)
+            if self.imm_regrets[a] == 0:
+                continue
+            self.regrets[a] = max(self.regrets[a] + self.imm_regrets[a] * w / scale, 0)
 
-    def update_current_policy(self, T, alpha):
+    def update_current_policy(self, T, alpha, scale=1):
         d, w = self.weight(T + 1, alpha)
         self.pred_regrets = {}
         for a in self.legal_actions:
-            self.pred_regrets[a] = max(self.regrets[a] * d + self.imm_regrets[a] * w, 0)
+            self.pred_regrets[a] = max(
+                self.regrets[a] * scale * d + self.imm_regrets[a] * w, 0
+            )
         regret_sum = 0
         for regret in self.pred_regrets.values():
             regret_sum += max(0, regret)
@@ -29,16 +38,35 @@ class PDCFRPlusState(CFRState):
 
 
 class PDCFRPlus(CFR):
-    def __init__(self, game_config, logger=None, gamma=5, alpha=2.3):
-        super().__init__(game_config, logger, gamma)
+    def __init__(
+        self,
+        game_config,
+        logger=None,
+        gamma=5,
+        alpha=2.3,
+        storage_folder=None,
+        memory_budget_mb=None,
+    ):
+        super().__init__(
+            game_config,
+            logger,
+            gamma,
+            storage_folder=storage_folder,
+            memory_budget_mb=memory_budget_mb,
+        )
         self.alpha = alpha
 
     def init_state(self, h):
         return PDCFRPlusState(h)
 
+    def regret_discount(self, T):
+        d, _ = PDCFRPlusState.weight(T, self.alpha)
+        return d, d
+
     def update_state(self, s):
-        s.update_regret(self.num_iteration, self.alpha)
+        scale = self.scales["regrets_pos"][s.player]
+        s.update_regret(self.num_iteration, self.alpha, scale)
 
-        s.cumulate_policy(self.num_iteration, self.gamma)
+        s.cumulate_policy(self.scales["cum_policy"][s.player])
 
-        s.update_current_policy(self.num_iteration, self.alpha)
+        s.update_current_policy(self.num_iteration, self.alpha, scale)
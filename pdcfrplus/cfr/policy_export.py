@@ -0,0 +1,130 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import pyspiel
+
+DTYPES = ["float32", "float16", "uint8"]
+
+
+def infoset_digest(feature: str, player: int) -> int:
+    """
+    Stable 64-bit key of an infoset. Unlike ``hash`` it does not change between
+    processes, so it can be stored on disk.
+    """
+    key = "{}/{}".format(feature, player).encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def save_compact_policy(
+    folder: Union[str, Path],
+    features: Sequence[str],
+    players: Sequence[int],
+    policies: Sequence[Dict[int, float]],
+    dtype: str = "float32",
+    meta: Dict = None,
+) -> None:
+    """
+    Writes a policy as a sorted array of infoset digests, the offsets of every infoset
+    into contiguous action and probability arrays, and a json file of metadata.
+    uint8 stores probabilities quantized to 1/255.
+    """
+    if dtype not in DTYPES:
+        raise ValueError("Unknown dtype {}, expected one of {}".format(dtype, DTYPES))
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    digests = np.array(
+        [infoset_digest(f, p) for f, p in zip(features, players)], dtype=np.uint64
+    )
+    order = np.argsort(digests, kind="stable")
+    digests = digests[order]
+    if np.any(digests[1:] == digests[:-1]):
+        raise ValueError("Hash collision between infoset keys")
+
+    offsets = np.zeros(len(order) + 1, dtype=np.int64)
+    actions, probs = [], []
+    for i, idx in enumerate(order):
+        policy = policies[idx]
+        actions.extend(policy.keys())
+        probs.extend(policy.values())
+        offsets[i + 1] = len(actions)
+    probs = np.array(probs, dtype=np.float64)
+    if dtype == "uint8":
+        probs = np.round(probs * 255)
+
+    np.save(folder / "digests.npy", digests)
+    np.save(folder / "offsets.npy", offsets)
+    np.save(folder / "actions.npy", np.array(actions, dtype=np.int32))
+    np.save(folder / "probs.npy", probs.astype(dtype))
+    meta = dict(meta or {})
+    meta.update({"dtype": dtype, "num_infosets": len(order)})
+    with open(folder / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+class CompactPolicy:
+    """
+    Read-only policy written by ``save_compact_policy``. The arrays are memory-mapped,
+    so loading costs nothing and pages are read on first access.
+    """
+
+    def __init__(self, folder: Union[str, Path]):
+        folder = Path(folder)
+        with open(folder / "meta.json", "r") as f:
+            self.meta = json.load(f)
+        self.digests = np.load(folder / "digests.npy", mmap_mode="r")
+        self.offsets = np.load(folder / "offsets.npy", mmap_mode="r")
+        self.actions = np.load(folder / "actions.npy", mmap_mode="r")
+        self.probs = np.load(folder / "probs.npy", mmap_mode="r")
+        self.quantized = self.meta["dtype"] == "uint8"
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    def _index(self, digest: int) -> int:
+        digest = np.uint64(digest)
+        idx = int(np.searchsorted(self.digests, digest))
+        if idx == len(self.digests) or self.digests[idx] != digest:
+            raise KeyError(digest)
+        return idx
+
+    def _slice(self, idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        probs = np.asarray(self.probs[start:end], dtype=np.float64)
+        if self.quantized:
+            total = probs.sum()
+            if total > 0:
+                probs = probs / total
+            else:
+                probs = np.full(end - start, 1 / (end - start))
+        return np.asarray(self.actions[start:end]), probs
+
+    def get(self, feature: str, player: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the legal actions and their average probabilities of an infoset.
+        """
+        return self._slice(self._index(infoset_digest(feature, player)))
+
+    def get_batch(
+        self, features: Sequence[str], players: Sequence[int]
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        digests = np.array(
+            [infoset_digest(f, p) for f, p in zip(features, players)], dtype=np.uint64
+        )
+        idxs = np.searchsorted(self.digests, digests)
+        idxs = np.minimum(idxs, len(self.digests) - 1)
+        missing = self.digests[idxs] != digests
+        if np.any(missing):
+            raise KeyError(features[int(np.argmax(missing))])
+        return [self._slice(idx) for idx in idxs]
+
+    def action_probabilities(self, h: pyspiel.State) -> Dict[int, float]:
+        player = h.current_player()
+        actions, probs = self.get(h.information_state_string(player), player)
+        return dict(zip(actions.tolist(), probs.tolist()))
+
+    def __call__(self, h: pyspiel.State) -> Dict[int, float]:
+        return self.action_probabilities(h)
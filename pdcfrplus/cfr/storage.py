@@ -0,0 +1,195 @@
+import mmap
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+class ActionValues(MutableMapping):
+    """
+    Dict-like view of the values of one infoset in a table of ``TableStorage``, so the
+    state classes keep indexing ``s.regrets[a]`` by action.
+    """
+
+    __slots__ = ["array", "offset", "index", "chunk"]
+
+    def __init__(
+        self, array: np.ndarray, offset: int, index: Dict[int, int], chunk: "Chunk"
+    ):
+        self.array = array
+        self.offset = offset
+        self.index = index
+        self.chunk = chunk
+
+    def __getitem__(self, a: int) -> float:
+        return float(self.array[self.offset + self.index[a]])
+
+    def __setitem__(self, a: int, value: float) -> None:
+        self.array[self.offset + self.index[a]] = value
+
+    def __delitem__(self, a: int) -> None:
+        raise TypeError("Actions can not be removed from an infoset")
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class Chunk:
+    """
+    One block of every table, backed by one memory-mapped file per table.
+    """
+
+    def __init__(self, names: List[str], size: int, folder: Path, number: int):
+        self.arrays: Dict[str, np.ndarray] = {}
+        self.maps: List[mmap.mmap] = []
+        self.nbytes = size * 8 * len(names)
+        for name in names:
+            with open(folder / "{}_{}.bin".format(name, number), "w+b") as f:
+                f.truncate(size * 8)
+                buffer = mmap.mmap(f.fileno(), size * 8)
+            self.maps.append(buffer)
+            self.arrays[name] = np.frombuffer(buffer, dtype=np.float64)
+
+    def release(self) -> None:
+        """
+        Writes the chunk back and drops its pages from memory, they are read again
+        from the files on the next access.
+        """
+        for buffer in self.maps:
+            buffer.flush()
+            if hasattr(mmap, "MADV_DONTNEED"):
+                buffer.madvise(mmap.MADV_DONTNEED)
+
+    def flush(self) -> None:
+        for buffer in self.maps:
+            buffer.flush()
+
+
+class TableStorage:
+    """
+    Keeps per-action tables of all infosets (regrets, policies, ...) in memory-mapped
+    float64 files instead of one dict per infoset and table. Infosets are laid out in
+    the order they are attached, which is the traversal order of
+    ``SolverBase.init_states``, in chunks of chunk_size values.
+    Sweeps over the infosets through ``stream`` release the chunks left behind as soon
+    as more than memory_budget_mb is resident, so the resident part of the tables stays
+    around the budget. Only the tables leave the heap: every state object and its views
+    stay in memory, a few hundred bytes per infoset, so the budget bounds the memory of
+    the accumulators, not that of the solver.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        folder: Union[str, Path],
+        memory_budget_mb: Optional[float] = None,
+        chunk_size: int = 1 << 18,
+    ):
+        self.names = list(names)
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.memory_budget = (
+            None if memory_budget_mb is None else memory_budget_mb * 1024 * 1024
+        )
+        self.chunk_size = chunk_size
+        self.chunks: List[Chunk] = []
+        self.position = chunk_size
+        # legal actions and index of the infosets with these legal actions
+        self.indexes: Dict[
+            Tuple[int, ...], Tuple[Tuple[int, ...], Dict[int, int]]
+        ] = {}
+        # chunks touched by sweeps since their last release, oldest first
+        self.resident: "OrderedDict[int, Chunk]" = OrderedDict()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(chunk.nbytes for chunk in self.chunks)
+
+    def attach(self, state) -> None:
+        """
+        Moves the tables of a state into the storage and replaces them by views. The
+        legal actions are shared by the infosets with the same actions and the unused
+        children lists of the state are dropped.
+        """
+        actions = tuple(state.legal_actions)
+        if len(actions) > self.chunk_size:
+            raise ValueError("An infoset has more actions than chunk_size")
+        if self.position + len(actions) > self.chunk_size:
+            if self.memory_budget is not None and self.nbytes > self.memory_budget:
+                self.chunks[-1].release()
+            self.chunks.append(
+                Chunk(self.names, self.chunk_size, self.folder, len(self.chunks))
+            )
+            self.position = 0
+        # infosets with the same legal actions share them and one index
+        shared = self.indexes.get(actions)
+        if shared is None:
+            shared = self.indexes[actions] = (
+                actions,
+                {a: i for i, a in enumerate(actions)},
+            )
+        actions, index = shared
+        chunk = self.chunks[-1]
+        for name in self.names:
+            values = getattr(state, name)
+            array = chunk.arrays[name]
+            array[self.position : self.position + len(actions)] = [
+                values[a] for a in actions
+            ]
+            setattr(state, name, ActionValues(array, self.position, index, chunk))
+        state.legal_actions = actions
+        if hasattr(state, "children"):
+            del state.children
+        self.position += len(actions)
+
+    def stream(self, states: List) -> Iterator:
+        """
+        Yields states in the given order. States have to be in storage order, which
+        holds for ``SolverBase.player_states``.
+        """
+        if self.memory_budget is None:
+            yield from states
+            return
+        current = None
+        for state in states:
+            chunk = getattr(state, self.names[0]).chunk
+            if chunk is not current:
+                current = chunk
+                self.resident[id(chunk)] = chunk
+                self.resident.move_to_end(id(chunk))
+                self._enforce_budget(keep=chunk)
+            yield state
+
+    def trim(self) -> None:
+        """
+        Releases all chunks if the tables are larger than the budget. Called after
+        traversals, which touch infosets out of storage order.
+        """
+        if self.memory_budget is None:
+            return
+        if self.nbytes > self.memory_budget:
+            for chunk in self.chunks:
+                chunk.release()
+            self.resident.clear()
+
+    def _enforce_budget(self, keep: Chunk) -> None:
+        resident_bytes = sum(chunk.nbytes for chunk in self.resident.values())
+        while resident_bytes > self.memory_budget and len(self.resident) > 1:
+            key, chunk = next(iter(self.resident.items()))
+            if chunk is keep:
+                break
+            del self.resident[key]
+            chunk.release()
+            resident_bytes -= chunk.nbytes
+
+    def flush(self) -> None:
+        for chunk in self.chunks:
+            chunk.flush()
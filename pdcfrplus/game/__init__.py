@@ -1 +1,6 @@
-from .game_config import GameConfig, read_game_config
+from .game_config import (
+    GameConfig,
+    list_game_configs,
+    list_large_game_configs,
+    read_game_config,
+)
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import List
 
 import pyspiel
 
@@ -25,8 +26,6 @@ class GameConfig:
         game = pyspiel.load_game(self.game_name, params)
         if self.transform:
             game = pyspiel.convert_to_turn_based(game)
-        self.num_nodes = 0
-        self.calc_nodes(game.new_initial_state())
         return game
 
     def get_draw_file(self):
@@ -41,13 +40,6 @@ class GameConfig:
     def __repr__(self):
         return "{}({})".format(self.name, self.iterations)
 
-    def calc_nodes(self, h):
-        self.num_nodes += 1
-        if h.is_terminal():
-            return
-        for a in h.legal_actions():
-            self.calc_nodes(h.child(a))
-
     def visulize(self):
         from open_spiel.python.visualizations import treeviz
 
@@ -163,7 +155,7 @@ class LiarsDice(GameConfig):
         self.name = "LiarsDice{}".format(dice_sides)
 
 
-def read_game_config(game_name, iterations=1000) -> GameConfig:
+def list_game_configs(iterations=1000) -> List[GameConfig]:
     game_configs = [
         KuhnPoker(iterations),
         LeducPoker(iterations),
@@ -177,6 +169,22 @@ def read_game_config(game_name, iterations=1000) -> GameConfig:
         BattleShip(iterations, board_width=3, board_height=2, num_shots=3),
         BattleShip(iterations, board_width=2, board_height=2, num_shots=3),
     ]
+    return game_configs
+
+
+def list_large_game_configs(iterations=1000) -> List[GameConfig]:
+    """
+    Configurations whose tables are meant to be kept out of core, see TableStorage.
+    """
+    game_configs = [
+        LiarsDice(iterations, dice_sides=6, num_dice=1),
+        BattleShip(iterations, board_width=3, board_height=3, num_shots=3),
+    ]
+    return game_configs
+
+
+def read_game_config(game_name, iterations=1000) -> GameConfig:
+    game_configs = list_game_configs(iterations) + list_large_game_configs(iterations)
     game_dict = {game_config.name: game_config for game_config in game_configs}
     game_config = game_dict[game_name]
     return game_config
@@ -0,0 +1,317 @@
+import json
+import multiprocessing
+import platform
+import resource
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from pdcfrplus.utils.logger import Logger
+from pdcfrplus.utils.utils import load_module
+
+POKERRL_GAMES = ["Subgame3", "Subgame4"]
+
+# metric name -> True if larger values are better
+METRICS = {
+    "build_time": False,
+    "iterations_per_sec": True,
+    "eval_time": False,
+    "peak_rss_mb": False,
+    "time_to_target": False,
+}
+
+
+def get_peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    if platform.system() == "Darwin":
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def benchmark_solver(
+    algo_name: str,
+    game_name: str,
+    iterations: int = 100,
+    target_exp: Optional[float] = None,
+    eval_interval: int = 10,
+    storage_folder: Optional[str] = None,
+    memory_budget_mb: Optional[float] = None,
+    num_workers: int = 1,
+) -> Dict[str, Any]:
+    """
+    Benchmarks a pdcfrplus solver on an OpenSpiel game.
+    Iteration and evaluation time are measured separately, time_to_target only counts
+    the solver iterations needed before the exploitability drops below target_exp.
+    With a storage_folder the solver keeps its tables in memory-mapped files, with
+    num_workers > 1 the traversal is sharded over that many processes.
+    """
+    from pdcfrplus.game import read_game_config
+
+    solver_class = load_module("pdcfrplus.cfr:{}".format(algo_name))
+    game_config = read_game_config(game_name, iterations)
+
+    start = time.perf_counter()
+    solver = solver_class(
+        game_config,
+        Logger(writer_strings=[]),
+        storage_folder=storage_folder,
+        memory_budget_mb=memory_budget_mb,
+    )
+    if num_workers > 1:
+        solver.parallelize(num_workers)
+    build_time = time.perf_counter() - start
+
+    iter_time, eval_time, num_evals = 0.0, 0.0, 0
+    time_to_target, exp = None, None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        solver.iteration()
+        iter_time += time.perf_counter() - start
+        is_last = solver.num_iteration == iterations
+        if solver.num_iteration % eval_interval == 0 or is_last:
+            start = time.perf_counter()
+            exp = solver.calc_exp()
+            eval_time += time.perf_counter() - start
+            num_evals += 1
+            if target_exp is not None and exp <= target_exp:
+                time_to_target = iter_time
+                break
+
+    solver.close()
+    return {
+        "build_time": build_time,
+        "iterations": solver.num_iteration,
+        "iterations_per_sec": solver.num_iteration / iter_time,
+        "eval_time": eval_time / num_evals,
+        "exp": exp,
+        "time_to_target": time_to_target,
+    }
+
+
+def benchmark_runner(
+    algo_name: str,
+    game_name: str,
+    iterations: int = 10,
+    target_exp: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Benchmarks a PokerRL solver through CFRRunner. The PokerRL solvers evaluate the
+    average strategy inside every iteration, so the iteration time includes it and
+    eval_time is measured by one extra call to _evaluate_avg_strats.
+    """
+    from PokerRL.cfr_runner import CFRRunner
+
+    start = time.perf_counter()
+    runner = CFRRunner(
+        algo_name=algo_name,
+        game_name=game_name,
+        iterations=iterations,
+        logger=Logger(writer_strings=[]),
+    )
+    build_time = time.perf_counter() - start
+
+    iter_time, time_to_target, exp = 0.0, None, None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        runner.iteration()
+        iter_time += time.perf_counter() - start
+        exp = runner.cfr.expl / 1000
+        if target_exp is not None and exp <= target_exp:
+            time_to_target = iter_time
+            break
+
+    start = time.perf_counter()
+    runner.cfr._evaluate_avg_strats()
+    eval_time = time.perf_counter() - start
+
+    return {
+        "build_time": build_time,
+        "iterations": runner.step,
+        "iterations_per_sec": runner.step / iter_time,
+        "eval_time": eval_time,
+        "exp": exp,
+        "time_to_target": time_to_target,
+    }
+
+
+def benchmark_env_snapshot(game_name: str, calls: int = 10000) -> Dict[str, Any]:
+    """
+    Times one save and restore of the env of a PokerRL game, as done at every node by
+    the tree building and LBR, through state_dict/load_state_dict and through
+    snapshot/load_snapshot.
+    """
+    from PokerRL.game import bet_sets
+    from PokerRL.game.games import (
+        DiscretizedNLHoldemSubGame3,
+        DiscretizedNLHoldemSubGame4,
+    )
+
+    game_cls = {
+        "Subgame3": DiscretizedNLHoldemSubGame3,
+        "Subgame4": DiscretizedNLHoldemSubGame4,
+    }[game_name]
+    env_args = game_cls.ARGS_CLS(
+        n_seats=2,
+        starting_stack_sizes_list=[game_cls.DEFAULT_STACK_SIZE] * 2,
+        bet_sizes_list_as_frac_of_pot=bet_sets.B_3,
+    )
+    env = game_cls(
+        env_args=env_args, lut_holder=game_cls.get_lut_holder(), is_evaluating=True
+    )
+    env.reset()
+
+    result = {"game_name": game_name, "calls": calls}
+    for name, save, load in [
+        ("state_dict", env.state_dict, env.load_state_dict),
+        ("snapshot", env.snapshot, env.load_snapshot),
+    ]:
+        start = time.perf_counter()
+        for _ in range(calls):
+            load(save())
+        result[name + "_us"] = (time.perf_counter() - start) / calls * 1e6
+    result["speedup"] = result["state_dict_us"] / result["snapshot_us"]
+    return result
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    if case["game_name"] in POKERRL_GAMES:
+        result = benchmark_runner(
+            case["algo_name"],
+            case["game_name"],
+            iterations=case["iterations"],
+            target_exp=case.get("target_exp"),
+        )
+    else:
+        result = benchmark_solver(
+            case["algo_name"],
+            case["game_name"],
+            iterations=case["iterations"],
+            target_exp=case.get("target_exp"),
+            eval_interval=case.get("eval_interval", 10),
+            storage_folder=case.get("storage_folder"),
+            memory_budget_mb=case.get("memory_budget_mb"),
+            num_workers=case.get("num_workers", 1),
+        )
+    result["peak_rss_mb"] = get_peak_rss_mb()
+    result.update(case)
+    return result
+
+
+def run_isolated(case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs a benchmark case in a fresh process so that peak RSS and imports
+    do not leak between cases.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes=1, maxtasksperchild=1) as pool:
+        return pool.apply(run_case, (case,))
+
+
+def case_key(result: Dict[str, Any]) -> str:
+    """
+    Identifies a case by its game, algorithm and every parameter that shapes the run,
+    so results are only compared with results of the same shape.
+    """
+    key = "{}/{}".format(result["game_name"], result["algo_name"])
+    if result.get("num_workers", 1) > 1:
+        key += "/workers{}".format(result["num_workers"])
+    if result.get("storage_folder") is not None:
+        key += "/mmap"
+        if result.get("memory_budget_mb") is not None:
+            key += "{:g}mb".format(result["memory_budget_mb"])
+    key += "/{}it".format(result["iterations"])
+    if result.get("eval_interval") is not None:
+        key += "/eval{}".format(result["eval_interval"])
+    if result.get("target_exp") is not None:
+        key += "/target{:g}".format(result["target_exp"])
+    return key
+
+
+def compare_storage(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Throughput of every memory-mapped case relative to the same case in memory.
+    """
+    in_memory = {
+        case_key(result): result
+        for result in results
+        if result.get("storage_folder") is None
+    }
+    ratios = []
+    for result in results:
+        if result.get("storage_folder") is None:
+            continue
+        key = case_key(result)
+        base = in_memory.get(
+            case_key(dict(result, storage_folder=None, memory_budget_mb=None))
+        )
+        if base is None:
+            continue
+        ratios.append(
+            {
+                "case": key,
+                "iterations_per_sec": result["iterations_per_sec"],
+                "in_memory": base["iterations_per_sec"],
+                "ratio": result["iterations_per_sec"] / base["iterations_per_sec"],
+                "peak_rss_mb": result["peak_rss_mb"],
+                "in_memory_peak_rss_mb": base["peak_rss_mb"],
+            }
+        )
+    return ratios
+
+
+def save_results(results: List[Dict[str, Any]], file: Union[str, Path]) -> None:
+    file = Path(file)
+    file.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": platform.node(),
+        "results": {case_key(result): result for result in results},
+    }
+    with open(file, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_results(file: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    with open(file, "r") as f:
+        data = json.load(f)
+    return data["results"]
+
+
+def compare_results(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float = 0.1,
+) -> List[Dict[str, Any]]:
+    """
+    Compares every metric of results against the baseline. A change is flagged as a
+    regression or a gain when it is larger than tolerance (relative).
+    """
+    changes = []
+    for result in results:
+        key = case_key(result)
+        if key not in baseline:
+            continue
+        for metric, larger_is_better in METRICS.items():
+            new, old = result.get(metric), baseline[key].get(metric)
+            if new is None or old is None or old == 0:
+                continue
+            ratio = new / old
+            improved = ratio > 1 if larger_is_better else ratio < 1
+            if abs(ratio - 1) <= tolerance:
+                status = "same"
+            elif improved:
+                status = "gain"
+            else:
+                status = "regression"
+            changes.append(
+                {
+                    "case": key,
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": ratio,
+                    "status": status,
+                }
+            )
+    return changes
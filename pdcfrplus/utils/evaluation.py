@@ -0,0 +1,118 @@
+import multiprocessing
+import traceback
+from typing import Callable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+def get_eval_iterations(
+    total_iterations: int, interval: int = 1, log_points: Optional[int] = None
+) -> Set[int]:
+    """
+    Iterations at which the exploitability is evaluated: every interval iterations, or
+    log_points iterations spaced logarithmically between 1 and total_iterations.
+    Iteration 0 and the last iteration are always part of the log-spaced schedule.
+    """
+    if log_points is None:
+        return set(range(0, total_iterations + 1, interval))
+    points = np.logspace(0, np.log10(max(total_iterations, 1)), log_points)
+    iterations = set(int(i) for i in np.unique(np.round(points)))
+    iterations.update([0, total_iterations])
+    return iterations
+
+
+def _evaluate_in_child(evaluate_fn, step, conn):
+    try:
+        conn.send((step, evaluate_fn(), None))
+    except Exception:
+        conn.send((step, None, traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+class AsyncEvaluator:
+    """
+    Runs evaluate_fn in forked worker processes. The fork is a copy-on-write snapshot
+    of the solver at the submitted iteration, so the solver continues immediately
+    and only the pages it modifies afterwards are copied. Shared memory, e.g. the
+    memory-mapped tables of TableStorage, is not part of the snapshot.
+    At most max_workers evaluations run at the same time, further submissions wait for
+    the oldest one.
+    """
+
+    def __init__(self, evaluate_fn: Callable[[], float], max_workers: int = 2):
+        self.evaluate_fn = evaluate_fn
+        self.max_workers = max_workers
+        self.ctx = multiprocessing.get_context("fork")
+        self.workers = []
+        self.results = []
+
+    def submit(self, step: int) -> None:
+        while len(self.workers) >= self.max_workers:
+            self._receive(self.workers[0])
+        recv_conn, send_conn = self.ctx.Pipe(duplex=False)
+        process = self.ctx.Process(
+            target=_evaluate_in_child, args=(self.evaluate_fn, step, send_conn)
+        )
+        process.start()
+        send_conn.close()
+        self.workers.append((process, recv_conn))
+
+    def _receive(self, worker) -> None:
+        process, conn = worker
+        step, value, error = conn.recv()
+        conn.close()
+        process.join()
+        self.workers.remove(worker)
+        if error is not None:
+            raise RuntimeError(
+                "Evaluation of step {} failed:\n{}".format(step, error)
+            )
+        self.results.append((step, value))
+
+    def poll(self) -> List[Tuple[int, float]]:
+        """
+        Returns the (step, value) pairs finished since the last call without blocking.
+        """
+        for worker in list(self.workers):
+            if worker[1].poll():
+                self._receive(worker)
+        results, self.results = self.results, []
+        return results
+
+    def close(self) -> List[Tuple[int, float]]:
+        """
+        Waits for all pending evaluations and returns their results.
+        """
+        while self.workers:
+            self._receive(self.workers[0])
+        results, self.results = self.results, []
+        return results
+
+
+class TargetStopping:
+    """
+    Stops a solve once the exploitability reaches target. The exact exploitability is
+    only computed by calc_exp once the cheap regret-based bound of the solver is at
+    most the target. For the discounted variants the bound is an estimate, so a check
+    can miss; the next check then waits until the bound has halved.
+    """
+
+    def __init__(self, target: float, calc_exp: Callable[[], float]):
+        self.target = target
+        self.calc_exp = calc_exp
+        self.threshold = target
+        self.reached = False
+
+    def check(self, bound: Optional[float]) -> Optional[float]:
+        """
+        Returns the exact exploitability if the bound triggered its computation.
+        """
+        if bound is None or bound > self.threshold:
+            return None
+        exp = self.calc_exp()
+        if exp <= self.target:
+            self.reached = True
+        else:
+            self.threshold = bound / 2
+        return exp
@@ -0,0 +1,382 @@
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from pdcfrplus.utils.utils import load_module
+
+ALGOS = ["CFR", "CFRPlus", "LinearCFR", "DCFR", "PCFRPlus", "DCFRPlus", "PDCFRPlus"]
+
+# exact counts of the games, keyed by game_key
+COUNTS_FILE = (
+    Path(__file__).absolute().parents[2] / "results" / "forecast" / "counts.json"
+)
+
+COUNT_NAMES = [
+    "nodes",
+    "decision_nodes",
+    "terminal_nodes",
+    "infosets",
+    "infoset_actions",
+]
+
+
+def game_key(game_config) -> str:
+    """
+    Identifies the game of a GameConfig independently of its iterations.
+    """
+    key = game_config.game_name + json.dumps(game_config.params, sort_keys=True)
+    if game_config.transform:
+        key += "/turn_based"
+    return key
+
+
+def load_counts(
+    key: str, file: Union[str, Path] = COUNTS_FILE
+) -> Optional[Dict[str, int]]:
+    file = Path(file)
+    if not file.exists():
+        return None
+    with open(file, "r") as f:
+        return json.load(f).get(key)
+
+
+def save_counts(
+    key: str, counts: Dict[str, int], file: Union[str, Path] = COUNTS_FILE
+) -> None:
+    file = Path(file)
+    file.parent.mkdir(parents=True, exist_ok=True)
+    data = {}
+    if file.exists():
+        with open(file, "r") as f:
+            data = json.load(f)
+    data[key] = {name: int(counts[name]) for name in COUNT_NAMES}
+    # rename is atomic, concurrent readers never see a partially written file
+    tmp_file = file.with_name("{}.{}.tmp".format(file.name, os.getpid()))
+    with open(tmp_file, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, file)
+
+
+def cache_counts(
+    key: str, counts: Dict[str, int], file: Union[str, Path] = COUNTS_FILE
+) -> bool:
+    """
+    Saves the counts of a game unless they are cached already. The cache is only an
+    optimization, so a file that cannot be read or written (e.g. a read-only install)
+    is ignored. Returns whether the counts were saved.
+    """
+    try:
+        if load_counts(key, file) is not None:
+            return False
+        save_counts(key, counts, file)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def count_tree(game) -> Dict[str, int]:
+    """
+    Exact counts by a walk of the whole game tree.
+    """
+    counts = {name: 0 for name in COUNT_NAMES}
+    infosets = [set() for _ in range(game.num_players())]
+
+    def walk(h):
+        counts["nodes"] += 1
+        if h.is_terminal():
+            counts["terminal_nodes"] += 1
+            return
+        if not h.is_chance_node():
+            counts["decision_nodes"] += 1
+            player = h.current_player()
+            # hashes like InfosetIndex, the strings of large games do not fit in memory
+            digest = hash(h.information_state_string(player))
+            if digest not in infosets[player]:
+                infosets[player].add(digest)
+                counts["infosets"] += 1
+                counts["infoset_actions"] += len(h.legal_actions())
+        for a in h.legal_actions():
+            walk(h.child(a))
+
+    walk(game.new_initial_state())
+    return counts
+
+
+def sample_tree(game, num_probes: int = 1000, seed: int = 0) -> Dict[str, float]:
+    """
+    Knuth's estimator: every probe walks from the root to a terminal with uniformly
+    random actions and counts each node on its path weighted by the product of the
+    branching factors above it, which is an unbiased estimate of the size of the level.
+    Also returns node_sec, the time of one step of the probes, a node visit of a
+    traversal without the table updates.
+    """
+    rng = random.Random(seed)
+    totals = {
+        "nodes": 0.0,
+        "decision_nodes": 0.0,
+        "terminal_nodes": 0.0,
+        "decision_actions": 0.0,
+    }
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(num_probes):
+        h = game.new_initial_state()
+        weight = 1.0
+        while True:
+            totals["nodes"] += weight
+            if h.is_terminal():
+                totals["terminal_nodes"] += weight
+                break
+            actions = h.legal_actions()
+            if not h.is_chance_node():
+                totals["decision_nodes"] += weight
+                totals["decision_actions"] += weight * len(actions)
+            weight *= len(actions)
+            h = h.child(rng.choice(actions))
+            steps += 1
+    elapsed = time.perf_counter() - start
+    estimates = {name: total / num_probes for name, total in totals.items()}
+    estimates["node_sec"] = elapsed / max(steps, 1)
+    return estimates
+
+
+def infoset_ratio(game, max_nodes: int = 10**5) -> float:
+    """
+    Infosets per decision node of the deepest level of the tree that is walked
+    exactly, where the levels from the root have at most max_nodes nodes together.
+    Deeper levels are assumed to group their histories into infosets alike.
+    """
+    level = [game.new_initial_state()]
+    visited = 0
+    ratio = 1.0
+    while level and visited + len(level) <= max_nodes:
+        infosets = set()
+        decision_nodes = 0
+        next_level = []
+        for h in level:
+            if h.is_terminal():
+                continue
+            if not h.is_chance_node():
+                player = h.current_player()
+                decision_nodes += 1
+                infosets.add((player, hash(h.information_state_string(player))))
+            next_level.extend(h.child(a) for a in h.legal_actions())
+        if decision_nodes > 0:
+            ratio = len(infosets) / decision_nodes
+        visited += len(level)
+        level = next_level
+    return ratio
+
+
+class _ProbeHistory:
+    """
+    Stand-in for a pyspiel.State with num_actions legal actions, to measure the
+    memory of the states of a solver.
+    """
+
+    def __init__(self, num_actions: int):
+        self.num_actions = num_actions
+
+    def legal_actions(self):
+        return list(range(self.num_actions))
+
+    def current_player(self):
+        return 0
+
+
+def _deep_sizeof(obj, seen=None) -> int:
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(
+            _deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items()
+        )
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_deep_sizeof(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _deep_sizeof(vars(obj), seen)
+    return size
+
+
+def _index_bytes_per_infoset(n: int = 10000) -> float:
+    """
+    Memory of one entry of InfosetIndex and of the state lists of SolverBase.
+    """
+    table = {hash(str(i)): i for i in range(n)}
+    states = [None for _ in range(n)]
+    return (sys.getsizeof(table) + 3 * sys.getsizeof(states)) / n
+
+
+def forecast_solver(
+    algo_name: str, counts: Dict[str, float], num_players: int, node_sec: float
+) -> Dict[str, float]:
+    """
+    Memory of the tables of a pdcfrplus solver, in dicts and in memory-mapped files
+    (see TableStorage), measured on a fresh state with the mean number of actions
+    of the infosets, and the time of an iteration, one traversal per player.
+    """
+    solver_class = load_module("pdcfrplus.cfr:{}".format(algo_name))
+    infosets = counts["infosets"]
+    num_actions = max(int(round(counts["infoset_actions"] / max(infosets, 1))), 1)
+    state_bytes = _deep_sizeof(
+        solver_class.init_state(None, _ProbeHistory(num_actions))
+    )
+    index_bytes = _index_bytes_per_infoset()
+    table_bytes = 8 * len(solver_class.stored_tables) * counts["infoset_actions"]
+    # the node arrays of SolverBase take two 8-byte entries per node
+    memory_bytes = infosets * (state_bytes + index_bytes) + 16 * counts["nodes"]
+    return {
+        "memory_mb": memory_bytes / 1024 / 1024,
+        "storage_table_mb": table_bytes / 1024 / 1024,
+        "iteration_sec": num_players * counts["nodes"] * node_sec,
+    }
+
+
+def forecast_game(
+    game_config,
+    num_probes: int = 1000,
+    seed: int = 0,
+    max_exact_nodes: int = 10**6,
+    algos: Optional[List[str]] = None,
+    counts_file: Union[str, Path] = COUNTS_FILE,
+) -> Dict[str, Any]:
+    """
+    Forecasts the size of the tree of an OpenSpiel game and the memory and iteration
+    time of the pdcfrplus solvers on it. Counts are exact if they are cached in
+    counts_file (see SolverBase.cache_tree_counts) or if the sampled tree has at
+    most max_exact_nodes nodes, in which case it is walked and the counts are cached.
+    Otherwise the node counts come from sample_tree and the infosets from
+    infoset_ratio.
+    """
+    if algos is None:
+        algos = ALGOS
+    game = game_config.load_game()
+    key = game_key(game_config)
+    sampled = sample_tree(game, num_probes, seed)
+    try:
+        counts = load_counts(key, counts_file)
+    except (OSError, ValueError):
+        counts = None
+    exact = counts is not None
+    if counts is None and sampled["nodes"] <= max_exact_nodes:
+        counts = count_tree(game)
+        cache_counts(key, counts, counts_file)
+        exact = True
+    if counts is None:
+        ratio = infoset_ratio(game, min(max_exact_nodes, 10**5))
+        counts = {
+            "nodes": sampled["nodes"],
+            "decision_nodes": sampled["decision_nodes"],
+            "terminal_nodes": sampled["terminal_nodes"],
+            "infosets": sampled["decision_nodes"] * ratio,
+            "infoset_actions": sampled["decision_actions"] * ratio,
+        }
+    result = {"game_name": game_config.name, "exact": exact}
+    result.update(counts)
+    result["algos"] = {
+        algo_name: forecast_solver(
+            algo_name, counts, game.num_players(), sampled["node_sec"]
+        )
+        for algo_name in algos
+    }
+    return result
+
+
+def forecast_public_tree(
+    game_name: str,
+    num_probes: int = 1000,
+    seed: int = 0,
+    agent_bet_set=None,
+    other_agent_bet_set=None,
+    stop_at_street: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Forecasts the size and memory of the PublicTree of a PokerRL subgame with the bet
+    sets of build_solver by default, with Knuth's estimator over random walks of the
+    env. Chance nodes branch over the cards left out of the board, as in the tree.
+    Nodes hold float32 reach probs and five kinds of values over both ranges, decision
+    nodes also the strategy and four CFR tables per action. The iteration time is not
+    forecast, it is dominated by the showdown values of the terminal nodes.
+    """
+    from PokerRL.game import bet_sets
+    from PokerRL.game.Poker import Poker
+    from PokerRL.game.games import (
+        DiscretizedNLHoldemSubGame3,
+        DiscretizedNLHoldemSubGame4,
+    )
+    from PokerRL.game.wrappers import HistoryEnvBuilder
+
+    game_cls = {
+        "Subgame3": DiscretizedNLHoldemSubGame3,
+        "Subgame4": DiscretizedNLHoldemSubGame4,
+    }[game_name]
+    if agent_bet_set is None:
+        agent_bet_set = bet_sets.B_3
+    if other_agent_bet_set is None:
+        other_agent_bet_set = bet_sets.B_2
+    env_args = game_cls.ARGS_CLS(
+        n_seats=2,
+        starting_stack_sizes_list=[game_cls.DEFAULT_STACK_SIZE] * 2,
+        bet_sizes_list_as_frac_of_pot=agent_bet_set,
+        other_bet_sizes_list_as_frac_of_pot=other_agent_bet_set,
+    )
+    env_bldr = HistoryEnvBuilder(env_cls=game_cls, env_args=env_args)
+    env = env_bldr.get_new_env(is_evaluating=True)
+    args = env.get_args()
+    args.RETURN_PRE_TRANSITION_STATE_IN_INFO = True
+    env.set_args(args)
+    if stop_at_street is None:
+        stop_at_street = max(env.ALL_ROUNDS_LIST) + 1
+
+    rng = random.Random(seed)
+    totals = {"nodes": 0.0, "decision_nodes": 0.0, "decision_actions": 0.0}
+    for _ in range(num_probes):
+        env.reset()
+        if hasattr(env, "root_env_state"):
+            env.load_state_dict(env.root_env_state)
+        weight = 1.0
+        totals["nodes"] += weight
+        while True:
+            actions = env.get_legal_actions()
+            totals["decision_nodes"] += weight
+            totals["decision_actions"] += weight * len(actions)
+            weight *= len(actions)
+            totals["nodes"] += weight
+            _, _, done, info = env.step(rng.choice(actions))
+            if done:
+                break
+            if info["chance_acts"]:
+                if env.current_round >= stop_at_street:
+                    break
+                # the env has dealt the new cards, the tree has one child per board
+                n_dealt = env_bldr.lut_holder.DICT_LUT_CARDS_DEALT_IN_TRANSITION_TO[
+                    env.current_round
+                ]
+                n_undealt = env.N_CARDS_IN_DECK - np.count_nonzero(
+                    env.board[:, 0] != Poker.CARD_NOT_DEALT_TOKEN_1D
+                )
+                for i in range(n_dealt):
+                    weight *= n_undealt + n_dealt - i
+                totals["nodes"] += weight
+    counts = {name: total / num_probes for name, total in totals.items()}
+
+    range_size = env_bldr.rules.RANGE_SIZE
+    node_bytes = 4 * range_size * 2 * 6
+    action_bytes = 4 * range_size * 5
+    memory_bytes = (
+        counts["nodes"] * node_bytes + counts["decision_actions"] * action_bytes
+    )
+    result = {"game_name": game_name, "exact": False}
+    result.update(counts)
+    result["memory_mb"] = memory_bytes / 1024 / 1024
+    return result
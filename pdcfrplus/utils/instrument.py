@@ -0,0 +1,137 @@
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from pdcfrplus.utils.logger import Logger
+
+
+class Instrumentation:
+    """
+    Per-phase wall time, call counts and allocation counts for solver methods.
+    Methods are wrapped on the instance by ``instrument``, so solvers that are never
+    instrumented run their original code without any overhead.
+    Recursive calls are counted in ``calls`` but only the outermost call is timed,
+    which makes ``calls - entries`` the number of recursive visits of a traversal.
+    Allocation counts are the net change of ``sys.getallocatedblocks``.
+    :param profile_iteration: iteration sampled by the flame-graph profiler
+    :param profile_folder: folder of the collapsed-stack file of the profiler
+    :param profile_interval: seconds between two samples of the profiler
+    """
+
+    def __init__(
+        self,
+        profile_iteration: Optional[int] = None,
+        profile_folder: Optional[Union[str, Path]] = None,
+        profile_interval: float = 0.001,
+    ):
+        self.profile_iteration = profile_iteration
+        self.profile_folder = Path(profile_folder or ".")
+        self.profile_interval = profile_interval
+        self.profiler = None
+        self.num_iterations = 0
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.entries = defaultdict(int)
+        self.allocs = defaultdict(int)
+        self.depth = defaultdict(int)
+
+    def reset(self) -> None:
+        # cleared in place, the wrappers hold references to these dicts
+        self.times.clear()
+        self.calls.clear()
+        self.entries.clear()
+        self.allocs.clear()
+        self.num_iterations = 0
+
+    def instrument(self, obj, names: Iterable[str], prefix: str = "") -> None:
+        for name in names:
+            method = getattr(obj, name)
+            setattr(obj, name, self._wrap(prefix + name, method))
+
+    def _wrap(self, name, method):
+        times, calls, entries = self.times, self.calls, self.entries
+        allocs, depth = self.allocs, self.depth
+
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            if depth[name] > 0:
+                return method(*args, **kwargs)
+            entries[name] += 1
+            depth[name] += 1
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                times[name] += time.perf_counter() - start
+                allocs[name] += sys.getallocatedblocks() - blocks
+                depth[name] -= 1
+
+        return wrapper
+
+    def begin_iteration(self, iteration: int) -> None:
+        if iteration == self.profile_iteration:
+            self.profiler = SamplingProfiler(
+                threading.get_ident(), interval=self.profile_interval
+            )
+            self.profiler.start()
+
+    def end_iteration(self, iteration: int) -> None:
+        self.num_iterations += 1
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler.save(self.profile_folder / f"flame_{iteration}.txt")
+            self.profiler = None
+
+    def record(self, logger: Logger) -> None:
+        """
+        Records the statistics collected since the last call, together with the number
+        of iterations they cover.
+        """
+        logger.record("prof/iterations", self.num_iterations)
+        for name in self.calls.keys():
+            logger.record(f"prof/{name}_time", self.times[name])
+            logger.record(f"prof/{name}_calls", self.calls[name])
+            logger.record(f"prof/{name}_allocs", self.allocs[name])
+        self.reset()
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread at a fixed interval and writes the samples in the
+    collapsed-stack format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def save(self, file: Union[str, Path]) -> None:
+        file = Path(file)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        with open(file, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
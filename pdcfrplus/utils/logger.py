@@ -1,5 +1,12 @@
+import atexit
+import csv
+import io
 import logging
+import os
 import pickle
+import queue
+import threading
+import time
 from collections import defaultdict
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Sequence, Union
@@ -261,40 +268,137 @@ class SacredWriter(Writer):
 
 
 class CsvWriter(Writer):
-    def __init__(self, folder: Union[str, Path], csv_name: str = "data"):
-        self.folder = folder
-        self.data = pd.DataFrame(columns=["step"])
-        folder.mkdir(parents=True, exist_ok=True)
-        self.csv_file = Path(self.folder) / f"{csv_name}.csv"
+    """
+    Append-only csv writer. Rows are queued by ``write`` and flushed in batches by a
+    background thread, so the cost per dump stays constant over a run.
+    Keys that appear late do not rewrite the file while the run goes on: a
+    ``#columns,...`` line carrying the extended header is appended and the following
+    rows use it. ``close`` rewrites the file once with the full header, so a closed
+    file is a plain csv. Repeated steps are appended as new rows and merged by
+    ``read_csv_data``.
+    :param folder: folder to write the csv file to
+    :param csv_name: name of the csv file without suffix
+    :param flush_interval: maximum number of seconds a row stays in the buffer
+    :param batch_size: number of buffered rows that triggers an early flush
+    """
 
-    def write(self, key_values: Dict[str, Any], step: int = 0) -> None:
-        pd_key_values = {}
-        new_key = False
-        for key, value in key_values.items():
-            if isinstance(value, np.ScalarType):
-                pd_key_values[key] = value
-                if key not in self.data.columns:
-                    self.data[key] = None
-                    new_key = True
-        pd_key_values["step"] = step
-
-        if step in self.data.index:
-            data = self.data.loc[step].to_dict()
-            data.update(pd_key_values)
-            self.data.loc[step] = data
-            new_key = True
-        else:
-            self.data.loc[step] = pd_key_values
+    COLUMNS_PREFIX = "#columns"
 
-        if new_key:
-            self.data.to_csv(self.csv_file, index=False)
-        else:
-            new_data = pd.DataFrame(columns=self.data.columns)
-            new_data.loc[step] = pd_key_values
-            new_data.to_csv(self.csv_file, mode="a", index=False, header=False)
+    def __init__(
+        self,
+        folder: Union[str, Path],
+        csv_name: str = "data",
+        flush_interval: float = 5.0,
+        batch_size: int = 1000,
+    ):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.csv_file = self.folder / f"{csv_name}.csv"
+        self.columns = ["step"]
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.file = open(self.csv_file, "w", newline="")
+        self.csv = csv.writer(self.file, lineterminator="\n")
+        self.header_written = False
+        self.columns_extended = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, key_values: Dict[str, Any], step: int = 0) -> None:
+        row = {
+            key: value
+            for key, value in key_values.items()
+            if isinstance(value, np.ScalarType)
+        }
+        row["step"] = step
+        self.queue.put(row)
+
+    def _run(self) -> None:
+        closed = False
+        while not closed:
+            rows = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if row is None:
+                    closed = True
+                    break
+                rows.append(row)
+            self._flush(rows)
+
+    def _flush(self, rows: List[Dict[str, Any]]) -> None:
+        if len(rows) == 0:
+            return
+        for row in rows:
+            new_keys = [key for key in row if key not in self.columns]
+            if new_keys:
+                self.columns.extend(new_keys)
+                if self.header_written:
+                    self.csv.writerow([self.COLUMNS_PREFIX] + self.columns)
+                    self.columns_extended = True
+            if not self.header_written:
+                self.csv.writerow(self.columns)
+                self.header_written = True
+            self.csv.writerow([row.get(key, "") for key in self.columns])
+        self.file.flush()
 
     def close(self) -> None:
-        pass
+        if self.file.closed:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        if self.columns_extended:
+            self._rewrite_header()
+        atexit.unregister(self.close)
+
+    def _rewrite_header(self) -> None:
+        """
+        Replaces the ``#columns`` lines by one header with all columns, row by row.
+        """
+        tmp_file = self.csv_file.with_name(self.csv_file.name + ".tmp")
+        with open(self.csv_file, "r", newline="") as src, open(
+            tmp_file, "w", newline=""
+        ) as dst:
+            writer = csv.writer(dst, lineterminator="\n")
+            writer.writerow(self.columns)
+            reader = csv.reader(src)
+            columns = next(reader)
+            for line in reader:
+                if line and line[0] == self.COLUMNS_PREFIX:
+                    columns = line[1:]
+                    continue
+                row = dict(zip(columns, line))
+                writer.writerow([row.get(key, "") for key in self.columns])
+        os.replace(tmp_file, self.csv_file)
+
+
+def read_csv_data(csv_file: Union[str, Path]) -> pd.DataFrame:
+    """
+    Reads a file written by ``CsvWriter`` into a DataFrame indexed by step.
+    Files without late columns are parsed directly by pandas; otherwise each header
+    segment is parsed separately and the segments are concatenated.
+    :param csv_file: path of the csv file
+    """
+    with open(csv_file, "r", newline="") as f:
+        text = f.read()
+    if len(text) == 0:
+        return pd.DataFrame(columns=["step"]).set_index("step")
+
+    marker = "\n" + CsvWriter.COLUMNS_PREFIX + ","
+    segments = text.split(marker)
+    frames = [pd.read_csv(io.StringIO(segment)) for segment in segments]
+    data = pd.concat(frames, ignore_index=True, sort=False)
+    data = data.groupby("step", sort=True).last()
+    return data
 
 
 class StdoutWriter(Writer, SeqWriter):
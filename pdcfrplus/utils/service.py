@@ -0,0 +1,327 @@
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from pdcfrplus.utils.benchmark import POKERRL_GAMES
+from pdcfrplus.utils.evaluation import get_eval_iterations
+from pdcfrplus.utils.logger import Logger
+from pdcfrplus.utils.utils import load_module
+
+
+class SolverCache:
+    """
+    Fresh solvers of the (game, algo) pairs solved last, at most size of them, the
+    least recently used one is evicted. A job starts from a clone of the cached
+    OpenSpiel solver (see SolverBase.clone) or resets the cached PokerRL solver, so
+    the game tree is built once per pair. The LUTs, equity tables and PokerRL trees
+    loaded on the way are cached by the process anyway.
+    """
+
+    def __init__(self, size: int = 4, tree_cache_dir: Optional[str] = None):
+        self.size = size
+        self.tree_cache_dir = tree_cache_dir
+        self.solvers: "OrderedDict[tuple, Any]" = OrderedDict()
+        # values of the attributes of the PokerRL solvers before jobs overrode them
+        self.defaults: Dict[tuple, Dict[str, Any]] = {}
+
+    def get(self, game_name: str, algo_name: str):
+        """
+        Returns the cached solver and whether it was cached.
+        """
+        key = (game_name, algo_name)
+        solver = self.solvers.pop(key, None)
+        cached = solver is not None
+        if solver is None:
+            solver = self._build(game_name, algo_name)
+            self.defaults[key] = {}
+        self.solvers[key] = solver
+        while len(self.solvers) > self.size:
+            evicted_key, evicted = self.solvers.popitem(last=False)
+            del self.defaults[evicted_key]
+            evicted.close()
+        return solver, cached
+
+    def _build(self, game_name: str, algo_name: str):
+        if game_name in POKERRL_GAMES:
+            from PokerRL.cfr_runner import build_solver, set_cache_dirs
+            from PokerRL.game.games import (
+                DiscretizedNLHoldemSubGame3,
+                DiscretizedNLHoldemSubGame4,
+            )
+
+            set_cache_dirs(self.tree_cache_dir)
+            game_cls = {
+                "Subgame3": DiscretizedNLHoldemSubGame3,
+                "Subgame4": DiscretizedNLHoldemSubGame4,
+            }[game_name]
+            solver_class = load_module("PokerRL.cfr:{}".format(algo_name))
+            return build_solver(solver_class, game_cls, alpha=1.5, gamma=0, beta=1)
+
+        from pdcfrplus.game import read_game_config
+
+        solver_class = load_module("pdcfrplus.cfr:{}".format(algo_name))
+        return solver_class(read_game_config(game_name), Logger(writer_strings=[]))
+
+    def set_params(self, game_name: str, algo_name: str, params: Dict[str, Any]):
+        """
+        Sets the attributes of the cached PokerRL solver to params, and those set by
+        earlier jobs back to their values before.
+        """
+        solver = self.solvers[(game_name, algo_name)]
+        defaults = self.defaults[(game_name, algo_name)]
+        for name in params:
+            if not hasattr(solver, name):
+                raise ValueError(
+                    "{} has no parameter {}".format(solver.__class__.__name__, name)
+                )
+            defaults.setdefault(name, getattr(solver, name))
+        for name, default in defaults.items():
+            setattr(solver, name, params.get(name, default))
+
+    def clear(self):
+        for solver in self.solvers.values():
+            solver.close()
+        self.solvers.clear()
+        self.defaults.clear()
+
+
+def solve(
+    cache: SolverCache, job: Dict[str, Any], output_dir: Optional[Union[str, Path]]
+) -> Dict[str, Any]:
+    """
+    Runs a job {"game", "algo", "iterations", "params", "eval_interval",
+    "eval_log_points", "policy"} and returns the exploitability curve as
+    [iteration, exp] pairs. With policy and an output_dir, the average policy is saved
+    in a folder of output_dir and its path returned: a CompactPolicy for the OpenSpiel
+    games, a solution of CFRBase.save_solution for the PokerRL subgames.
+    """
+    game_name, algo_name = job["game"], job["algo"]
+    iterations = int(job["iterations"])
+    params = job.get("params") or {}
+    eval_iterations = get_eval_iterations(
+        iterations, job.get("eval_interval", 1), job.get("eval_log_points")
+    )
+
+    start = time.perf_counter()
+    template, cached = cache.get(game_name, algo_name)
+    if game_name in POKERRL_GAMES:
+        cache.set_params(game_name, algo_name, params)
+        solver = template
+        solver.reset()
+        solver.evaluate_inline = False
+
+        def calc_exp():
+            # solvers with a delay do not evaluate the first iterations
+            solver.expl = None
+            solver._evaluate_avg_strats()
+            return None if solver.expl is None else solver.expl / 1000
+
+    else:
+        solver = template.clone(iterations=iterations, **params)
+        calc_exp = solver.calc_exp
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    curve = []
+    # the PokerRL solvers have no average strategy before the first iteration
+    if 0 in eval_iterations and game_name not in POKERRL_GAMES:
+        curve.append([0, calc_exp()])
+    for step in range(1, iterations + 1):
+        solver.iteration()
+        if step in eval_iterations:
+            curve.append([step, calc_exp()])
+    solve_time = time.perf_counter() - start
+
+    policy = None
+    if job.get("policy") and output_dir is not None:
+        folder = Path(output_dir) / uuid.uuid4().hex
+        if game_name in POKERRL_GAMES:
+            solver.save_solution(folder / "solution")
+            policy = str(folder / "solution") + ".pkl"
+        else:
+            solver.export_average_policy(folder / "policy")
+            policy = str(folder / "policy")
+
+    return {
+        "game": game_name,
+        "algo": algo_name,
+        "params": params,
+        "iterations": iterations,
+        "exps": curve,
+        "cached": cached,
+        "build_time": build_time,
+        "solve_time": solve_time,
+        "policy": policy,
+    }
+
+
+def _run_worker(conn, cache_size, tree_cache_dir, output_dir) -> None:
+    cache = SolverCache(cache_size, tree_cache_dir)
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        try:
+            conn.send((solve(cache, job, output_dir), None))
+        except Exception:
+            conn.send((None, traceback.format_exc()))
+    cache.clear()
+    conn.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                response = {"ok": False, "error": "Invalid request: {}".format(e)}
+            else:
+                response = self.server.service.submit(job)
+            self.wfile.write((json.dumps(response) + "\n").encode())
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _Worker:
+    def __init__(self, process, conn, cache_size: int):
+        self.process = process
+        self.conn = conn
+        # mirrors the keys of the SolverCache of the worker
+        self.cache_size = cache_size
+        self.keys: "OrderedDict[tuple, None]" = OrderedDict()
+
+    def touch(self, key: tuple) -> None:
+        self.keys.pop(key, None)
+        self.keys[key] = None
+        while len(self.keys) > self.cache_size:
+            self.keys.popitem(last=False)
+
+
+class SolveService:
+    """
+    Long-lived local solve daemon. Jobs are read as JSON lines from a Unix socket
+    (see SolveClient) and solved by num_workers forked processes, each with its own
+    SolverCache. A job goes to an idle worker, one that has its solver cached if there
+    is one, else the one that has been idle the longest; if all workers are busy it
+    waits for the first to finish.
+    """
+
+    def __init__(
+        self,
+        socket_path: Union[str, Path],
+        num_workers: int = 1,
+        cache_size: int = 4,
+        tree_cache_dir: Optional[str] = None,
+        output_dir: Optional[Union[str, Path]] = None,
+    ):
+        self.socket_path = str(socket_path)
+        # the workers are forked before the server starts any thread
+        ctx = multiprocessing.get_context("fork")
+        self.workers = []
+        for _ in range(num_workers):
+            conn, worker_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_run_worker,
+                args=(worker_conn, cache_size, tree_cache_dir, output_dir),
+                daemon=True,
+            )
+            process.start()
+            worker_conn.close()
+            self.workers.append(_Worker(process, conn, cache_size))
+        # idle workers, least recently used first
+        self.idle = list(self.workers)
+        self.condition = threading.Condition()
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self.server = _Server(self.socket_path, _Handler)
+        self.server.service = self
+
+    def _acquire(self, key: tuple) -> _Worker:
+        with self.condition:
+            while not self.idle:
+                self.condition.wait()
+            warm = [worker for worker in self.idle if key in worker.keys]
+            worker = warm[0] if warm else self.idle[0]
+            self.idle.remove(worker)
+            worker.touch(key)
+            return worker
+
+    def _release(self, worker: _Worker) -> None:
+        with self.condition:
+            self.idle.append(worker)
+            self.condition.notify()
+
+    def submit(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        missing = [key for key in ["game", "algo", "iterations"] if key not in job]
+        if missing:
+            return {"ok": False, "error": "Missing fields: {}".format(missing)}
+        worker = self._acquire((str(job["game"]), str(job["algo"])))
+        try:
+            worker.conn.send(job)
+            result, error = worker.conn.recv()
+        finally:
+            self._release(worker)
+        if error is not None:
+            return {"ok": False, "error": error}
+        return {"ok": True, "result": result}
+
+    def serve_forever(self) -> None:
+        self.server.serve_forever()
+
+    def close(self) -> None:
+        self.server.server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        with self.condition:
+            # running jobs are finished first
+            while len(self.idle) < len(self.workers):
+                self.condition.wait()
+            for worker in self.workers:
+                worker.conn.send(None)
+                worker.conn.close()
+                worker.process.join()
+            self.workers = []
+            self.idle = []
+
+
+class SolveClient:
+    def __init__(self, socket_path: Union[str, Path]):
+        self.socket_path = str(socket_path)
+
+    def solve(
+        self,
+        game: str,
+        algo: str,
+        iterations: int,
+        params: Optional[Dict[str, Any]] = None,
+        **options,
+    ) -> Dict[str, Any]:
+        """
+        Solves a job on the service and returns the result of solve. options are the
+        other fields of the job: eval_interval, eval_log_points and policy.
+        """
+        job = dict(
+            options, game=game, algo=algo, iterations=iterations, params=params or {}
+        )
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(job) + "\n").encode())
+            with sock.makefile("r") as f:
+                response = json.loads(f.readline())
+        if not response["ok"]:
+            raise RuntimeError("Solve failed:\n{}".format(response["error"]))
+        return response["result"]
@@ -0,0 +1,148 @@
+from pathlib import Path
+
+from absl import app, flags
+from pdcfrplus.utils.benchmark import (
+    POKERRL_GAMES,
+    benchmark_env_snapshot,
+    case_key,
+    compare_results,
+    compare_storage,
+    load_results,
+    run_isolated,
+    save_results,
+)
+
+from pdcfrplus.game import list_game_configs
+
+ROOT_DIR = Path(__file__).absolute().parents[1]
+
+FLAGS = flags.FLAGS
+flags.DEFINE_list(
+    "algos",
+    ["CFR", "CFRPlus", "LinearCFR", "DCFR", "PCFRPlus", "DCFRPlus", "PDCFRPlus"],
+    "algorithms to benchmark",
+)
+flags.DEFINE_list(
+    "games",
+    [game_config.name for game_config in list_game_configs()] + POKERRL_GAMES,
+    "games to benchmark",
+)
+flags.DEFINE_integer("iterations", 100, "iterations of the OpenSpiel games")
+flags.DEFINE_integer("pokerrl_iterations", 10, "iterations of the PokerRL subgames")
+flags.DEFINE_integer("eval_interval", 10, "evaluation interval of the OpenSpiel games")
+flags.DEFINE_float("target_exp", None, "exploitability used for time_to_target")
+flags.DEFINE_float("tolerance", 0.1, "relative change reported as gain or regression")
+flags.DEFINE_string(
+    "output", str(ROOT_DIR / "results" / "benchmark" / "latest.json"), "result file"
+)
+flags.DEFINE_string(
+    "baseline", str(ROOT_DIR / "benchmarks" / "baseline.json"), "baseline file"
+)
+flags.DEFINE_bool("update_baseline", False, "overwrite the baseline with the results")
+flags.DEFINE_string(
+    "storage_folder",
+    None,
+    "if set, OpenSpiel cases are also run with memory-mapped tables in this folder",
+)
+flags.DEFINE_float("memory_budget_mb", None, "resident budget of the mapped tables")
+flags.DEFINE_integer("num_workers", 1, "processes of the OpenSpiel solver traversal")
+flags.DEFINE_integer(
+    "env_snapshot_calls",
+    0,
+    "if > 0, also times this many PokerRL env save/restore calls of each API",
+)
+
+
+def main(argv):
+    if FLAGS.env_snapshot_calls > 0:
+        for game_name in FLAGS.games:
+            if game_name not in POKERRL_GAMES:
+                continue
+            result = benchmark_env_snapshot(game_name, FLAGS.env_snapshot_calls)
+            print(
+                "{} env save/restore: {:.1f}us state_dict, {:.1f}us snapshot "
+                "(x{:.2f})".format(
+                    game_name,
+                    result["state_dict_us"],
+                    result["snapshot_us"],
+                    result["speedup"],
+                )
+            )
+
+    results = []
+    for game_name in FLAGS.games:
+        for algo_name in FLAGS.algos:
+            is_pokerrl = game_name in POKERRL_GAMES
+            case = {
+                "algo_name": algo_name,
+                "game_name": game_name,
+                "iterations": FLAGS.pokerrl_iterations
+                if is_pokerrl
+                else FLAGS.iterations,
+                "eval_interval": FLAGS.eval_interval,
+                "target_exp": FLAGS.target_exp,
+            }
+            if FLAGS.num_workers > 1 and not is_pokerrl:
+                case["num_workers"] = FLAGS.num_workers
+            cases = [case]
+            if FLAGS.storage_folder is not None and not is_pokerrl:
+                storage_folder = Path(FLAGS.storage_folder) / game_name / algo_name
+                cases.append(
+                    dict(
+                        case,
+                        storage_folder=str(storage_folder),
+                        memory_budget_mb=FLAGS.memory_budget_mb,
+                    )
+                )
+            for case in cases:
+                result = run_isolated(case)
+                print(
+                    "{}: build {:.3f}s, {:.2f} it/s, eval {:.3f}s, {:.1f} MB".format(
+                        case_key(result),
+                        result["build_time"],
+                        result["iterations_per_sec"],
+                        result["eval_time"],
+                        result["peak_rss_mb"],
+                    )
+                )
+                results.append(result)
+
+    for ratio in compare_storage(results):
+        print(
+            "{}: {:.2f} it/s vs {:.2f} it/s in memory (x{:.2f}), "
+            "{:.1f} MB vs {:.1f} MB".format(
+                ratio["case"],
+                ratio["iterations_per_sec"],
+                ratio["in_memory"],
+                ratio["ratio"],
+                ratio["peak_rss_mb"],
+                ratio["in_memory_peak_rss_mb"],
+            )
+        )
+
+    save_results(results, FLAGS.output)
+    baseline_file = Path(FLAGS.baseline)
+    if baseline_file.exists():
+        baseline = load_results(baseline_file)
+        changes = compare_results(results, baseline, FLAGS.tolerance)
+        for change in changes:
+            if change["status"] == "same":
+                continue
+            print(
+                "{:<10} {} {}: {:.4g} -> {:.4g} (x{:.2f})".format(
+                    change["status"],
+                    change["case"],
+                    change["metric"],
+                    change["baseline"],
+                    change["current"],
+                    change["ratio"],
+                )
+            )
+    else:
+        print("No baseline found at {}".format(baseline_file))
+    if FLAGS.update_baseline:
+        save_results(results, baseline_file)
+
+
+if __name__ == "__main__":
+    app.run(main)
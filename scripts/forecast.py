@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+
+from absl import app, flags
+from pdcfrplus.utils.benchmark import POKERRL_GAMES
+from pdcfrplus.utils.forecast import ALGOS, forecast_game, forecast_public_tree
+
+from pdcfrplus.game import list_game_configs, read_game_config
+
+FLAGS = flags.FLAGS
+flags.DEFINE_list("algos", ALGOS, "algorithms to forecast")
+flags.DEFINE_list(
+    "games",
+    [game_config.name for game_config in list_game_configs()] + POKERRL_GAMES,
+    "games to forecast",
+)
+flags.DEFINE_integer("num_probes", 1000, "random walks of the size estimate")
+flags.DEFINE_integer("seed", 0, "seed of the random walks")
+flags.DEFINE_integer(
+    "max_exact_nodes", 10**6, "OpenSpiel games up to this size are counted exactly"
+)
+flags.DEFINE_string("output", None, "if set, the forecasts are saved to this file")
+
+
+def main(argv):
+    results = []
+    for game_name in FLAGS.games:
+        if game_name in POKERRL_GAMES:
+            result = forecast_public_tree(game_name, FLAGS.num_probes, FLAGS.seed)
+            print(
+                "{}: ~{:.4g} nodes, ~{:.4g} decision nodes, {:.1f} MB".format(
+                    game_name,
+                    result["nodes"],
+                    result["decision_nodes"],
+                    result["memory_mb"],
+                )
+            )
+        else:
+            result = forecast_game(
+                read_game_config(game_name),
+                num_probes=FLAGS.num_probes,
+                seed=FLAGS.seed,
+                max_exact_nodes=FLAGS.max_exact_nodes,
+                algos=FLAGS.algos,
+            )
+            print(
+                "{}: {}{:.4g} nodes, {:.4g} infosets, {:.4g} infoset actions".format(
+                    game_name,
+                    "" if result["exact"] else "~",
+                    result["nodes"],
+                    result["infosets"],
+                    result["infoset_actions"],
+                )
+            )
+            for algo_name, algo in result["algos"].items():
+                print(
+                    "  {}: {:.1f} MB ({:.1f} MB mapped tables), {:.3g}s/it".format(
+                        algo_name,
+                        algo["memory_mb"],
+                        algo["storage_table_mb"],
+                        algo["iteration_sec"],
+                    )
+                )
+        results.append(result)
+
+    if FLAGS.output is not None:
+        output = Path(FLAGS.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    app.run(main)
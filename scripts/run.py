@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from PokerRL.cfr_runner import CFRRunner
+from PokerRL.cfr_runner import BatchEndgameRunner, CFRRunner
 from pdcfrplus.utils.exp import ServerFileStorageObserver, ex
 from pdcfrplus.utils.logger import Logger
 from pdcfrplus.utils.utils import init_object, load_module, run_method
@@ -19,6 +19,49 @@ def config():
     gamma = None
     alpha = None
     beta = None
+    # folder of endgame files solved by game_name=EndgameBatch
+    subgame_dir = None
+    # PokerRL public trees are saved here after the first build, None to always rebuild
+    tree_cache_dir = str(Path(__file__).parents[1] / "results" / "trees")
+    # depth-limited PokerRL solving: street of the cutoff (e.g. 3 for the river)
+    # and the leaf evaluator, "equity" or "table" with an npz value_table
+    stop_at_street = None
+    leaf_evaluator = "equity"
+    value_table = None
+    # PokerRL stack sizes solved at once (None for the default), with parallel_trees
+    # each in its own process
+    starting_stack_sizes = None
+    parallel_trees = False
+    # PokerRL public chance sampling: boards traversed per chance node and iteration,
+    # None for full width
+    chance_samples = None
+    # instrumentation
+    instrument = False
+    profile_iteration = None
+    # policy export, needs save_log
+    export_policy = False
+    # evaluation schedule, log_points overrides the interval with log-spaced points
+    eval_interval = 1
+    eval_log_points = None
+    async_eval = False
+    eval_workers = 2
+    # stop once the exploitability is at most target_exp, checked exactly only when
+    # the regret-based bound logged as exp_bound gets there
+    target_exp = None
+
+    # keep the tables of the pdcfrplus solvers in memory-mapped files in this folder
+    storage_folder = None
+    memory_budget_mb = None
+    # processes sharing the regret traversal of the pdcfrplus solvers
+    num_workers = 1
+    # save the exact tree size of the game for scripts/forecast.py
+    cache_tree_counts = False
+    # warm start from a saved solution (path without .pkl), continuing after its
+    # iteration or warm_start_iteration; save_solution saves one to the log folder
+    # (needs save_log)
+    warm_start = None
+    warm_start_iteration = None
+    save_solution = False
 
     # logger
     writer_strings = ["stdout"]
@@ -30,7 +73,21 @@ def config():
 
 
 @ex.automain
-def main(_config, _run, folder, game_name, algo_name):
+def main(
+    _config,
+    _run,
+    folder,
+    game_name,
+    algo_name,
+    instrument,
+    profile_iteration,
+    export_policy,
+    num_workers,
+    warm_start,
+    warm_start_iteration,
+    save_solution,
+    cache_tree_counts,
+):
     configs = dict(_config)
     for arg in ["gamma", "alpha", "beta"]:
         if configs[arg] is None:
@@ -40,17 +97,39 @@ def main(_config, _run, folder, game_name, algo_name):
 
     logger = init_object(Logger, configs)
 
-    if game_name in [
+    if game_name == "EndgameBatch":
+        runner = init_object(BatchEndgameRunner, configs, logger=logger)
+        runner.run()
+    elif game_name in [
         "Subgame3",
         "Subgame4",
     ]:
         runner = init_object(CFRRunner, configs, logger=logger)
-        runner.run()
+        if instrument:
+            runner.instrument(profile_iteration, configs.get("folder"))
+        run_method(runner.run, configs)
+        # with parallel_trees, the solved trees only live in the tree workers
+        if save_solution and configs["save_log"]:
+            runner.cfr.save_solution(configs["folder"] / "solution")
+        runner.close()
     else:
         game_config = run_method(read_game_config, configs)
         solver_class = load_module("pdcfrplus.cfr:{}".format(algo_name))
         solver = init_object(
             solver_class, configs, game_config=game_config, logger=logger
         )
-        solver.learn()
+        if cache_tree_counts:
+            solver.cache_tree_counts()
+        if instrument:
+            solver.instrument(profile_iteration, configs.get("folder"))
+        if warm_start is not None:
+            solver.warm_start(warm_start, warm_start_iteration)
+        if num_workers > 1:
+            solver.parallelize(num_workers)
+        run_method(solver.learn, configs)
+        solver.close()
+        if save_solution and configs["save_log"]:
+            solver.save_solution(configs["folder"] / "solution")
+        if export_policy and configs["save_log"]:
+            solver.export_average_policy(configs["folder"] / "policy")
     logger.close()
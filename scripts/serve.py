@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from absl import app, flags
+from pdcfrplus.utils.service import SolveService
+
+ROOT_DIR = Path(__file__).absolute().parents[1]
+
+FLAGS = flags.FLAGS
+flags.DEFINE_string(
+    "socket", str(ROOT_DIR / "results" / "service.sock"), "Unix socket of the service"
+)
+flags.DEFINE_integer("num_workers", 1, "processes solving jobs")
+flags.DEFINE_integer("cache_size", 4, "solvers kept warm by each worker")
+flags.DEFINE_string(
+    "tree_cache_dir",
+    str(ROOT_DIR / "results" / "trees"),
+    "PokerRL public trees are saved here after the first build",
+)
+flags.DEFINE_string(
+    "output_dir",
+    str(ROOT_DIR / "results" / "service"),
+    "policies of the jobs that ask for them are saved here",
+)
+
+
+def main(argv):
+    Path(FLAGS.socket).parent.mkdir(parents=True, exist_ok=True)
+    service = SolveService(
+        FLAGS.socket,
+        num_workers=FLAGS.num_workers,
+        cache_size=FLAGS.cache_size,
+        tree_cache_dir=FLAGS.tree_cache_dir,
+        output_dir=FLAGS.output_dir,
+    )
+    print("Serving on {}".format(FLAGS.socket))
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    app.run(main)
@@ -4,8 +4,12 @@
 import numpy as np
 from PokerRL.cfr._CFRBase import CFRBase as _CFRBase
 
+# avg_strat_sum is float32, its scale is kept well above the range where stored values could overflow
+_MIN_AVG_STRAT_SCALE = 1e-20
+
 
 class PDCFRPlus(_CFRBase):
+
     def __init__(
         self,
         name,
@@ -14,6 +18,8 @@ class PDCFRPlus(_CFRBase):
         agent_bet_set,
         other_agent_bet_set=None,
         starting_stack_sizes=None,
+        stop_at_street=None,
+        leaf_evaluator=None,
         delay=0,
         gamma=2,
         alpha=1.5,
@@ -27,6 +33,8 @@ class PDCFRPlus(_CFRBase):
             chief_handle=chief_handle,
             game_cls=game_cls,
             starting_stack_sizes=starting_stack_sizes,
+            stop_at_street=stop_at_street,
+            leaf_evaluator=leaf_evaluator,
             agent_bet_set=agent_bet_set,
             other_agent_bet_set=other_agent_bet_set,
             algo_name="CFRp_delay" + str(delay),
@@ -57,74 +65,89 @@ class PDCFRPlus(_CFRBase):
         d, w = self.weight(T)
         return np.maximum((ev_all_actions - strat_ev) * w, 0)
 
-    def _compute_new_strategy(self, p_id):
-        for t_idx in range(len(self._trees)):
-
-            def _fill(_node):
-                if _node.p_id_acting_next == p_id:
-                    N = len(_node.children)
-                    T = self._iter_counter + 1
-
-                    regrets = _node.data["regret"]
-                    imm_regrets = _node.data["imm_regret"]
-                    d, w = self.weight(T + 1)
-                    _reg = np.maximum(regrets * d + imm_regrets * w, 0)
-
-                    _reg_sum = np.expand_dims(np.sum(_reg, axis=1), axis=1).repeat(
-                        N, axis=1
-                    )
-
-                    with np.errstate(divide="ignore", invalid="ignore"):
-                        _node.strategy = np.where(
-                            _reg_sum > 0.0,
-                            _reg / _reg_sum,
-                            np.full(
-                                shape=(
-                                    self._env_bldrs[t_idx].rules.RANGE_SIZE,
-                                    N,
-                                ),
-                                fill_value=1.0 / N,
-                                dtype=np.float32,
-                            ),
-                        )
-
-                for c in _node.children:
-                    _fill(c)
+    def _compute_node_strategy(self, _node, range_size):
+        N = len(_node.children)
+        T = self._iter_counter + 1
 
-            _fill(self._trees[t_idx].root)
+        regrets = _node.data["regret"]
+        imm_regrets = _node.data["imm_regret"]
+        d, w = self.weight(T + 1)
+        _reg = np.maximum(regrets * d + imm_regrets * w, 0)
+
+        _reg_sum = np.expand_dims(np.sum(_reg, axis=1), axis=1).repeat(N, axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            _node.strategy = np.where(
+                _reg_sum > 0.0,
+                _reg / _reg_sum,
+                np.full(
+                    shape=(range_size, N),
+                    fill_value=1.0 / N,
+                    dtype=np.float32,
+                ),
+            )
+
+    def _avg_strat_discount(self, T):
+        return np.power((T - 1) / T, self.gamma), 1
+
+    def _begin_strategy_average(self, p_id):
+        """
+        avg_strat_sum is stored divided by self._avg_strat_scales[p_id], so the discount of an iteration is one
+        multiplication of the scale instead of one of every avg_strat_sum. Once the scale gets small, the entries are
+        renormalized while the strategies are added.
+        """
+        T = self._iter_counter + 1
+        self._avg_strat_renormalize = 1.0
+        if self._iter_counter > 0:
+            self._avg_strat_scales[p_id] *= np.power((T - 1) / T, self.gamma)
+            if self._avg_strat_scales[p_id] < _MIN_AVG_STRAT_SCALE:
+                self._avg_strat_renormalize = self._avg_strat_scales[p_id]
+                self._avg_strat_scales[p_id] = 1.0
+                if self.chance_samples is not None:
+                    # nodes outside the sampled subtrees are not visited in this iteration
+                    self._renormalize_avg_strat_sums(p_id=p_id)
+        else:
+            self._avg_strat_scales[p_id] = 1.0
+
+    def _renormalize_avg_strat_sums(self, p_id):
+        renormalize = self._avg_strat_renormalize
 
-    def _add_strategy_to_average(self, p_id):
         def _fill(_node):
             if _node.p_id_acting_next == p_id:
-                T = self._iter_counter + 1
-                contrib = _node.strategy * np.expand_dims(
-                    _node.reach_probs[p_id], axis=1
-                )
-                if self._iter_counter > 0:
-                    _node.data["avg_strat_sum"] = (
-                        _node.data["avg_strat_sum"] * np.power((T - 1) / T, self.gamma)
-                        + contrib
-                    )
-                else:
-                    _node.data["avg_strat_sum"] = contrib
-
-                _s = np.expand_dims(np.sum(_node.data["avg_strat_sum"], axis=1), axis=1)
-
-                with np.errstate(divide="ignore", invalid="ignore"):
-                    _node.data["avg_strat"] = np.where(
-                        _s == 0,
-                        np.full(
-                            shape=len(_node.allowed_actions),
-                            fill_value=1.0 / len(_node.allowed_actions),
-                        ),
-                        _node.data["avg_strat_sum"] / _s,
-                    )
-                assert np.allclose(
-                    np.sum(_node.data["avg_strat"], axis=1), 1, atol=0.0001
-                )
-
+                _node.data["avg_strat_sum"] = _node.data["avg_strat_sum"] * renormalize
             for c in _node.children:
                 _fill(c)
 
-        for t_idx in range(len(self._trees)):
+        for t_idx in self._tree_idxs:
             _fill(self._trees[t_idx].root)
+        self._avg_strat_renormalize = 1.0
+
+    def _add_node_strategy_to_average(self, _node, p_id):
+        # nodes the player doesn't reach keep their entries and average strategy
+        reach = _node.reach_probs[p_id]
+        renormalize = self._avg_strat_renormalize
+        if self._iter_counter > 0 and renormalize == 1.0 and not np.any(reach):
+            return
+
+        contrib = _node.strategy * np.expand_dims(
+            reach / self._avg_strat_scales[p_id], axis=1
+        )
+        if self._iter_counter == 0:
+            _node.data["avg_strat_sum"] = contrib
+        else:
+            _node.data["avg_strat_sum"] = (
+                _node.data["avg_strat_sum"] * renormalize + contrib
+            )
+
+        _s = np.expand_dims(np.sum(_node.data["avg_strat_sum"], axis=1), axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            _node.data["avg_strat"] = np.where(
+                _s == 0,
+                np.full(
+                    shape=len(_node.allowed_actions),
+                    fill_value=1.0 / len(_node.allowed_actions),
+                ),
+                _node.data["avg_strat_sum"] / _s,
+            )
+        assert np.allclose(np.sum(_node.data["avg_strat"], axis=1), 1, atol=0.0001)
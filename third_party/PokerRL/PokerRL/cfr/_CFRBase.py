@@ -2,12 +2,17 @@
 
 
 import copy
+import os
 
 import numpy as np
 from PokerRL.game._.tree.PublicTree import PublicTree, PublicTreeHUNL
 from PokerRL.game.games import DiscretizedNLHoldemSubGame
+from PokerRL.game.Poker import Poker
+from PokerRL.game.PokerEnvStateDictEnums import EnvDictIdxs, PlayerDictIdxs
+from PokerRL.cfr._tree_workers import TreeWorkers
 from PokerRL.game.wrappers import HistoryEnvBuilder
 from PokerRL.rl.rl_util import get_env_cls_from_str
+from PokerRL.util.file_util import do_pickle, load_pickle
 
 
 class CFRBase:
@@ -24,6 +29,8 @@ class CFRBase:
         algo_name,
         other_agent_bet_set=None,
         starting_stack_sizes=None,
+        stop_at_street=None,
+        leaf_evaluator=None,
     ):
         """
         Args:
@@ -36,12 +43,17 @@ class CFRBase:
             starting_stack_sizes (list of ints):    For each stack size in this list, a CFR strategy will be computed.
                                                     Results are logged individually and averaged (uniform).
                                                     If None, takes the default for the game.
+            stop_at_street (int):                   Street at which the trees are cut off if a leaf_evaluator is given.
+            leaf_evaluator:                         Values of the cutoff nodes, see PublicTree. If None, the trees
+                                                    are expanded until the end of the game.
         """
 
         self._name = name
         self._n_seats = 2
 
         self._chief_handle = chief_handle
+        self._stop_at_street = stop_at_street
+        self._leaf_evaluator = leaf_evaluator
 
         if starting_stack_sizes is None:
             self._starting_stack_sizes = [game_cls.DEFAULT_STACK_SIZE]
@@ -88,7 +100,8 @@ class CFRBase:
             self.tree_cls(
                 env_bldr=self._env_bldrs[idx],
                 stack_size=self._env_args[idx].starting_stack_sizes_list,
-                stop_at_street=None,
+                stop_at_street=self._stop_at_street,
+                leaf_evaluator=self._leaf_evaluator,
             )
             for idx in range(len(self._env_bldrs))
         ]
@@ -104,6 +117,9 @@ class CFRBase:
             #     tree.n_nonterm,
             #     "are non-terminal.",
             # )
+
+        # evaluation trees are restored from these instead of replaying the environment
+        self._tree_arrays = [tree.to_arrays() for tree in self._trees]
         self._algo_name = algo_name
 
         self._exps_curr_total = [
@@ -137,6 +153,47 @@ class CFRBase:
         )
 
         self._iter_counter = None
+        # True while the values of the trees belong to the current strategies and reach probs
+        self._cfv_fresh = False
+
+        # if False, the average strategy is only evaluated when _evaluate_avg_strats is called from outside
+        self.evaluate_inline = True
+
+        # if True, the updates of a player are applied in one pass over the trees, see _update_player
+        self.fused_iteration = True
+
+        # if set, every iteration only traverses this many boards at each chance node, see _sample_chance. The
+        # logged exploitability of the current strategy is then an estimate, that of the average strategy stays exact.
+        self.chance_samples = None
+        # seed of the sampled boards, see chance_seed
+        self._chance_seed = None
+        self._chance_rngs = None
+
+        # trees of this process; the trees of the other stack sizes are solved by tree workers, see parallelize
+        self._tree_idxs = list(range(len(self._trees)))
+        self._tree_workers = None
+
+    @property
+    def chance_seed(self):
+        """
+        Seed of the boards drawn by chance sampling. Each tree draws from its own generator, seeded with chance_seed
+        plus its index, so runs are reproducible also with tree workers. The generators restart on every reset and
+        when the seed is set, which has to happen before parallelize.
+        """
+        return self._chance_seed
+
+    @chance_seed.setter
+    def chance_seed(self, seed):
+        self._chance_seed = seed
+        self._seed_chance()
+
+    def _seed_chance(self):
+        self._chance_rngs = [
+            np.random.RandomState(
+                None if self._chance_seed is None else self._chance_seed + t_idx
+            )
+            for t_idx in range(len(self._trees))
+        ]
 
     @property
     def name(self):
@@ -150,34 +207,184 @@ class CFRBase:
     def iter_counter(self):
         return self._iter_counter
 
+    def parallelize(self, num_workers=None):
+        """
+        Solves the trees of the stack sizes in num_workers (by default one per tree) forked processes. They run the
+        iterations in lockstep and only send back the exploitabilities, bounds and scalar state of the solver, so the
+        wall time of an iteration is that of the slowest worker. Call it after construction, once the solver is set up.
+        """
+        if num_workers is None:
+            num_workers = len(self._trees)
+        num_workers = min(num_workers, len(self._trees))
+        if num_workers > 1 and self._tree_workers is None:
+            self._tree_workers = TreeWorkers(solver=self, num_workers=num_workers)
+
+    def close(self):
+        """
+        Stops the tree workers. The trees of this process are not updated by them, so solutions have to be saved
+        before.
+        """
+        if self._tree_workers is not None:
+            self._tree_workers.close()
+            self._tree_workers = None
+
+    def _on_trees(self, method, **kwargs):
+        """
+        Runs method on the trees of this process or, after parallelize, on those of all tree workers. The method
+        returns one result per tree in self._tree_idxs; they are returned for all trees, in tree order.
+        """
+        if self._tree_workers is None:
+            return getattr(self, method)(**kwargs)
+        results, state = self._tree_workers.call(method, kwargs, len(self._trees))
+        self._set_scalar_state(state)
+        return results
+
+    def _get_scalar_state(self):
+        """State besides the trees that changes with the iterations, see TreeWorkers."""
+        return {
+            "iter_counter": self._iter_counter,
+            "avg_strat_scales": list(self._avg_strat_scales),
+            "regret_weight": self._regret_weight,
+        }
+
+    def _set_scalar_state(self, state):
+        self._iter_counter = state["iter_counter"]
+        self._avg_strat_scales = state["avg_strat_scales"]
+        self._regret_weight = state["regret_weight"]
+
     def reset(self):
+        self.expl_bound = None
+        self._log_curr_strat_expl(expl_totals=self._on_trees("_reset_trees"))
+
+    def _reset_trees(self):
         self._iter_counter = 0
+        # avg_strat_sum of the nodes of each player is stored divided by its scale, see PDCFRPlus
+        self._avg_strat_scales = [1.0 for _ in range(self._n_seats)]
+        # see _expl_bounds
+        self._regret_weight = 0.0
+        self._positive_regrets = np.zeros(
+            shape=(len(self._trees), self._n_seats), dtype=np.float64
+        )
         for p in range(self._n_seats):
             self._reset_player(p_id=p)
-        for t_idx in range(len(self._trees)):
+        self._seed_chance()
+        for t_idx in self._tree_idxs:
+            self._trees[t_idx].sample_chance(n_samples=None)
             self._trees[t_idx].fill_uniform_random()
             # self._trees[t_idx].fill_random_random()
 
         self._compute_cfv()
-        self._log_curr_strat_expl()
+        return self._curr_strat_expls()
+
+    def load_subgame(self, root_env_state, reach_probs):
+        """
+        Restarts the solver on an endgame that shares the betting structure of the current trees, without rebuilding
+        them. See PublicTree.rebind_root.
+        """
+        self.expl_bound = None
+        self._log_curr_strat_expl(
+            expl_totals=self._on_trees(
+                "_load_subgame_trees",
+                root_env_state=root_env_state,
+                reach_probs=reach_probs,
+            )
+        )
+
+    def _load_subgame_trees(self, root_env_state, reach_probs):
+        for t_idx in self._tree_idxs:
+            self._trees[t_idx].rebind_root(
+                root_env_state=root_env_state, reach_probs=reach_probs
+            )
+            self._tree_arrays[t_idx] = self._trees[t_idx].to_arrays()
+        return self._reset_trees()
 
     def iteration(self):
+        results = self._on_trees("_iterate_trees")
+        self._compute_expl_bound(bounds=[bound for bound, _ in results])
+        self._log_curr_strat_expl(expl_totals=[expl for _, expl in results])
+        if self.evaluate_inline:
+            self._evaluate_avg_strats()
+
+    def _iterate_trees(self):
+        """
+        Runs an iteration on the trees of this process and returns the expl bound and the exploitability of the current
+        strategy of each tree.
+        """
+        self._update_regret_weight()
+        # the first iteration is full width, it sets the regrets and averages of all nodes
+        if self.chance_samples is not None and self._iter_counter > 0:
+            self._sample_chance(n_samples=self.chance_samples)
         for p in range(self._n_seats):
-            self._compute_cfv()
-            self._compute_regrets(p_id=p)
-            self._add_strategy_to_average(p_id=p)
-            self._compute_new_strategy(p_id=p)
+            # nodes outside the sampled subtrees keep stale values, only _update_player skips them
+            if self.fused_iteration or self.chance_samples is not None:
+                self._update_player(p_id=p)
+            else:
+                self._compute_cfv()
+                self._compute_regrets(p_id=p)
+                self._add_strategy_to_average(p_id=p)
+                self._compute_new_strategy(p_id=p)
             self._update_reach_probs()
 
         self._iter_counter += 1
+        bounds = self._expl_bounds()
 
         self._compute_cfv()
-        self._log_curr_strat_expl()
-        self._evaluate_avg_strats()
+        return list(zip(bounds, self._curr_strat_expls()))
+
+    def _sample_chance(self, n_samples):
+        """
+        Public chance sampling: draws the boards traversed by this iteration, see PublicTree.sample_chance. Only the
+        nodes of the sampled subtrees are updated, with regrets from the importance-weighted values, and their
+        strategies are added to the averages with the importance-weighted reach probs. n_samples=None goes back to
+        full width.
+        """
+        for t_idx in self._tree_idxs:
+            self._trees[t_idx].sample_chance(
+                n_samples=n_samples,
+                rng=None if self._chance_rngs is None else self._chance_rngs[t_idx],
+            )
+        self._update_reach_probs()
+        # the values were computed on the previous boards
+        self._cfv_fresh = False
 
     def _compute_cfv(self):
-        for t_idx in range(len(self._trees)):
+        for t_idx in self._tree_idxs:
             self._trees[t_idx].compute_ev()
+        self._cfv_fresh = True
+
+    def _update_player(self, p_id):
+        """
+        Same as _compute_cfv, _compute_regrets, _add_strategy_to_average and _compute_new_strategy of p_id, in one pass
+        over each tree. The updates of a node only depend on the values of the node and its children and the reach
+        probs, so they are applied as soon as compute_ev has valued the node. If the values still belong to the
+        current strategies, which holds for the first player after the _compute_cfv at the end of the previous
+        iteration unless new boards were sampled since, they are reused and the pass only applies the updates to the
+        nodes of the sampled subtrees.
+        """
+        self._begin_strategy_average(p_id=p_id)
+        for t_idx in self._tree_idxs:
+            range_size = self._env_bldrs[t_idx].rules.RANGE_SIZE
+
+            def _update(_node):
+                if _node.p_id_acting_next == p_id:
+                    self._compute_node_regrets(_node=_node, p_id=p_id, t_idx=t_idx)
+                    self._add_node_strategy_to_average(_node=_node, p_id=p_id)
+                    self._compute_node_strategy(_node=_node, range_size=range_size)
+
+            def _walk(_node):
+                _update(_node)
+                if _node.sampled_children is None:
+                    children = _node.children
+                else:
+                    children = [_node.children[c] for c in _node.sampled_children]
+                for c in children:
+                    _walk(c)
+
+            if self._cfv_fresh:
+                _walk(self._trees[t_idx].root)
+            else:
+                self._trees[t_idx].compute_ev(post_fn=_update)
+        self._cfv_fresh = False
 
     def _regret_formula_first_it(self, ev_all_actions, strat_ev):
         raise NotImplementedError
@@ -186,77 +393,180 @@ class CFRBase:
         raise NotImplementedError
 
     def _compute_regrets(self, p_id):
-        for t_idx in range(len(self._trees)):
-
-            def __compute_evs(_node):
-                # EV of each action
-                N_ACTIONS = len(_node.children)
-                ev_all_actions = np.zeros(
-                    shape=(self._env_bldrs[t_idx].rules.RANGE_SIZE, N_ACTIONS),
-                    dtype=np.float32,
-                )
-                for i, child in enumerate(_node.children):
-                    ev_all_actions[:, i] = child.ev[p_id]
-
-                # EV if playing by curr strat
-                strat_ev = _node.ev[p_id]
-                strat_ev = np.expand_dims(strat_ev, axis=-1).repeat(N_ACTIONS, axis=-1)
-
-                return strat_ev, ev_all_actions
+        for t_idx in self._tree_idxs:
 
-            def _fill_after_first(_node):
+            def _fill(_node):
                 if _node.p_id_acting_next == p_id:
-                    strat_ev, ev_all_actions = __compute_evs(_node=_node)
-                    _node.data["regret"] = self._regret_formula_after_first_it(
-                        ev_all_actions=ev_all_actions,
-                        strat_ev=strat_ev,
-                        last_regrets=_node.data["regret"],
-                    )
-                    _node.data["imm_regret"] = ev_all_actions - strat_ev
+                    self._compute_node_regrets(_node=_node, p_id=p_id, t_idx=t_idx)
 
                 for c in _node.children:
-                    _fill_after_first(c)
+                    _fill(c)
 
-            def _fill_first(_node):
-                if _node.p_id_acting_next == p_id:
-                    strat_ev, ev_all_actions = __compute_evs(_node=_node)
+            _fill(self._trees[t_idx].root)
 
-                    _node.data["regret"] = self._regret_formula_first_it(
-                        ev_all_actions=ev_all_actions, strat_ev=strat_ev
-                    )
-                    _node.data["imm_regret"] = ev_all_actions - strat_ev
+    def _compute_node_regrets(self, _node, p_id, t_idx):
+        # EV of each action
+        N_ACTIONS = len(_node.children)
+        ev_all_actions = np.zeros(
+            shape=(_node.ev.shape[1], N_ACTIONS), dtype=np.float32
+        )
+        for i, child in enumerate(_node.children):
+            ev_all_actions[:, i] = child.ev[p_id]
+
+        # EV if playing by curr strat
+        strat_ev = _node.ev[p_id]
+        strat_ev = np.expand_dims(strat_ev, axis=-1).repeat(N_ACTIONS, axis=-1)
+
+        if self._iter_counter == 0:
+            _node.data["regret"] = self._regret_formula_first_it(
+                ev_all_actions=ev_all_actions, strat_ev=strat_ev
+            )
+        else:
+            _node.data["regret"] = self._regret_formula_after_first_it(
+                ev_all_actions=ev_all_actions,
+                strat_ev=strat_ev,
+                last_regrets=_node.data["regret"],
+            )
+        _node.data["imm_regret"] = ev_all_actions - strat_ev
 
+        # the sum keeps the contributions of the nodes outside the sampled subtrees, see _sample_chance
+        pos_regret = self._node_positive_regret(_node=_node, p_id=p_id, t_idx=t_idx)
+        self._positive_regrets[t_idx, p_id] += pos_regret - _node.data.get(
+            "pos_regret", 0.0
+        )
+        _node.data["pos_regret"] = pos_regret
+
+    def _node_positive_regret(self, _node, p_id, t_idx):
+        """
+        Largest positive regret of each hand at _node, weighted by the chance of the hand at the root.
+        """
+        return float(
+            np.dot(
+                self._trees[t_idx].root.reach_probs[p_id],
+                np.max(np.maximum(_node.data["regret"], 0), axis=1),
+            )
+        )
+
+    def _sum_positive_regrets(self):
+        """
+        Sets the positive regrets of the trees of this process and the contributions of their nodes from the regrets
+        of all nodes, see _compute_node_regrets.
+        """
+        for t_idx in self._tree_idxs:
+            self._positive_regrets[t_idx] = 0
+
+            def _sum(_node):
+                p_id = _node.p_id_acting_next
+                if _node.data is not None and _node.data.get("regret") is not None:
+                    pos_regret = self._node_positive_regret(
+                        _node=_node, p_id=p_id, t_idx=t_idx
+                    )
+                    _node.data["pos_regret"] = pos_regret
+                    self._positive_regrets[t_idx, p_id] += pos_regret
                 for c in _node.children:
-                    _fill_first(c)
+                    _sum(c)
 
-            if self._iter_counter == 0:
-                _fill_first(self._trees[t_idx].root)
-            else:
-                _fill_after_first(self._trees[t_idx].root)
+            _sum(self._trees[t_idx].root)
+
+    def _update_regret_weight(self):
+        """
+        Advances the total weight of the immediate regrets in the positive regrets by the current iteration, by
+        applying the regret formula to a unit immediate regret like _accumulator_weights.
+        """
+        imm = np.ones(shape=(1, 1), dtype=np.float32)
+        zero = np.zeros(shape=(1, 1), dtype=np.float32)
+        if self._iter_counter == 0:
+            regret = self._regret_formula_first_it(ev_all_actions=imm, strat_ev=zero)
+        else:
+            regret = self._regret_formula_after_first_it(
+                ev_all_actions=imm,
+                strat_ev=zero,
+                last_regrets=np.full(
+                    shape=(1, 1), fill_value=self._regret_weight, dtype=np.float32
+                ),
+            )
+        self._regret_weight = float(regret[0, 0])
+
+    def _compute_expl_bound(self, bounds):
+        """
+        Sets expl_bound, a cheap estimate of the exploitability of the average strategy in the units of expl: the sum of
+        the largest positive regrets of all infosets divided by the total weight of the immediate regrets, averaged over
+        players and trees (see _expl_bounds). It bounds the exploitability for vanilla CFR, for the variants with other
+        weights of regrets and strategies it is an estimate.
+        """
+        self.expl_bound = float(sum(bounds) / len(bounds))
+
+    def _expl_bounds(self):
+        return [
+            float(
+                np.mean(self._positive_regrets[t_idx])
+                / self._regret_weight
+                * self._env_bldrs[t_idx].env_cls.EV_NORMALIZER
+            )
+            for t_idx in self._tree_idxs
+        ]
 
     def _compute_new_strategy(self, p_id):
         """Assumes regrets have been computed for player ""p_id"" already!"""
+        for t_idx in self._tree_idxs:
+            range_size = self._env_bldrs[t_idx].rules.RANGE_SIZE
+
+            def _fill(_node):
+                if _node.p_id_acting_next == p_id:
+                    self._compute_node_strategy(_node=_node, range_size=range_size)
+
+                for c in _node.children:
+                    _fill(c)
+
+            _fill(self._trees[t_idx].root)
+
+    def _compute_node_strategy(self, _node, range_size):
+        """Sets _node.strategy from the regrets of _node."""
         raise NotImplementedError
 
     def _update_reach_probs(self):
-        for t_idx in range(len(self._trees)):
+        for t_idx in self._tree_idxs:
             self._trees[t_idx].update_reach_probs()
+        self._cfv_fresh = False
 
     def _add_strategy_to_average(self, p_id):
+        self._begin_strategy_average(p_id=p_id)
+
+        def _fill(_node):
+            if _node.p_id_acting_next == p_id:
+                self._add_node_strategy_to_average(_node=_node, p_id=p_id)
+
+            for c in _node.children:
+                _fill(c)
+
+        for t_idx in self._tree_idxs:
+            _fill(self._trees[t_idx].root)
+
+    def _begin_strategy_average(self, p_id):
+        """Called once per player and iteration, before the strategies of p_id are added to the averages."""
+        pass
+
+    def _add_node_strategy_to_average(self, _node, p_id):
         raise NotImplementedError
 
-    def _log_curr_strat_expl(self):
+    def _curr_strat_expls(self):
         expl_totals = []
-        for t_idx in range(len(self._trees)):
-            METRIC = self._env_bldrs[t_idx].env_cls.WIN_METRIC
+        for t_idx in self._tree_idxs:
             expl_p = [
                 float(self._trees[t_idx].root.exploitability[p])
                 * self._env_bldrs[t_idx].env_cls.EV_NORMALIZER
                 for p in range(self._n_seats)
             ]
-            expl_total = sum(expl_p) / self._n_seats
-            expl_totals.append(expl_total)
+            expl_totals.append(sum(expl_p) / self._n_seats)
+
+            self._trees[t_idx].export_to_file(
+                name=self._name + "_Curr_" + str(self._iter_counter)
+            )
+        return expl_totals
 
+    def _log_curr_strat_expl(self, expl_totals):
+        for t_idx, expl_total in enumerate(expl_totals):
+            METRIC = self._env_bldrs[t_idx].env_cls.WIN_METRIC
             self._chief_handle.add_scalar(
                 self._exps_curr_total[t_idx],
                 "Evaluation/" + METRIC,
@@ -264,10 +574,6 @@ class CFRBase:
                 expl_total,
             )
 
-            self._trees[t_idx].export_to_file(
-                name=self._name + "_Curr_" + str(self._iter_counter)
-            )
-
         expl_total_averaged = sum(expl_totals) / float(len(expl_totals))
         self.expl = expl_total_averaged
         self._chief_handle.add_scalar(
@@ -278,16 +584,36 @@ class CFRBase:
         )
 
     def _evaluate_avg_strats(self):
-        expl_totals = []
-        for t_idx in range(len(self._trees)):
+        expl_totals = self._on_trees("_avg_strat_expls")
+        for t_idx, expl_total in enumerate(expl_totals):
             METRIC = self._env_bldrs[t_idx].env_cls.WIN_METRIC
+            self._chief_handle.add_scalar(
+                self._exps_avg_total[t_idx],
+                "Evaluation/" + METRIC,
+                self._iter_counter,
+                expl_total,
+            )
+
+        expl_total_averaged = sum(expl_totals) / float(len(expl_totals))
+        self.expl = expl_total_averaged
+        self._chief_handle.add_scalar(
+            self._exp_all_averaged_avg_total,
+            "Evaluation/" + METRIC,
+            self._iter_counter,
+            expl_total_averaged,
+        )
+
+    def _avg_strat_expls(self):
+        expl_totals = []
+        for t_idx in self._tree_idxs:
             eval_tree = self.tree_cls(
                 env_bldr=self._env_bldrs[t_idx],
                 stack_size=self._env_args[t_idx].starting_stack_sizes_list,
-                stop_at_street=None,
+                stop_at_street=self._stop_at_street,
                 is_debugging=False,
+                leaf_evaluator=self._leaf_evaluator,
             )
-            eval_tree.build_tree()
+            eval_tree.load_arrays(self._tree_arrays[t_idx])
 
             def _fill(_node_eval, _node_train):
                 if _node_eval.p_id_acting_next != eval_tree.CHANCE_ID and (
@@ -315,31 +641,164 @@ class CFRBase:
                 name=self._name + "_Avg_" + str(self._iter_counter)
             )
 
-            # log
             expl_p = [
                 float(eval_tree.root.exploitability[p])
                 * self._env_bldrs[t_idx].env_cls.EV_NORMALIZER
                 for p in range(eval_tree.n_seats)
             ]
-            expl_total = sum(expl_p) / eval_tree.n_seats
-            expl_totals.append(expl_total)
+            expl_totals.append(sum(expl_p) / eval_tree.n_seats)
+        return expl_totals
 
-            self._chief_handle.add_scalar(
-                self._exps_avg_total[t_idx],
-                "Evaluation/" + METRIC,
-                self._iter_counter,
-                expl_total,
-            )
+    # ___________________________________________________ Warm start ___________________________________________________
+    def save_solution(self, path):
+        """
+        Saves the regrets and average strategy sums of all trees to path + ".pkl", to warm-start other solves with
+        load_solution.
+        """
+        do_pickle(
+            obj={
+                "algo_name": self._algo_name,
+                "iteration": self._iter_counter,
+                "weights": self._accumulator_weights(self._iter_counter),
+                "trees": self._on_trees("_export_solutions"),
+            },
+            path=os.path.dirname(os.path.abspath(path)),
+            file_name=os.path.basename(path),
+        )
 
-        expl_total_averaged = sum(expl_totals) / float(len(expl_totals))
-        self.expl = expl_total_averaged
-        self._chief_handle.add_scalar(
-            self._exp_all_averaged_avg_total,
-            "Evaluation/" + METRIC,
-            self._iter_counter,
-            expl_total_averaged,
+    def _export_solutions(self):
+        return [
+            _export_solution(self._trees[t_idx], self._avg_strat_scales)
+            for t_idx in self._tree_idxs
+        ]
+
+    def load_solution(self, path, iteration=None):
+        """
+        Seeds the regrets and average strategy sums from a solution saved by save_solution, possibly of another
+        algorithm, bet set or a nearby subgame of the same game. Nodes are matched along the path from the root: chance
+        outcomes by their board, actions by their type and, for bets, the nearest remaining stack of the bettor. Actions
+        without a match start at zero. The solver continues after iteration (by default the saved one), with the
+        accumulators rescaled to the weight these iterations have in the discounting schedule of this algorithm.
+        """
+        self._on_trees(
+            "_load_solution_trees",
+            solution=load_pickle(str(path) + ".pkl"),
+            iteration=iteration,
         )
 
+    def _load_solution_trees(self, solution, iteration):
+        T = solution["iteration"] if iteration is None else iteration
+        if T < 1:
+            raise ValueError("A warm start has to continue after at least one iteration")
+        weights = self._accumulator_weights(T)
+        scale = {
+            k: weights[k] / solution["weights"][k] if solution["weights"][k] > 0 else 0
+            for k in weights
+        }
+        for t_idx in self._tree_idxs:
+            saved = solution["trees"][min(t_idx, len(solution["trees"]) - 1)]
+            self._import_solution(
+                _node=self._trees[t_idx].root,
+                path=(),
+                saved=saved,
+                scale=scale,
+                range_size=self._env_bldrs[t_idx].rules.RANGE_SIZE,
+            )
+
+        self._regret_weight = weights["regret_pos"]
+        # the strategies of iteration T are computed before its counter is increased, see iteration()
+        self._iter_counter = T - 1
+        for p in range(self._n_seats):
+            self._compute_new_strategy(p_id=p)
+        self._iter_counter = T
+        self._sum_positive_regrets()
+        self._sample_chance(n_samples=None)
+        self._compute_cfv()
+        return [None for _ in self._tree_idxs]
+
+    def _import_solution(self, _node, path, saved, scale, range_size):
+        entry = None if path is None else saved.get(path)
+        if entry is None:
+            matches = [None for _ in _node.children]
+        else:
+            matches = _match_children(
+                [_signature(c) for c in _node.children], entry["children"]
+            )
+
+        if _node.data is not None:
+            shape = (range_size, len(_node.children))
+            regret = np.zeros(shape=shape, dtype=np.float32)
+            avg_strat_sum = np.zeros(shape=shape, dtype=np.float32)
+            imm_regret = np.zeros(shape=shape, dtype=np.float32)
+            if entry is not None and "regret" in entry:
+                for i, m in enumerate(matches):
+                    if m is None:
+                        continue
+                    r = entry["regret"][:, m]
+                    regret[:, i] = np.where(
+                        r > 0, r * scale["regret_pos"], r * scale["regret_neg"]
+                    )
+                    avg_strat_sum[:, i] = (
+                        entry["avg_strat_sum"][:, m]
+                        * scale["avg_strat_sum"]
+                        / self._avg_strat_scales[_node.p_id_acting_next]
+                    )
+                    imm_regret[:, i] = entry["imm_regret"][:, m]
+            _node.data["regret"] = regret
+            _node.data["avg_strat_sum"] = avg_strat_sum
+            _node.data["imm_regret"] = imm_regret
+            _s = np.sum(avg_strat_sum, axis=1, keepdims=True)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                _node.data["avg_strat"] = np.where(
+                    _s == 0, 1.0 / max(len(_node.children), 1), avg_strat_sum / _s
+                )
+
+        for c, m in zip(_node.children, matches):
+            self._import_solution(
+                _node=c,
+                path=None if m is None else path + (entry["children"][m],),
+                saved=saved,
+                scale=scale,
+                range_size=range_size,
+            )
+
+    def _avg_strat_discount(self, T):
+        """
+        Returns:
+            (d, w): avg_strat_sum of iteration T is avg_strat_sum * d + strategy * reach * w
+        """
+        return 1, 1
+
+    def _accumulator_weights(self, T):
+        """
+        Total weight of the iterations 1..T in the positive and negative regrets and the average strategy sums, found
+        by running the regret formulas on unit immediate regrets.
+        """
+        iter_counter = self._iter_counter
+        weights = {}
+        for sign, name in [(1, "regret_pos"), (-1, "regret_neg")]:
+            imm = np.full(shape=(1, 1), fill_value=sign, dtype=np.float32)
+            zero = np.zeros(shape=(1, 1), dtype=np.float32)
+            regret = zero
+            for self._iter_counter in range(T):
+                if self._iter_counter == 0:
+                    regret = self._regret_formula_first_it(
+                        ev_all_actions=imm, strat_ev=zero
+                    )
+                else:
+                    regret = self._regret_formula_after_first_it(
+                        ev_all_actions=imm, strat_ev=zero, last_regrets=regret
+                    )
+            weights[name] = max(float(sign * regret[0, 0]), 0)
+        self._iter_counter = iter_counter
+
+        avg_strat_sum = 0
+        for t in range(1, T + 1):
+            d, w = self._avg_strat_discount(t)
+            avg_strat_sum = avg_strat_sum * d + w if t > 1 else w
+        weights["avg_strat_sum"] = float(avg_strat_sum)
+        return weights
+
     def _reset_player(self, p_id):
         def __reset(_node, _p_id):
             if _node.p_id_acting_next == _p_id:
@@ -350,5 +809,61 @@ class CFRBase:
             for c in _node.children:
                 __reset(c, _p_id=_p_id)
 
-        for t_idx in range(len(self._trees)):
+        for t_idx in self._tree_idxs:
             __reset(self._trees[t_idx].root, _p_id=p_id)
+
+
+def _signature(node):
+    """
+    Identifies a node among its siblings independently of the bet set: chance outcomes by their board, actions by
+    their type and the stack the acting player has left after them.
+    """
+    if node.p_id_acted_last == node.tree.CHANCE_ID:
+        board = np.asarray(node.env_state[EnvDictIdxs.board_2d])
+        return "chance", tuple(board.flatten().tolist())
+    seat = node.env_state[EnvDictIdxs.seats][node.p_id_acted_last]
+    return min(node.action, Poker.BET_RAISE), int(seat[PlayerDictIdxs.stack])
+
+
+def _match_children(signatures, saved_signatures):
+    """
+    Returns the index of the matching saved child for each signature, or None.
+    """
+    matches = []
+    for kind, value in signatures:
+        candidates = [i for i, (k, v) in enumerate(saved_signatures) if k == kind]
+        if kind == "chance":
+            candidates = [i for i in candidates if saved_signatures[i][1] == value]
+        if not candidates:
+            matches.append(None)
+        elif kind == Poker.BET_RAISE:
+            matches.append(
+                min(candidates, key=lambda i: abs(saved_signatures[i][1] - value))
+            )
+        else:
+            matches.append(candidates[0])
+    return matches
+
+
+def _export_solution(tree, avg_strat_scales):
+    """
+    Returns a dict from the signature paths of all nodes to the signatures of their children and, for nodes with
+    regrets, their accumulators (with the avg_strat_scales of the acting players applied).
+    """
+    nodes = {}
+
+    def _export(_node, path):
+        signatures = [_signature(c) for c in _node.children]
+        entry = {"children": signatures}
+        if _node.data is not None and _node.data.get("regret") is not None:
+            for key in ["regret", "avg_strat_sum", "imm_regret"]:
+                entry[key] = _node.data[key]
+            entry["avg_strat_sum"] = (
+                entry["avg_strat_sum"] * avg_strat_scales[_node.p_id_acting_next]
+            )
+        nodes[path] = entry
+        for c, signature in zip(_node.children, signatures):
+            _export(c, path + (signature,))
+
+    _export(tree.root, ())
+    return nodes
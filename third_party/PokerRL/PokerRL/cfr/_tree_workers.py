@@ -0,0 +1,74 @@
+import multiprocessing
+import traceback
+
+
+class TreeWorkers:
+    """
+    Forked processes that each solve some of the trees of a CFRBase. Every process holds a copy of the solver made at
+    the fork, restricted to its trees through _tree_idxs. Calls are run by all workers in lockstep; only the per-tree
+    results and the scalar state of the solver (see CFRBase._get_scalar_state) are sent back.
+    """
+
+    def __init__(self, solver, num_workers):
+        n_trees = len(solver._trees)
+        self.assignment = [
+            list(range(worker_id, n_trees, num_workers))
+            for worker_id in range(num_workers)
+        ]
+
+        ctx = multiprocessing.get_context("fork")
+        self.workers = []
+        for tree_idxs in self.assignment:
+            conn, worker_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=self._run_worker,
+                args=(solver, tree_idxs, worker_conn),
+                daemon=True,
+            )
+            process.start()
+            worker_conn.close()
+            self.workers.append((process, conn))
+
+    @staticmethod
+    def _run_worker(solver, tree_idxs, conn):
+        solver._tree_workers = None
+        solver._tree_idxs = tree_idxs
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            method, kwargs = message
+            try:
+                results = getattr(solver, method)(**kwargs)
+                conn.send((results, solver._get_scalar_state(), None))
+            except Exception:
+                conn.send((None, None, traceback.format_exc()))
+        conn.close()
+
+    def call(self, method, kwargs, n_trees):
+        """
+        Returns the results of method for all trees, in tree order, and the scalar state of the solver after it.
+        """
+        for _, conn in self.workers:
+            conn.send((method, kwargs))
+
+        results = [None for _ in range(n_trees)]
+        state, errors = None, []
+        for (_, conn), tree_idxs in zip(self.workers, self.assignment):
+            worker_results, worker_state, error = conn.recv()
+            if error is not None:
+                errors.append(error)
+                continue
+            for t_idx, result in zip(tree_idxs, worker_results):
+                results[t_idx] = result
+            state = worker_state
+        if errors:
+            raise RuntimeError("Tree worker failed:\n{}".format(errors[0]))
+        return results, state
+
+    def close(self):
+        for process, conn in self.workers:
+            conn.send(None)
+            conn.close()
+            process.join()
+        self.workers = []
@@ -1,12 +1,83 @@
+import time
+from collections import defaultdict
+from pathlib import Path
+
 from PokerRL.game import bet_sets
+from PokerRL.game._.shared_tables import set_lut_cache_dir
+from PokerRL.game._.tree._.leaf_evaluators import get_leaf_evaluator
+from PokerRL.game._.tree.PublicTree import PublicTree
 from PokerRL.game.games import (
     DiscretizedNLHoldemSubGame3,
     DiscretizedNLHoldemSubGame4,
+    DiscretizedNLHoldemSubGameFile,
     StandardLeduc,
+    read_subgame_file,
 )
 from PokerRL.rl.base_cls.workers.ChiefBase import ChiefBase
+from pdcfrplus.utils.evaluation import (
+    AsyncEvaluator,
+    TargetStopping,
+    get_eval_iterations,
+)
+from pdcfrplus.utils.instrument import Instrumentation
 from pdcfrplus.utils.utils import init_object, load_module
 
+PROFILED_METHODS = [
+    "iteration",
+    "_compute_cfv",
+    "_update_player",
+    "_compute_regrets",
+    "_add_strategy_to_average",
+    "_compute_new_strategy",
+    "_update_reach_probs",
+    "_log_curr_strat_expl",
+    "_evaluate_avg_strats",
+]
+
+
+def build_solver(
+    solver_class,
+    game_class,
+    alpha,
+    gamma,
+    beta,
+    stop_at_street=None,
+    leaf_evaluator="equity",
+    value_table=None,
+    starting_stack_sizes=None,
+):
+    """
+    If stop_at_street is given, the trees are cut off at that street and the cutoff nodes are valued by
+    leaf_evaluator (see get_leaf_evaluator). With starting_stack_sizes, one tree is solved per stack size.
+    """
+    chief = ChiefBase(t_prof=None)
+    config = dict(
+        name="test",
+        game_cls=game_class,
+        agent_bet_set=bet_sets.B_3,
+        other_agent_bet_set=bet_sets.B_2,
+        chief_handle=chief,
+        alpha=alpha,
+        gamma=gamma,
+        beta=beta,
+    )
+    if stop_at_street is not None:
+        config["stop_at_street"] = stop_at_street
+        config["leaf_evaluator"] = get_leaf_evaluator(leaf_evaluator, value_table)
+    if starting_stack_sizes is not None:
+        config["starting_stack_sizes"] = list(starting_stack_sizes)
+    return init_object(solver_class, config)
+
+
+def set_cache_dirs(tree_cache_dir):
+    """
+    Trees are cached in tree_cache_dir, the card LUTs in its subfolder "luts".
+    """
+    PublicTree.set_cache_dir(tree_cache_dir)
+    set_lut_cache_dir(
+        None if tree_cache_dir is None else Path(tree_cache_dir) / "luts"
+    )
+
 
 class CFRRunner:
     def __init__(
@@ -18,7 +89,25 @@ class CFRRunner:
         alpha=1.5,
         gamma=0,
         beta=1,
+        tree_cache_dir=None,
+        stop_at_street=None,
+        leaf_evaluator="equity",
+        value_table=None,
+        warm_start=None,
+        warm_start_iteration=None,
+        starting_stack_sizes=None,
+        parallel_trees=False,
+        chance_samples=None,
+        seed=None,
     ):
+        """
+        With warm_start, the solver is seeded from a solution saved by CFRBase.save_solution and continues after
+        warm_start_iteration (by default the saved iteration) up to iterations. With parallel_trees, the trees of the
+        starting_stack_sizes are solved in one process each, see CFRBase.parallelize; call close() when done. With
+        chance_samples, each iteration after the first only traverses that many boards per chance node, drawn with
+        seed, see CFRBase._sample_chance.
+        """
+        set_cache_dirs(tree_cache_dir)
         self.solver_class = load_module("PokerRL.cfr:{}".format(algo_name))
         game_dict = {
             "Subgame3": DiscretizedNLHoldemSubGame3,
@@ -31,35 +120,203 @@ class CFRRunner:
         self.alpha = alpha
         self.gamma = gamma
         self.beta = beta
-        chief = ChiefBase(t_prof=None)
-        config = dict(
-            name="test",
-            game_cls=self.game_class,
-            agent_bet_set=bet_sets.B_3,
-            other_agent_bet_set=bet_sets.B_2,
-            chief_handle=chief,
-            alpha=self.alpha,
-            gamma=self.gamma,
-            beta=self.beta,
+        self.cfr = build_solver(
+            self.solver_class,
+            self.game_class,
+            self.alpha,
+            self.gamma,
+            self.beta,
+            stop_at_street=stop_at_street,
+            leaf_evaluator=leaf_evaluator,
+            value_table=value_table,
+            starting_stack_sizes=starting_stack_sizes,
         )
-        self.cfr = init_object(self.solver_class, config)
+        self.cfr.chance_samples = chance_samples
+        self.cfr.chance_seed = seed
+        if parallel_trees:
+            self.cfr.parallelize()
         self.step = 0
+        if warm_start is not None:
+            self.cfr.load_solution(warm_start, warm_start_iteration)
+            self.step = self.cfr.iter_counter
+        self.instrumentation = None
+        # step -> regret-based exploitability bound, in the units of calc_exp
+        self.exp_bounds = {}
 
-    def run(self):
-        for _ in range(1, self.iterations + 1):
+    def instrument(self, profile_iteration=None, profile_folder=None):
+        """
+        Records phase timings and tree node visits through the logger at every
+        evaluation. If profile_iteration is given, a flame graph of that iteration is
+        saved.
+        """
+        self.instrumentation = Instrumentation(profile_iteration, profile_folder)
+        self.instrumentation.instrument(self.cfr, PROFILED_METHODS)
+        for tree in self.cfr._trees:
+            self.instrumentation.instrument(
+                tree._value_filler, ["compute_cf_values_heads_up"]
+            )
+
+    def run(
+        self,
+        eval_interval=1,
+        eval_log_points=None,
+        async_eval=False,
+        eval_workers=2,
+        target_exp=None,
+    ):
+        """
+        The average strategy is evaluated at the iterations given by get_eval_iterations only; with async_eval it is
+        evaluated in forked processes while the iterations continue. With target_exp, the solve stops early once the
+        exploitability is at most target_exp, see TargetStopping.
+        """
+        if async_eval and self.cfr._tree_workers is not None:
+            raise ValueError("Asynchronous evaluation needs the trees in this process")
+        eval_iterations = get_eval_iterations(
+            self.iterations, eval_interval, eval_log_points
+        )
+        self.cfr.evaluate_inline = False
+        evaluator = AsyncEvaluator(self.calc_exp, eval_workers) if async_eval else None
+        stopping = None
+        if target_exp is not None:
+            stopping = TargetStopping(target_exp, self.calc_exp)
+        while self.step < self.iterations:
             self.iteration()
-            self.evaluate()
+            self.exp_bounds[self.step] = self.cfr.expl_bound / 1000
+            conv = None
+            if stopping is not None:
+                conv = stopping.check(self.exp_bounds[self.step])
+            if conv is not None:
+                self.log_exp(self.step, conv)
+            elif self.step in eval_iterations:
+                self.evaluate(evaluator)
+            if evaluator is not None:
+                for step, conv in evaluator.poll():
+                    self.log_exp(step, conv)
+            if stopping is not None and stopping.reached:
+                break
+        if evaluator is not None:
+            for step, conv in evaluator.close():
+                self.log_exp(step, conv)
+
+    def close(self):
+        self.cfr.close()
 
     def iteration(self):
         self.step += 1
+        if self.instrumentation is not None:
+            self.instrumentation.begin_iteration(self.step)
         self.cfr.iteration()
+        if self.instrumentation is not None:
+            self.instrumentation.end_iteration(self.step)
+
+    def calc_exp(self):
+        if not self.cfr.evaluate_inline:
+            self.cfr._evaluate_avg_strats()
+        return self.cfr.expl / 1000
+
+    def evaluate(self, evaluator=None):
+        if self.instrumentation is not None:
+            nodes = self.instrumentation.calls["compute_cf_values_heads_up"]
+            self.logger.record("prof/nodes", nodes)
+            self.instrumentation.record(self.logger)
+        if evaluator is not None:
+            evaluator.submit(self.step)
+            if self.instrumentation is not None:
+                self.logger.dump(step=self.step)
+            return
+        self.log_exp(self.step, self.calc_exp())
 
-    def evaluate(self):
-        self.conv = self.cfr.expl / 1000
-        if self.step == 1:
+    def log_exp(self, step, conv):
+        self.conv = conv
+        if step == 1:
             self.logger.record(f"exp", self.conv)
             self.logger.record(f"iter", 0)
             self.logger.dump(step=0)
         self.logger.record(f"exp", self.conv)
-        self.logger.record(f"iter", self.step)
-        self.logger.dump(step=self.step)
+        if step in self.exp_bounds:
+            self.logger.record("exp_bound", self.exp_bounds[step])
+        self.logger.record(f"iter", step)
+        self.logger.dump(step=step)
+
+
+class BatchEndgameRunner:
+    """
+    Solves every endgame file of a folder. Endgames with the same street and pot share the betting tree, so the
+    trees are built once per group and every further endgame of the group only swaps in its board and root reach
+    probabilities (see CFRBase.load_subgame). Endgames are solved back to back in one process, because the endgame
+    file is a class attribute of the game.
+    """
+
+    def __init__(
+        self,
+        algo_name,
+        subgame_dir,
+        iterations,
+        logger,
+        alpha=1.5,
+        gamma=0,
+        beta=1,
+        tree_cache_dir=None,
+    ):
+        set_cache_dirs(tree_cache_dir)
+        self.solver_class = load_module("PokerRL.cfr:{}".format(algo_name))
+        self.game_class = DiscretizedNLHoldemSubGameFile
+        self.subgame_files = sorted(Path(subgame_dir).glob("*.txt"))
+        self.iterations = iterations
+        self.logger = logger
+        self.alpha = alpha
+        self.gamma = gamma
+        self.beta = beta
+        self.results = {}
+
+    def group_subgames(self):
+        groups = defaultdict(list)
+        for file in self.subgame_files:
+            round, board, pot, reach1, reach2 = read_subgame_file(file=file)
+            groups[(round, pot)].append(file)
+        return groups
+
+    def run(self):
+        start = time.time()
+        step = 0
+        for (round, pot), files in self.group_subgames().items():
+            cfr = None
+            for file in files:
+                self.game_class.set_subgame_file(file)
+                if cfr is None:
+                    cfr = build_solver(
+                        self.solver_class,
+                        self.game_class,
+                        self.alpha,
+                        self.gamma,
+                        self.beta,
+                    )
+                    # only the final average strategy of each endgame is evaluated
+                    cfr.evaluate_inline = False
+                else:
+                    env = cfr._env_bldrs[0].get_new_env(is_evaluating=True)
+                    cfr.load_subgame(env.root_env_state, env.reach_probs)
+
+                subgame_start = time.time()
+                for _ in range(self.iterations):
+                    cfr.iteration()
+                subgame_time = time.time() - subgame_start
+                # solvers with a delay do not evaluate the first iterations
+                cfr.expl = None
+                cfr._evaluate_avg_strats()
+                exp = None if cfr.expl is None else cfr.expl / 1000
+                self.results[file.stem] = exp
+
+                step += 1
+                self.logger.record("exp", exp)
+                self.logger.record("subgame", file.stem)
+                self.logger.record("round", round)
+                self.logger.record("pot", pot)
+                self.logger.record("time", subgame_time)
+                self.logger.dump(step=step)
+
+        elapsed = time.time() - start
+        self.logger.record("subgames", step)
+        self.logger.record("subgames_per_hour", step / elapsed * 3600)
+        self.logger.dump(step=step)
+        return self.results
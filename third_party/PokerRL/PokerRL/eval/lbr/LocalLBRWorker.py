@@ -131,7 +131,7 @@ class LocalLBRWorker:
 
                         # prepare for raise simulation
                         if Poker.BET_RAISE in self._env.get_legal_actions():
-                            _saved_env_state = self._env.state_dict()
+                            _saved_env_state = self._env.snapshot()
                             _saved_agent_env_state = self.agent.env_state_dict()
                             _saved_agent_range_state = self.agent_range.state_dict()
 
@@ -182,7 +182,7 @@ class LocalLBRWorker:
 
                             # ________________________________________ reset ___________________________________________
                             self.agent_range.load_state_dict(_saved_agent_range_state)
-                            self._env.load_state_dict(_saved_env_state)
+                            self._env.load_snapshot(_saved_env_state)
                             self.agent.load_env_state_dict(_saved_agent_env_state)
 
                         # select action with highest approximated EV
@@ -283,7 +283,7 @@ class LocalLBRWorker:
                         )
 
                         # prepare for raise simulation
-                        _saved_env_state = self._env.state_dict()
+                        _saved_env_state = self._env.snapshot()
                         _saved_agent_env_state = self.agent.env_state_dict()
                         _saved_agent_range_state = self.agent_range.state_dict()
                         _legal_raises = self._env.get_legal_actions()
@@ -345,7 +345,7 @@ class LocalLBRWorker:
 
                             # ________________________________________ reset ___________________________________________
                             self.agent_range.load_state_dict(_saved_agent_range_state)
-                            self._env.load_state_dict(_saved_env_state)
+                            self._env.load_snapshot(_saved_env_state)
                             self.agent.load_env_state_dict(_saved_agent_env_state)
 
                         # select action with highest approximated EV
@@ -24,6 +24,8 @@ class RLBRArgs:
         play_n_games_per_iter=50,
         pretrain_n_games=5120,
         device_training="cpu",
+        # forked processes each LearnerActor plays its games in, writing into one shared buffer
+        n_rollout_procs=1,
         # the DDQN
         nn_type="feedforward",
         target_net_update_freq=300,
@@ -76,7 +78,13 @@ class RLBRArgs:
                 "and at least one LearnerActor"
             )
 
+        if n_rollout_procs > 1 and nn_type != "feedforward":
+            raise ValueError(
+                "Rollout processes need the feedforward buffer, got", nn_type
+            )
+
         self.n_las = (n_workers - 1) if DISTRIBUTED else 1
+        self.n_rollout_procs = int(n_rollout_procs)
 
         self.n_hands_each_seat = int(n_hands_each_seat)
         self.n_iterations = int(n_iterations)
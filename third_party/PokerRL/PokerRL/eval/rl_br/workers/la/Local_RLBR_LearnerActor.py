@@ -1,4 +1,8 @@
+import multiprocessing
+import traceback
+
 import numpy as np
+import torch
 from PokerRL.eval.rl_br import _util
 from PokerRL.rl import rl_util
 from PokerRL.rl.agent_modules.DDQN import DDQN
@@ -53,8 +57,12 @@ class Local_RLBR_LearnerActor(WorkerBase):
             ddqn_args=self._args.ddqn_args,
             env_bldr=self._eval_env_bldr,
         )
+        # the rollout processes write into the buffer sampled here
+        buf_kwargs = {"shared": True} if self._args.n_rollout_procs > 1 else {}
         self._buf = self.CircularBufferCls(
-            env_bldr=self._env_bldr, max_size=self._args.ddqn_args.cir_buf_size
+            env_bldr=self._env_bldr,
+            max_size=self._args.ddqn_args.cir_buf_size,
+            **buf_kwargs
         )
         self._br_memory_saver = self.BRMemorySaverCls(
             env_bldr=self._eval_env_bldr, buffer=self._buf
@@ -67,6 +75,60 @@ class Local_RLBR_LearnerActor(WorkerBase):
 
     def play(self, n_episodes):
         self._ddqns[self._rlbr_seat_id].eval()
+        if self._args.n_rollout_procs > 1:
+            accumulated_rew = self._play_in_rollout_procs(n_episodes=n_episodes)
+        else:
+            accumulated_rew = self._play_episodes(n_episodes=n_episodes)
+
+        return (
+            accumulated_rew
+            * self._eval_env_bldr.env_cls.EV_NORMALIZER
+            * self._rlbr_env_wrapper.env.REWARD_SCALAR
+            / n_episodes
+        )
+
+    def _play_in_rollout_procs(self, n_episodes):
+        """
+        Splits the episodes over forked processes. They start from the current nets, opponent and env and add their
+        steps to the shared buffer.
+        """
+        ctx = multiprocessing.get_context("fork")
+        n_procs = min(self._args.n_rollout_procs, n_episodes)
+        procs = []
+        for i in range(n_procs):
+            n = n_episodes * (i + 1) // n_procs - n_episodes * i // n_procs
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            process = ctx.Process(
+                target=self._run_rollout_proc,
+                args=(n, np.random.randint(2**31), send_conn),
+                daemon=True,
+            )
+            process.start()
+            send_conn.close()
+            procs.append((process, recv_conn))
+
+        accumulated_rew = 0.0
+        for process, conn in procs:
+            rew, error = conn.recv()
+            conn.close()
+            process.join()
+            if error is not None:
+                raise RuntimeError("Rollout process failed:\n{}".format(error))
+            accumulated_rew += rew
+        return accumulated_rew
+
+    def _run_rollout_proc(self, n_episodes, seed, conn):
+        # forked processes share the random state of the parent
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+        torch.set_num_threads(1)
+        try:
+            conn.send((self._play_episodes(n_episodes=n_episodes), None))
+        except Exception:
+            conn.send((None, traceback.format_exc()))
+        conn.close()
+
+    def _play_episodes(self, n_episodes):
         accumulated_rew = 0.0
         for n in range(n_episodes):
             # """""""""""""""""
@@ -152,12 +214,7 @@ class Local_RLBR_LearnerActor(WorkerBase):
             # For tracking running reward while training
             accumulated_rew += r_for_all[self._rlbr_seat_id]
 
-        return (
-            accumulated_rew
-            * self._eval_env_bldr.env_cls.EV_NORMALIZER
-            * self._rlbr_env_wrapper.env.REWARD_SCALAR
-            / n_episodes
-        )
+        return accumulated_rew
 
     def update_target_net(self, p_id):
         self._ddqns[p_id].update_target_net()
@@ -14,65 +14,78 @@ class AgentTournament:
 
         assert env_args.n_seats == 2
 
-    def run(self, n_games_per_seat):
+    def run(self, n_games_per_seat, duplicate=False, value_fn=None):
+        """
+        Plays n_games_per_seat hands with each agent in each seat and returns the mean winnings of eval_agent_1 with
+        the bounds of its 95% confidence interval.
+
+        Args:
+            n_games_per_seat (int):
+            duplicate (bool):       If True, every deal is played twice with the same deck and the seats swapped, so
+                                    each agent plays both hands of the deal. The winnings of the two hands are averaged
+                                    into one sample, which cancels most of the card luck.
+            value_fn:               Optional fn(env) -> np.arr(n_seats) estimating the expected rewards (in the units
+                                    returned by env.step) of all seats from the current state of the env. If given, an
+                                    AIVAT-style control variate is added to the winnings: at every decision the value
+                                    of the taken action is replaced by the expectation of the values of all legal
+                                    actions under the acting agent's own action probabilities. This keeps the estimate
+                                    unbiased for any value_fn, the better value_fn the lower the variance.
+
+        Returns:
+            float, float, float: mean, upper and lower bound of the 95% confidence interval
+        """
         REFERENCE_AGENT = 0
         _env = self._env_cls(
             env_args=self._env_args, is_evaluating=True, lut_holder=self._lut_holder
         )
 
-        winnings = np.empty(shape=(n_games_per_seat * _env.N_SEATS), dtype=np.float32)
-
-        for seat_p0 in range(_env.N_SEATS):
-            seat_p1 = 1 - seat_p0
-
+        if duplicate:
+            winnings = np.empty(shape=n_games_per_seat, dtype=np.float32)
             for _hand_nr in range(n_games_per_seat):
-                # """""""""""""""""
-                # Reset
-                # """""""""""""""""
-                _, r_for_all, done, info = _env.reset()
-                for e in self._eval_agents:
-                    e.reset(deck_state_dict=_env.cards_state_dict())
-
-                # """""""""""""""""
-                # Play Episode
-                # """""""""""""""""
-                while not done:
-                    p_id_acting = _env.current_player.seat_id
-
-                    if p_id_acting == seat_p0:
-                        action_int, _ = self._eval_agents[REFERENCE_AGENT].get_action(
-                            step_env=True, need_probs=False
+                _env.reset()
+                deck_state_dict = _env.cards_state_dict()
+                winnings[_hand_nr] = np.mean(
+                    [
+                        self._play_hand(
+                            env=_env,
+                            seat_p0=seat_p0,
+                            deck_state_dict=deck_state_dict,
+                            value_fn=value_fn,
                         )
-                        self._eval_agents[1 - REFERENCE_AGENT].notify_of_action(
-                            p_id_acted=p_id_acting, action_he_did=action_int
-                        )
-                    elif p_id_acting == seat_p1:
-                        action_int, _ = self._eval_agents[
-                            1 - REFERENCE_AGENT
-                        ].get_action(step_env=True, need_probs=False)
-                        self._eval_agents[REFERENCE_AGENT].notify_of_action(
-                            p_id_acted=p_id_acting, action_he_did=action_int
+                        for seat_p0 in range(_env.N_SEATS)
+                    ]
+                )
+        else:
+            winnings = np.empty(
+                shape=(n_games_per_seat * _env.N_SEATS), dtype=np.float32
+            )
+            for seat_p0 in range(_env.N_SEATS):
+                for _hand_nr in range(n_games_per_seat):
+                    winnings[_hand_nr + (seat_p0 * n_games_per_seat)] = (
+                        self._play_hand(
+                            env=_env,
+                            seat_p0=seat_p0,
+                            deck_state_dict=None,
+                            value_fn=value_fn,
                         )
-                    else:
-                        raise ValueError("Only HU supported!")
+                    )
 
-                    _, r_for_all, done, info = _env.step(action_int)
-
-                # """""""""""""""""
-                # Add Rews
-                # """""""""""""""""
-                winnings[_hand_nr + (seat_p0 * n_games_per_seat)] = (
-                    r_for_all[seat_p0] * _env.REWARD_SCALAR * _env.EV_NORMALIZER
-                )
         mean = np.mean(winnings).item()
         std = np.std(winnings).item()
 
-        _d = 1.96 * std / np.sqrt(n_games_per_seat * _env.N_SEATS)
+        _d = 1.96 * std / np.sqrt(winnings.shape[0])
         lower_conf95 = mean - _d
         upper_conf95 = mean + _d
 
         print()
-        print("Played", n_games_per_seat * 2, "hands of poker.")
+        print(
+            "Played",
+            n_games_per_seat * 2,
+            "hands of poker"
+            + (" (duplicate)" if duplicate else "")
+            + (" (AIVAT)" if value_fn is not None else "")
+            + ".",
+        )
         print(
             "Player ",
             self._eval_agents[REFERENCE_AGENT].get_mode() + ":",
@@ -89,3 +102,74 @@ class AgentTournament:
         )
 
         return float(mean), float(upper_conf95), float(lower_conf95)
+
+    def _play_hand(self, env, seat_p0, deck_state_dict, value_fn):
+        """
+        Plays one hand with eval_agent_1 in seat_p0 and returns its (optionally AIVAT-corrected) winnings.
+        """
+        REFERENCE_AGENT = 0
+        seat_p1 = 1 - seat_p0
+
+        # """""""""""""""""
+        # Reset
+        # """""""""""""""""
+        _, r_for_all, done, info = env.reset(deck_state_dict=deck_state_dict)
+        for e in self._eval_agents:
+            e.reset(deck_state_dict=env.cards_state_dict())
+
+        # """""""""""""""""
+        # Play Episode
+        # """""""""""""""""
+        correction = 0.0
+        while not done:
+            p_id_acting = env.current_player.seat_id
+
+            if p_id_acting == seat_p0:
+                acting, observing = REFERENCE_AGENT, 1 - REFERENCE_AGENT
+            elif p_id_acting == seat_p1:
+                acting, observing = 1 - REFERENCE_AGENT, REFERENCE_AGENT
+            else:
+                raise ValueError("Only HU supported!")
+
+            if value_fn is not None:
+                a_probs = self._eval_agents[acting].get_a_probs()
+            action_int, _ = self._eval_agents[acting].get_action(
+                step_env=True, need_probs=False
+            )
+            self._eval_agents[observing].notify_of_action(
+                p_id_acted=p_id_acting, action_he_did=action_int
+            )
+            if value_fn is not None:
+                correction += self._action_correction(
+                    env=env,
+                    a_probs=a_probs,
+                    action_int=action_int,
+                    value_fn=value_fn,
+                    seat=seat_p0,
+                )
+
+            _, r_for_all, done, info = env.step(action_int)
+
+        # """""""""""""""""
+        # Add Rews
+        # """""""""""""""""
+        return (
+            (r_for_all[seat_p0] + correction) * env.REWARD_SCALAR * env.EV_NORMALIZER
+        )
+
+    @staticmethod
+    def _action_correction(env, a_probs, action_int, value_fn, seat):
+        """
+        Expected value of the acting agent's policy minus the value of the action it took, both from the view of seat.
+        The env is stepped through all legal actions and restored afterwards.
+        """
+        state = env.snapshot()
+        expected, taken = 0.0, 0.0
+        for a in env.get_legal_actions():
+            _, r_for_all, done, _ = env.step(a)
+            v = r_for_all[seat] if done else value_fn(env)[seat]
+            env.load_snapshot(state)
+            expected += a_probs[a] * v
+            if a == action_int:
+                taken = v
+        return expected - taken
@@ -2,7 +2,6 @@
 
 
 import numpy as np
-from PokerRL.game.Poker import Poker
 
 
 class PokerRange:
@@ -28,17 +27,10 @@ class PokerRange:
         if self._env_bldr.rules.N_HOLE_CARDS == 1:
             return np.copy(self._range)
         elif self._env_bldr.rules.N_HOLE_CARDS == 2:
-            card_probs = np.zeros(
-                shape=self._env_bldr.rules.N_CARDS_IN_DECK, dtype=np.float32
-            )
-
-            for c in range(self._env_bldr.rules.N_CARDS_IN_DECK):
-                card_probs[c] = np.sum(
-                    self._range[
-                        self._env_bldr.lut_holder.LUT_CARD_IN_WHAT_RANGE_IDXS[c]
-                    ]
-                )
-            return card_probs
+            # sums the probabilities of all hands containing each card
+            return np.dot(
+                self._env_bldr.lut_holder.LUT_CARD_BLOCKS_RANGE_IDX[:-1], self._range
+            ).astype(np.float32)
 
         else:
             raise NotImplementedError()
@@ -77,71 +69,19 @@ class PokerRange:
 
     def set_cards_to_zero_prob(self, cards_2d):
         cards_1d_to_remove = self._env_bldr.lut_holder.get_1d_cards(cards_2d=cards_2d)
-        if self._env_bldr.rules.N_HOLE_CARDS == 1:
-            self._range[cards_1d_to_remove] = 0
-
-        elif self._env_bldr.rules.N_HOLE_CARDS == 2:
-            for c in cards_1d_to_remove:
-                # instead of looping we make use of the fact that the LUT is sorted and just use numpy slicing
-                self._range[self._env_bldr.lut_holder.LUT_HOLE_CARDS_2_IDX[0:c, c]] = 0
-                self._range[
-                    self._env_bldr.lut_holder.LUT_HOLE_CARDS_2_IDX[
-                        c, c + 1 : self._env_bldr.rules.N_CARDS_IN_DECK
-                    ]
-                ] = 0
-        else:
-            raise NotImplementedError(
-                "We don't currently support games with >2 hole cards"
-            )
+        self._range[
+            self._env_bldr.lut_holder.get_blocked_range_mask(cards_1d_to_remove)
+        ] = 0
 
         self.normalize()
 
     @staticmethod
     def get_possible_range_idxs(rules, lut_holder, board_2d):
-        arr = np.arange(rules.RANGE_SIZE)
-
-        if board_2d.shape[0] == 0:  # if nothing is blocked
-            return arr
-
-        # filter not-dealt-cards
-        lut_holder.get_1d_cards(cards_2d=board_2d)
-        blocked_cards_1d = np.array(
-            [
-                c
-                for c in lut_holder.get_1d_cards(cards_2d=board_2d)
-                if c != Poker.CARD_NOT_DEALT_TOKEN_1D
-            ]
-        )
-        if rules.N_HOLE_CARDS == 1:
-            arr = np.delete(arr, obj=blocked_cards_1d)
-            return arr
-
-        elif rules.N_HOLE_CARDS == 2:
-            hands = []
-
-            for c in blocked_cards_1d:
-                for c1 in range(0, c):
-                    hands.append(
-                        lut_holder.get_range_idx_from_hole_cards(
-                            lut_holder.get_2d_cards(np.array([c1, c], dtype=np.int8))
-                        )
-                    )
-                for c2 in range(c + 1, rules.N_CARDS_IN_DECK):
-                    hands.append(
-                        lut_holder.get_range_idx_from_hole_cards(
-                            lut_holder.get_2d_cards(np.array([c, c2], dtype=np.int8))
-                        )
-                    )
-
-            blocked_idxs = np.unique(np.array(hands))
-            arr = np.delete(arr, obj=blocked_idxs)
-
-            return arr
-
-        else:
-            raise NotImplementedError(
-                "self.N_HOLE_CARDS > 2:  " + str(rules.N_HOLE_CARDS)
+        return np.flatnonzero(
+            lut_holder.get_possible_range_mask(
+                lut_holder.get_1d_cards(cards_2d=board_2d)
             )
+        )
 
     @staticmethod
     def get_range_size(n_hole_cards, n_cards_in_deck):
@@ -3,6 +3,7 @@
 
 import numpy as np
 from PokerRL.game._.cpp_wrappers.CppLUT import CppLibHoldemLuts
+from PokerRL.game._.shared_tables import load_or_build
 from PokerRL.game.Poker import Poker
 from PokerRL.game.PokerRange import PokerRange
 from scipy.special import comb
@@ -27,6 +28,21 @@ class _LutGetterBase:
     def get_card_in_what_range_idxs_LUT(self):
         raise NotImplementedError
 
+    def get_card_blocks_range_idx_LUT(self):
+        """
+        lut[c, range_idx] is True if the hand range_idx contains card c. The extra last row (c = N_CARDS_IN_DECK) is
+        all False and stands for cards that are not dealt.
+        """
+        range_idx_to_hc_lut = self.get_idx_2_hole_card_LUT()
+        lut = np.zeros(
+            shape=(self.rules.N_CARDS_IN_DECK + 1, self.rules.RANGE_SIZE),
+            dtype=np.bool_,
+        )
+        range_idxs = np.arange(self.rules.RANGE_SIZE)
+        for c_id in range(self.rules.N_HOLE_CARDS):
+            lut[range_idx_to_hc_lut[:, c_id], range_idxs] = True
+        return lut
+
     def get_range_idx_to_private_obs_LUT(self):
         range_idx_to_hc_lut = self.get_idx_2_hole_card_LUT()
         hc_1d_to_2d_lut = self.get_1d_card_2_2d_card_LUT()
@@ -213,24 +229,49 @@ class _LutGetterLeduc(_LutGetterBase):
 class _LutHolderBase:
     """abstract"""
 
-    def __init__(self, lut_getter):
+    def __init__(self, lut_getter, cache_dir=None):
+        """
+        Args:
+            lut_getter:
+            cache_dir (str):    Optional. If given, the array LUTs are memory-mapped from this folder and only built
+                                (and saved there) if missing. Use shared_tables.get_lut_holder to share them.
+        """
         self._lut_getter = lut_getter
 
         # lut[i, 0] --> rank; ut[i, 1] --> suit
-        self.LUT_1DCARD_2_2DCARD = self._lut_getter.get_1d_card_2_2d_card_LUT()
+        self.LUT_1DCARD_2_2DCARD = load_or_build(
+            cache_dir, "1dcard_2_2dcard", self._lut_getter.get_1d_card_2_2d_card_LUT
+        )
         # lut[rank, suit] --> int
-        self.LUT_2DCARD_2_1DCARD = self._lut_getter.get_2d_card_2_1d_card_LUT()
+        self.LUT_2DCARD_2_1DCARD = load_or_build(
+            cache_dir, "2dcard_2_1dcard", self._lut_getter.get_2d_card_2_1d_card_LUT
+        )
         # lut[range_idx] -> array of size   n_hole_cards * (n_suits + n_ranks)
-        self.LUT_RANGE_IDX_TO_PRIVATE_OBS = (
-            self._lut_getter.get_range_idx_to_private_obs_LUT()
+        self.LUT_RANGE_IDX_TO_PRIVATE_OBS = load_or_build(
+            cache_dir,
+            "range_idx_to_private_obs",
+            self._lut_getter.get_range_idx_to_private_obs_LUT,
         )
 
-        self.LUT_IDX_2_HOLE_CARDS = self._lut_getter.get_idx_2_hole_card_LUT()
-        self.LUT_HOLE_CARDS_2_IDX = self._lut_getter.get_hole_card_2_idx_LUT()
+        self.LUT_IDX_2_HOLE_CARDS = load_or_build(
+            cache_dir, "idx_2_hole_cards", self._lut_getter.get_idx_2_hole_card_LUT
+        )
+        self.LUT_HOLE_CARDS_2_IDX = load_or_build(
+            cache_dir, "hole_cards_2_idx", self._lut_getter.get_hole_card_2_idx_LUT
+        )
 
         # [c] --> list of all range idxs that contain this card.
-        self.LUT_CARD_IN_WHAT_RANGE_IDXS = (
-            self._lut_getter.get_card_in_what_range_idxs_LUT()
+        self.LUT_CARD_IN_WHAT_RANGE_IDXS = load_or_build(
+            cache_dir,
+            "card_in_what_range_idxs",
+            self._lut_getter.get_card_in_what_range_idxs_LUT,
+        )
+
+        # [c, range_idx] --> whether hand range_idx contains card c. Row N_CARDS_IN_DECK is for not-dealt cards.
+        self.LUT_CARD_BLOCKS_RANGE_IDX = load_or_build(
+            cache_dir,
+            "card_blocks_range_idx",
+            self._lut_getter.get_card_blocks_range_idx_LUT,
         )
 
         # [round] -> number of possible public boards in that round
@@ -281,6 +322,43 @@ class _LutHolderBase:
             self.LUT_2DCARD_2_1DCARD[aa[:, 0], aa[:, 1]],
         )
 
+    def get_blocked_range_mask(self, cards_1d):
+        """
+        Args:
+            cards_1d (iterable):   1d cards, may contain CARD_NOT_DEALT_TOKEN_1D
+
+        Returns:
+            np.ndarray(RANGE_SIZE, bool): True for all hands that contain at least one of the cards
+        """
+        return np.any(
+            self.LUT_CARD_BLOCKS_RANGE_IDX[self._card_rows(cards_1d)], axis=-2
+        )
+
+    def get_possible_range_mask(self, board_1d):
+        """
+        Returns:
+            np.ndarray(RANGE_SIZE, bool): True for all hands that are possible on the board
+        """
+        return np.logical_not(self.get_blocked_range_mask(board_1d))
+
+    def get_possible_range_masks(self, boards_1d):
+        """
+        Args:
+            boards_1d (np.ndarray):     shape (n_boards, n_cards_on_board), may contain CARD_NOT_DEALT_TOKEN_1D
+
+        Returns:
+            np.ndarray((n_boards, RANGE_SIZE), bool): the possible hands on each board, in one array operation
+        """
+        return np.logical_not(self.get_blocked_range_mask(boards_1d))
+
+    def _card_rows(self, cards_1d):
+        cards_1d = np.asarray(cards_1d, dtype=np.intp)
+        return np.where(
+            cards_1d == Poker.CARD_NOT_DEALT_TOKEN_1D,
+            self.LUT_CARD_BLOCKS_RANGE_IDX.shape[0] - 1,
+            cards_1d,
+        )
+
     def get_2d_cards(self, cards_1d):
         """
         Args:
@@ -317,8 +395,10 @@ class LutHolderLeduc(_LutHolderBase):
     Don't use LUTs from outside this class. use the functions instad!
     """
 
-    def __init__(self, env_cls):
-        super().__init__(lut_getter=_LutGetterLeduc(env_cls=env_cls))
+    def __init__(self, env_cls, cache_dir=None):
+        super().__init__(
+            lut_getter=_LutGetterLeduc(env_cls=env_cls), cache_dir=cache_dir
+        )
 
     def get_range_idx_from_hole_cards(self, hole_cards_2d):
         c1 = self.get_1d_cards(hole_cards_2d)[0]
@@ -333,8 +413,10 @@ class LutHolderLeduc(_LutHolderBase):
 
 
 class LutHolderHoldem(_LutHolderBase):
-    def __init__(self, env_cls):
-        super().__init__(lut_getter=_LutGetterHoldem(env_cls=env_cls))
+    def __init__(self, env_cls, cache_dir=None):
+        super().__init__(
+            lut_getter=_LutGetterHoldem(env_cls=env_cls), cache_dir=cache_dir
+        )
 
     def get_range_idx_from_hole_cards(self, hole_cards_2d):
         _c1 = self.LUT_2DCARD_2_1DCARD[hole_cards_2d[0, 0]][hole_cards_2d[0, 1]]
@@ -11,6 +11,12 @@ from PokerRL.game._.rl_env.base._PokerPlayer import PokerPlayer
 from PokerRL.game.Poker import Poker
 from PokerRL.game.PokerEnvStateDictEnums import EnvDictIdxs, PlayerDictIdxs
 
+# encodes None in the scalars of PokerEnv.snapshot()
+_SNAPSHOT_NONE = -(2**62)
+# number of scalars of PokerEnv.snapshot() before the side pots, and per seat after them
+_SNAPSHOT_N_TABLE_SCALARS = 13
+_SNAPSHOT_N_SEAT_SCALARS = 8
+
 
 class PokerEnv:
     """
@@ -505,6 +511,22 @@ class PokerEnv:
             for i in range(a.n_seats)
         ]
 
+        # offsets of the parts of snapshot()
+        self._snapshot_board_start = (
+            _SNAPSHOT_N_TABLE_SCALARS
+            + self.N_SEATS
+            + self.N_SEATS * _SNAPSHOT_N_SEAT_SCALARS
+        )
+        self._snapshot_deck_start = (
+            self._snapshot_board_start + 2 * self.N_TOTAL_BOARD_CARDS
+        )
+        self._snapshot_hands_start = (
+            self._snapshot_deck_start + 2 * self.N_CARDS_IN_DECK
+        )
+        self._snapshot_size = (
+            self._snapshot_hands_start + 2 * self.N_HOLE_CARDS * self.N_SEATS
+        )
+
     # __________________________________________________ TO OVERRIDE ___________________________________________________
     def get_hand_rank(self, hand_2d, board_2d):
         """
@@ -1506,6 +1528,137 @@ class PokerEnv:
                     PlayerDictIdxs.hand_rank
                 ]
 
+    def snapshot(self):
+        """
+        Faster alternative to state_dict() for saving and restoring the env. Encodes the same state into one int64
+        array with a fixed layout for the args of the env: the table scalars (evaluation flag, round, main pot, current
+        player, last raiser, capped raise, action and raise counters, last action, deck size), the side pots, the
+        per-seat scalars (stack, current bet, all-in, folded, has acted, side pot rank, hand rank, number of hole cards
+        or -1 without a hand), the board, the remaining deck and the hole cards of all seats, both zero padded.
+
+        Returns:
+            np.ndarray(int64): to be restored with load_snapshot() of an env with the same args
+        """
+        scalars = [
+            self.IS_EVALUATING,
+            self.current_round,
+            self.main_pot,
+            self.current_player.seat_id,
+            -1 if self.last_raiser is None else self.last_raiser.seat_id,
+            self.capped_raise.player_that_raised.seat_id
+            if self.capped_raise.happened_this_round
+            else -1,
+            -1
+            if not self.capped_raise.happened_this_round
+            or self.capped_raise.player_that_cant_reopen is None
+            else self.capped_raise.player_that_cant_reopen.seat_id,
+            self.n_actions_this_episode,
+            self.n_raises_this_round,
+        ]
+        scalars += [_SNAPSHOT_NONE if x is None else x for x in self.last_action]
+        scalars.append(self.deck.deck_remaining.shape[0])
+        scalars += self.side_pots
+        for p in self.seats:
+            scalars += [
+                p.stack,
+                p.current_bet,
+                p.is_allin,
+                p.folded_this_episode,
+                p.has_acted_this_round,
+                p.side_pot_rank,
+                _SNAPSHOT_NONE if p.hand_rank is None else p.hand_rank,
+                -1 if p.hand is None else len(p.hand),
+            ]
+
+        snapshot = np.zeros(self._snapshot_size, dtype=np.int64)
+        snapshot[: self._snapshot_board_start] = scalars
+        snapshot[self._snapshot_board_start : self._snapshot_deck_start] = (
+            self.board.ravel()
+        )
+        deck = self.deck.deck_remaining.ravel()
+        start = self._snapshot_deck_start
+        snapshot[start : start + deck.shape[0]] = deck
+        for p in self.seats:
+            if p.hand is not None and len(p.hand) > 0:
+                hand = np.ravel(p.hand)
+                start = self._snapshot_hands_start + p.seat_id * 2 * self.N_HOLE_CARDS
+                snapshot[start : start + hand.shape[0]] = hand
+        return snapshot
+
+    def load_snapshot(self, snapshot, blank_private_info=False):
+        """
+        Restores a state saved by snapshot(). Same semantics as load_state_dict().
+
+        Args:
+            snapshot (np.ndarray):
+            blank_private_info (bool): If true, hole cards are going to be set to None. This is useful when loading a
+                                        public state
+        """
+        scalars = snapshot[: self._snapshot_board_start].tolist()
+        self.IS_EVALUATING = bool(scalars[0])
+        self.current_round = scalars[1]
+        self.main_pot = scalars[2]
+        self.current_player = self.seats[scalars[3]]
+        self.last_raiser = None if scalars[4] < 0 else self.seats[scalars[4]]
+        self.capped_raise = CappedRaise()
+        if scalars[5] >= 0:
+            self.capped_raise.happened_this_round = True
+            self.capped_raise.player_that_raised = self.seats[scalars[5]]
+            self.capped_raise.player_that_cant_reopen = (
+                None if scalars[6] < 0 else self.seats[scalars[6]]
+            )
+        self.n_actions_this_episode = scalars[7]
+        self.n_raises_this_round = scalars[8]
+        self.last_action = [None if x == _SNAPSHOT_NONE else x for x in scalars[9:12]]
+        n_deck = scalars[12]
+        self.side_pots = scalars[
+            _SNAPSHOT_N_TABLE_SCALARS : _SNAPSHOT_N_TABLE_SCALARS + self.N_SEATS
+        ]
+
+        self.board = (
+            snapshot[self._snapshot_board_start : self._snapshot_deck_start]
+            .reshape(-1, 2)
+            .astype(np.int8)
+        )
+        start = self._snapshot_deck_start
+        self.deck.deck_remaining = (
+            snapshot[start : start + 2 * n_deck].reshape(-1, 2).astype(np.int8)
+        )
+
+        i = _SNAPSHOT_N_TABLE_SCALARS + self.N_SEATS
+        for p in self.seats:
+            (
+                p.stack,
+                p.current_bet,
+                is_allin,
+                folded_this_episode,
+                has_acted_this_round,
+                p.side_pot_rank,
+                hand_rank,
+                n_hole_cards,
+            ) = scalars[i : i + _SNAPSHOT_N_SEAT_SCALARS]
+            i += _SNAPSHOT_N_SEAT_SCALARS
+            p.is_allin = bool(is_allin)
+            p.folded_this_episode = bool(folded_this_episode)
+            p.has_acted_this_round = bool(has_acted_this_round)
+
+            if blank_private_info:
+                p.hand = None
+                p.hand_rank = None
+            else:
+                if n_hole_cards < 0:
+                    p.hand = None
+                else:
+                    start = (
+                        self._snapshot_hands_start + p.seat_id * 2 * self.N_HOLE_CARDS
+                    )
+                    p.hand = (
+                        snapshot[start : start + 2 * n_hole_cards]
+                        .reshape(-1, 2)
+                        .astype(np.int8)
+                    )
+                p.hand_rank = None if hand_rank == _SNAPSHOT_NONE else hand_rank
+
     def get_current_obs(self, is_terminal):
         """
         This function can be useful for manually setting the environment to a desired state and then getting the
@@ -81,8 +81,9 @@ class LeducRules:
     @classmethod
     def get_lut_holder(cls):
         from PokerRL.game._.look_up_table import LutHolderLeduc
+        from PokerRL.game._.shared_tables import get_lut_holder
 
-        return LutHolderLeduc(cls)
+        return get_lut_holder(LutHolderLeduc, cls)
 
 
 class Leduc5Rules(LeducRules):
@@ -220,8 +221,9 @@ class BigLeducRules:
     @classmethod
     def get_lut_holder(cls):
         from PokerRL.game._.look_up_table import LutHolderLeduc
+        from PokerRL.game._.shared_tables import get_lut_holder
 
-        return LutHolderLeduc(cls)
+        return get_lut_holder(LutHolderLeduc, cls)
 
 
 class HoldemRules:
@@ -302,8 +304,9 @@ class HoldemRules:
     @classmethod
     def get_lut_holder(cls):
         from PokerRL.game._.look_up_table import LutHolderHoldem
+        from PokerRL.game._.shared_tables import get_lut_holder
 
-        return LutHolderHoldem(cls)
+        return get_lut_holder(LutHolderHoldem, cls)
 
 
 class FlopHoldemRules:
@@ -384,5 +387,6 @@ class FlopHoldemRules:
     @classmethod
     def get_lut_holder(cls):
         from PokerRL.game._.look_up_table import LutHolderHoldem
+        from PokerRL.game._.shared_tables import get_lut_holder
 
-        return LutHolderHoldem(cls)
+        return get_lut_holder(LutHolderHoldem, cls)
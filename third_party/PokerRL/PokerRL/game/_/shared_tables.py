@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+# process-wide registry, inherited by forked workers
+_ARRAYS = {}
+_LUT_HOLDERS = {}
+LUT_CACHE_DIR = None
+
+
+def set_lut_cache_dir(cache_dir):
+    """
+    With a cache dir, the array LUTs of the LutHolders are saved there when built for the first time and
+    memory-mapped read-only afterwards, so all processes on a host share one copy in the page cache.
+    """
+    global LUT_CACHE_DIR
+    LUT_CACHE_DIR = None if cache_dir is None else str(cache_dir)
+
+
+def get_array(path):
+    """
+    Returns a read-only memory-mapped view of the .npy file at path, loaded once per process.
+    """
+    path = str(path)
+    if path not in _ARRAYS:
+        _ARRAYS[path] = np.load(path, mmap_mode="r")
+    return _ARRAYS[path]
+
+
+def get_lut_holder(holder_cls, env_cls):
+    """
+    Returns the LutHolder of the rules of env_cls, built once per process. LutHolders only hold read-only tables and
+    can be shared by all envs, env builders and value fillers of the same game.
+    """
+    key = (holder_cls, env_cls.RULES)
+    if key not in _LUT_HOLDERS:
+        cache_dir = None
+        if LUT_CACHE_DIR is not None:
+            cache_dir = os.path.join(
+                LUT_CACHE_DIR,
+                "{}_{}".format(holder_cls.__name__, env_cls.RULES.__name__),
+            )
+        _LUT_HOLDERS[key] = holder_cls(env_cls, cache_dir=cache_dir)
+    return _LUT_HOLDERS[key]
+
+
+def load_or_build(cache_dir, name, build_fn):
+    """
+    Memory-maps the array name from cache_dir, or builds it with build_fn and saves it there first.
+    """
+    if cache_dir is None:
+        return build_fn()
+    path = os.path.join(cache_dir, name + ".npy")
+    if not os.path.isfile(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        # rename is atomic, concurrent workers never read a partially written file
+        tmp_path = "{}.{}.tmp.npy".format(path[: -len(".npy")], os.getpid())
+        np.save(tmp_path, build_fn())
+        os.replace(tmp_path, path)
+    return get_array(path)
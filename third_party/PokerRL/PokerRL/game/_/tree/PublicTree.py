@@ -6,6 +6,8 @@ import json
 import os
 
 import numpy as np
+from PokerRL.game._.tree._ import tree_arrays
+from PokerRL.game._.tree._.leaf_evaluators import get_leaf_evaluator
 from PokerRL.game._.tree._.nodes import ChanceNode, PlayerActionNode
 from PokerRL.game._.tree._.StrategyFiller import StrategyFiller, StrategyFillerHUNL
 from PokerRL.game._.tree._.ValueFiller import ValueFiller, ValueFillerHUNL
@@ -27,6 +29,9 @@ class PublicTree:
 
     CHANCE_ID = "Ch"
 
+    # if set, built trees are saved under this folder and loaded from it instead of being rebuilt
+    CACHE_DIR = None
+
     def __init__(
         self,
         env_bldr,
@@ -34,10 +39,15 @@ class PublicTree:
         stop_at_street,
         put_out_new_round_after_limit=False,
         is_debugging=False,
+        leaf_evaluator=None,
     ):
         """
         To start the tree from a given scenario, set ""env"" to that scenario and it will be treated
         as the root.
+
+        With a leaf_evaluator (see get_leaf_evaluator), the tree is depth-limited: the betting of the streets before
+        stop_at_street is expanded and the node that closes the betting of the last of these streets becomes a leaf
+        whose counterfactual values are given by the evaluator.
         """
         self._env_bldr = env_bldr
         self._is_debugging = is_debugging
@@ -81,6 +91,7 @@ class PublicTree:
             else stop_at_street
         )
         self._put_out_new_round_after_limit = put_out_new_round_after_limit
+        self._leaf_evaluator = get_leaf_evaluator(leaf_evaluator)
 
         self._value_filler = ValueFiller(tree=self)
         self._strategy_filler = StrategyFiller(tree=self, env_bldr=env_bldr)
@@ -118,9 +129,18 @@ class PublicTree:
     def env_bldr(self):
         return self._env_bldr
 
+    @property
+    def leaf_evaluator(self):
+        return self._leaf_evaluator
+
+    @classmethod
+    def set_cache_dir(cls, cache_dir):
+        cls.CACHE_DIR = None if cache_dir is None else str(cache_dir)
+
     def build_tree(self):
         """
-        Builds from the current state of the environment
+        Builds from the current state of the environment. With a CACHE_DIR, a tree built once for the same game,
+        betting abstraction and public root state is memory-mapped from disk instead of replaying the environment.
         """
         if hasattr(self._env, "root_env_state"):
             # print("load env state")
@@ -134,6 +154,25 @@ class PublicTree:
                 fill_value=1.0 / float(self._env_bldr.rules.RANGE_SIZE),
                 dtype=np.float32,
             )
+
+        cache_path = None
+        if self.CACHE_DIR is not None:
+            cache_path = os.path.join(
+                self.CACHE_DIR,
+                tree_arrays.tree_key(
+                    env=self._env,
+                    env_bldr=self._env_bldr,
+                    tree_cls_name=type(self).__name__,
+                    stop_at_street=self._stop_at_street,
+                    put_out_new_round_after_limit=self._put_out_new_round_after_limit,
+                    reach_probs=reach_probs,
+                    depth_limited=self._leaf_evaluator is not None,
+                ),
+            )
+            if tree_arrays.is_saved(cache_path):
+                self.load(cache_path)
+                return
+
         self.root = ChanceNode(
             env_state=self._env.state_dict(),
             tree=self,
@@ -146,8 +185,77 @@ class PublicTree:
         self.root.reach_probs = reach_probs
         self._build_tree(current_node=self.root)
 
-    def compute_ev(self):
-        self._value_filler.compute_cf_values_heads_up(self.root)
+        if cache_path is not None:
+            self.save(cache_path)
+
+    def to_arrays(self):
+        """
+        Topology, actions, pots, boards and players to act of all nodes as flat arrays. See tree_arrays.tree_to_arrays.
+        """
+        return tree_arrays.tree_to_arrays(self)
+
+    def load_arrays(self, arrays):
+        """
+        Replaces the tree by the nodes stored in arrays (see to_arrays) without replaying the environment. Strategies,
+        reach probabilities below the root and algorithm data have to be filled afterwards, as after build_tree.
+        """
+        self.root = tree_arrays.arrays_to_root(tree=self, arrays=arrays)
+        self._n_nodes = len(arrays["parent"]) - 1
+        self._n_nonterm = int(np.sum(~arrays["is_terminal"][1:]))
+
+    def save(self, path):
+        tree_arrays.save_arrays(
+            path,
+            self.to_arrays(),
+            meta={
+                "tree": type(self).__name__,
+                "env": self._env_bldr.env_cls.__name__,
+                "stack_size": [int(s) for s in np.ravel(self._stack_size)],
+                "n_nodes": self._n_nodes,
+                "n_nonterm": self._n_nonterm,
+            },
+        )
+
+    def load(self, path):
+        arrays, _ = tree_arrays.load_arrays(path, mmap_mode="r")
+        self.load_arrays(arrays)
+
+    def rebind_root(self, root_env_state, reach_probs):
+        """
+        Reuses the built tree for an endgame with the same betting structure (street, pot and stacks) but another
+        board and other root reach probabilities. Boards, decks and chance strategies are swapped in, the topology
+        and the betting state of all nodes are kept. Strategies have to be refilled afterwards.
+        """
+        assert (
+            root_env_state[EnvDictIdxs.current_round]
+            == self.root.env_state[EnvDictIdxs.current_round]
+        )
+        assert (
+            root_env_state[EnvDictIdxs.main_pot]
+            == self.root.env_state[EnvDictIdxs.main_pot]
+        )
+        self._rebind_board(
+            node=self.root,
+            board_2d=np.copy(root_env_state[EnvDictIdxs.board_2d]),
+            deck_remaining=np.copy(root_env_state[EnvDictIdxs.deck]["deck_remaining"]),
+        )
+        self.root.reach_probs = reach_probs
+        self._strategy_filler.reset_chance_node_strategy()
+
+    def compute_ev(self, post_fn=None):
+        self._value_filler.compute_cf_values_heads_up(self.root, post_fn=post_fn)
+
+    def sample_chance(self, n_samples=None, rng=None):
+        """
+        Public chance sampling: at every chance node reached, compute_ev only traverses n_samples children drawn
+        uniformly without replacement, and their reach probs are weighted by n_children / n_samples, so the values of
+        the chance nodes are unbiased estimates of the full-width values. With n_samples=None, all children are
+        traversed again. The children are drawn with rng, a np.random.RandomState, or the global generator if None.
+        Reach probs have to be updated afterwards.
+        """
+        self._sample_chance(
+            node=self.root, n_samples=n_samples, rng=np.random if rng is None else rng
+        )
 
     def fill_uniform_random(self):
         self._strategy_filler.fill_uniform_random()
@@ -155,8 +263,8 @@ class PublicTree:
     def fill_random_random(self):
         self._strategy_filler.fill_random_random()
 
-    def fill_with_agent_policy(self, agent):
-        self._strategy_filler.fill_with_agent_policy(agent=agent)
+    def fill_with_agent_policy(self, agent, batch_size=None):
+        self._strategy_filler.fill_with_agent_policy(agent=agent, batch_size=batch_size)
 
     def update_reach_probs(self):
         self._strategy_filler.update_reach_probs()
@@ -178,12 +286,65 @@ class PublicTree:
             stack_size=copy.deepcopy(self._stack_size),
             stop_at_street=self._stop_at_street,
             put_out_new_round_after_limit=self._put_out_new_round_after_limit,
+            leaf_evaluator=self._leaf_evaluator,
         )
         _tree.root = copy.deepcopy(self.root)
 
         return _tree
 
     # __________________________________________________ INTERNAL ______________________________________________________
+    def _rebind_board(self, node, board_2d, deck_remaining):
+        node.env_state[EnvDictIdxs.board_2d] = board_2d
+        node.env_state[EnvDictIdxs.deck] = {"deck_remaining": deck_remaining}
+        if getattr(node, "new_round_state", None) is not None:
+            node.new_round_state[EnvDictIdxs.board_2d] = board_2d
+            node.new_round_state[EnvDictIdxs.deck] = {"deck_remaining": deck_remaining}
+
+        if node.p_id_acting_next == self.CHANCE_ID and not node.is_terminal:
+            # children were built in ascending order of the 1d card dealt to the next free board slot
+            board_1d = self._env_bldr.lut_holder.get_1d_cards(cards_2d=board_2d)
+            idx = int(np.argmax(board_1d == Poker.CARD_NOT_DEALT_TOKEN_1D))
+            cards = [
+                c for c in range(self._env.N_CARDS_IN_DECK) if c not in board_1d
+            ]
+            assert len(cards) == len(node.children)
+            for child, card in zip(node.children, cards):
+                child_board_1d = np.copy(board_1d)
+                child_board_1d[idx] = card
+                card_2d = self._env_bldr.lut_holder.get_2d_cards(
+                    np.array([card], dtype=np.int8)
+                )
+                self._rebind_board(
+                    node=child,
+                    board_2d=self._env_bldr.lut_holder.get_2d_cards(child_board_1d),
+                    deck_remaining=deck_remaining[
+                        ~np.all(deck_remaining == card_2d, axis=1)
+                    ],
+                )
+        else:
+            for child in node.children:
+                self._rebind_board(
+                    node=child, board_2d=board_2d, deck_remaining=deck_remaining
+                )
+
+    def _sample_chance(self, node, n_samples, rng):
+        if node.is_terminal:
+            return
+        children = node.children
+        if node.p_id_acting_next == self.CHANCE_ID:
+            if n_samples is None or n_samples >= len(node.children):
+                node.sampled_children = None
+            else:
+                node.sampled_children = sorted(
+                    rng.choice(
+                        len(node.children), size=n_samples, replace=False
+                    ).tolist()
+                )
+                children = [node.children[c] for c in node.sampled_children]
+        # subtrees that are not sampled are resampled when they are reached again
+        for child in children:
+            self._sample_chance(node=child, n_samples=n_samples, rng=rng)
+
     def _build_tree(self, current_node):
         current_node.children = self._get_children_nodes(node=current_node)
         self._n_nodes += len(current_node.children)
@@ -289,9 +450,11 @@ class PublicTree:
 
         else:
             children = []
+            parent_snapshot = self._env.snapshot()
             for action in parent.allowed_actions:
-                self._env.load_state_dict(parent.env_state)
+                self._env.load_snapshot(parent_snapshot)
                 _, __, is_terminal, info = self._env.step(action)
+                is_leaf = False
 
                 # after action:  Terminal
                 if is_terminal:
@@ -309,6 +472,21 @@ class PublicTree:
                     is_terminal = True
                     new_round_state = None
 
+                # after action:  New round at the cutoff street of a depth-limited tree
+                elif (
+                    info["chance_acts"]
+                    and self._leaf_evaluator is not None
+                    and self._env.current_round >= self._stop_at_street
+                ):
+                    # state before round transition, as for other new rounds
+                    env_state = info["state_dict_before_money_move"]
+                    env_state[EnvDictIdxs.current_round] = parent.env_state[
+                        EnvDictIdxs.current_round
+                    ]
+                    is_terminal = True
+                    is_leaf = True
+                    new_round_state = None
+
                 # after action:  New round
                 elif info["chance_acts"]:
                     # state before round transition
@@ -359,6 +537,7 @@ class PublicTree:
                 if is_terminal:
                     node.p_id_acting_next = None
                     node.allowed_actions = []
+                    node.is_leaf = is_leaf
                 elif info["chance_acts"]:
                     node.p_id_acting_next = self.CHANCE_ID
                     node.allowed_actions = []
@@ -527,6 +706,7 @@ class PublicTreeHUNL(PublicTree):
         stop_at_street,
         put_out_new_round_after_limit=False,
         is_debugging=False,
+        leaf_evaluator=None,
     ):
         super().__init__(
             env_bldr,
@@ -534,6 +714,7 @@ class PublicTreeHUNL(PublicTree):
             stop_at_street,
             put_out_new_round_after_limit,
             is_debugging,
+            leaf_evaluator,
         )
         self._value_filler = ValueFillerHUNL(tree=self)
         self._strategy_filler = StrategyFillerHUNL(tree=self, env_bldr=self.env_bldr)
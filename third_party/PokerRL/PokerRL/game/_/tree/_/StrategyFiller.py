@@ -3,7 +3,6 @@
 import numpy as np
 from PokerRL.game._.tree._.nodes import ChanceNode, PlayerActionNode
 from PokerRL.game.PokerEnvStateDictEnums import EnvDictIdxs
-from PokerRL.game.PokerRange import PokerRange
 
 
 class StrategyFiller:
@@ -28,18 +27,41 @@ class StrategyFiller:
         self._fill_random_random(node=self._tree.root)
         self.update_reach_probs()
 
-    def fill_with_agent_policy(self, agent):
+    def fill_with_agent_policy(self, agent, batch_size=None):
+        """
+        With a batch_size (by default agent.PUBLIC_TREE_BATCH_SIZE), the observations of the decision nodes are
+        collected and the agent is queried for batch_size nodes at a time with get_a_probs_for_each_hand_batched,
+        instead of one get_a_probs_for_each_hand call per node.
+        """
         if not self._chance_filled:
             self._fill_chance_node_strategy(node=self._tree.root)
             self._chance_filled = True
 
-        self._fill_with_agent_policy(node=self._tree.root, agent=agent)
+        if batch_size is None:
+            batch_size = agent.PUBLIC_TREE_BATCH_SIZE
+        if batch_size is None:
+            self._fill_with_agent_policy(node=self._tree.root, agent=agent)
+        else:
+            self._fill_with_agent_policy_batched(agent=agent, batch_size=batch_size)
 
         self.update_reach_probs()
 
     def update_reach_probs(self):
         self._update_reach_probs(node=self._tree.root)
 
+    def reset_chance_node_strategy(self):
+        """
+        Clears all strategies so that the chance node strategies are refilled for new boards on the next fill.
+        """
+
+        def _reset(node):
+            node.strategy = None
+            for c in node.children:
+                _reset(c)
+
+        _reset(self._tree.root)
+        self._chance_filled = False
+
     def _fill_uniform_random(self, node):
         if (
             node is not self._tree.root
@@ -141,6 +163,43 @@ class StrategyFiller:
         for c in node.children:
             self._fill_with_agent_policy(node=c, agent=agent)
 
+    def _fill_with_agent_policy_batched(self, agent, batch_size):
+        nodes = []
+
+        def _collect(node):
+            if node.is_terminal:
+                return
+            if isinstance(node, ChanceNode) or (
+                isinstance(node, PlayerActionNode)
+                and node.p_id_acting_next != self._tree.CHANCE_ID
+            ):
+                nodes.append(node)
+            for c in node.children:
+                _collect(c)
+
+        _collect(self._tree.root)
+
+        for start in range(0, len(nodes), batch_size):
+            batch = nodes[start : start + batch_size]
+            pub_obses = []
+            for node in batch:
+                # fake steps the agent's internal env to the current state
+                agent.set_to_public_tree_node_state(node=node)
+
+                assert (
+                    node.p_id_acting_next
+                    == agent._internal_env_wrapper.env.current_player.seat_id
+                ), node.p_id_acting_next
+
+                pub_obses.append(agent.get_env_wrapper().get_current_obs())
+
+            agent_strats = agent.get_a_probs_for_each_hand_batched(
+                pub_obses=pub_obses,
+                legal_actions_lists=[node.allowed_actions for node in batch],
+            )
+            for node, agent_strat in zip(batch, agent_strats):
+                node.strategy = agent_strat[:, node.allowed_actions]
+
     def _update_reach_probs(self, node):
         if node is not self._tree.root:
             assert node.parent.strategy.shape == (
@@ -168,14 +227,25 @@ class StrategyFiller:
 
         # new round gets rolled out now
         elif node.p_id_acting_next == self._tree.CHANCE_ID:
-            for c in range(len(node.children)):
-                child = node.children[c]
-                child.reach_probs = node.reach_probs * node.strategy[:, c]
+            if node.sampled_children is None:
+                for c in range(len(node.children)):
+                    child = node.children[c]
+                    child.reach_probs = node.reach_probs * node.strategy[:, c]
+            else:
+                # importance weight of the sampled boards, keeps the values of the chance node unbiased
+                weight = np.float32(len(node.children) / len(node.sampled_children))
+                for c in node.sampled_children:
+                    child = node.children[c]
+                    child.reach_probs = node.reach_probs * node.strategy[:, c] * weight
 
         else:
             raise TypeError(node)
 
-        for c in node.children:
+        if node.sampled_children is None:
+            children = node.children
+        else:
+            children = [node.children[c] for c in node.sampled_children]
+        for c in children:
             self._update_reach_probs(node=c)
 
     def _fill_chance_node_strategy(self, node):
@@ -189,30 +259,28 @@ class StrategyFiller:
             n_children = len(node.children)
             # assert n_children == self._env_bldr.lut_holder.DICT_LUT_N_BOARDS[game_round]
 
-            # chance nodes are uniform random
-            node.strategy = np.zeros(
-                shape=(self._env_bldr.rules.RANGE_SIZE, n_children), dtype=np.float32
+            # chance nodes are uniform random, with strategy 0 for hands that are impossible on the new board
+            node.strategy = self._get_possible_range_masks(node=node).T * np.float32(
+                1.0 / (self._env_bldr.rules.N_CARDS_IN_DECK - 2)
             )
 
-            # set strategy for impossible hands to 0
-            for c_id in range(n_children):
-                mask = PokerRange.get_possible_range_idxs(
-                    rules=self._env_bldr.rules,
-                    lut_holder=self._env_bldr.lut_holder,
-                    board_2d=node.children[c_id].env_state[EnvDictIdxs.board_2d],
-                )
-
-                node.strategy[mask, c_id] = 1.0 / (
-                    self._env_bldr.rules.N_CARDS_IN_DECK - 2
-                )
-            # for i in range(1324):
-            #     if i not in mask:
-            #         print(i, end=" ")
-            # print()
-
         for c in node.children:
             self._fill_chance_node_strategy(node=c)
 
+    def _get_possible_range_masks(self, node):
+        """
+        Returns:
+            np.ndarray((n_children, RANGE_SIZE), np.float32): 1 for the hands that are possible on each child's board
+        """
+        lut_holder = self._env_bldr.lut_holder
+        boards_1d = np.array(
+            [
+                lut_holder.get_1d_cards(c.env_state[EnvDictIdxs.board_2d])
+                for c in node.children
+            ]
+        )
+        return lut_holder.get_possible_range_masks(boards_1d).astype(np.float32)
+
 
 class StrategyFillerHUNL(StrategyFiller):
     def _fill_chance_node_strategy(self, node):
@@ -226,26 +294,10 @@ class StrategyFillerHUNL(StrategyFiller):
             n_children = len(node.children)
             # assert n_children == self._env_bldr.lut_holder.DICT_LUT_N_BOARDS[game_round]
 
-            # chance nodes are uniform random
-            node.strategy = np.zeros(
-                shape=(self._env_bldr.rules.RANGE_SIZE, n_children), dtype=np.float32
+            # chance nodes are uniform random, with strategy 0 for hands that are impossible on the new board
+            node.strategy = self._get_possible_range_masks(node=node).T * np.float32(
+                1.0 / (self._env_bldr.rules.N_CARDS_IN_DECK - 2 * 2 - 4)
             )
 
-            # set strategy for impossible hands to 0
-            for c_id in range(n_children):
-                mask = PokerRange.get_possible_range_idxs(
-                    rules=self._env_bldr.rules,
-                    lut_holder=self._env_bldr.lut_holder,
-                    board_2d=node.children[c_id].env_state[EnvDictIdxs.board_2d],
-                )
-
-                node.strategy[mask, c_id] = 1.0 / (
-                    self._env_bldr.rules.N_CARDS_IN_DECK - 2 * 2 - 4
-                )
-            # for i in range(1324):
-            #     if i not in mask:
-            #         print(i, end=" ")
-            # print()
-
         for c in node.children:
             self._fill_chance_node_strategy(node=c)
@@ -5,6 +5,7 @@ import pickle
 from pathlib import Path
 
 import numpy as np
+from PokerRL.game._.shared_tables import get_array
 from PokerRL.game._.tree._.card_to_string_conversion import card_to_string
 from PokerRL.game._.tree._.nodes import PlayerActionNode
 from PokerRL.game.Poker import Poker
@@ -25,10 +26,11 @@ class ValueFiller:
             self._env_bldr.rules.N_CARDS_IN_DECK - 1
         )
 
-    def compute_cf_values_heads_up(self, node):
+    def compute_cf_values_heads_up(self, node, post_fn=None):
         """
         The functionality is extremely simplified compared to n-agent evaluations and made for HU Leduc only!
         Furthermore, this BR implementation is *VERY* inefficient and not suitable for anything much bigger than Leduc.
+        If given, post_fn(node) is called on every node as soon as its values are computed (children first).
         """
         assert self._tree.n_seats == 2
 
@@ -45,32 +47,23 @@ class ValueFiller:
             equity: -1*reach=always lose. 1*reach=always win. 0=50%/50%
             """
             assert isinstance(node, PlayerActionNode)
+            # Cutoff of a depth-limited tree
+            if node.is_leaf:
+                node.ev = self._tree.leaf_evaluator(node=node, value_filler=self)
+
             # Fold
-            if node.action == Poker.FOLD:
+            elif node.action == Poker.FOLD:
                 if node.env_state[EnvDictIdxs.current_round] == Poker.FLOP:
                     equity = self._get_fold_eq_final_street(node=node)
                 else:
                     equity = self._get_fold_eq_preflop(node=node)
+                self._set_board_cards_to_zero(equity=equity, node=node)
+                node.ev = equity * node.env_state[EnvDictIdxs.main_pot] / 2
 
             # Check / Call
             else:
-                if node.env_state[EnvDictIdxs.current_round] == Poker.FLOP:
-                    equity = self._get_call_eq_final_street(
-                        reach_probs=node.reach_probs,
-                        board_2d=node.env_state[EnvDictIdxs.board_2d],
-                    )
+                node.ev = self.get_showdown_values(node=node)
 
-                else:  # preflop
-                    equity = self._get_call_eq_preflop(node=node)
-
-            # set boardcards to 0
-            for c in self._env_bldr.lut_holder.get_1d_cards(
-                node.env_state[EnvDictIdxs.board_2d]
-            ):
-                if c != Poker.CARD_NOT_DEALT_TOKEN_1D:
-                    equity[:, c] = 0.0
-
-            node.ev = equity * node.env_state[EnvDictIdxs.main_pot] / 2
             node.ev_br = np.copy(node.ev)
         else:
             N_ACTIONS = len(node.children)
@@ -83,8 +76,15 @@ class ValueFiller:
                 dtype=np.float32,
             )
 
-            for i, child in enumerate(node.children):
-                self.compute_cf_values_heads_up(node=child)
+            # children that are not sampled keep zero values, see PublicTree.sample_chance
+            child_idxs = (
+                range(N_ACTIONS)
+                if node.sampled_children is None
+                else node.sampled_children
+            )
+            for i in child_idxs:
+                child = node.children[i]
+                self.compute_cf_values_heads_up(node=child, post_fn=post_fn)
                 ev_all_actions[i] = child.ev
                 ev_br_all_actions[i] = child.ev_br
 
@@ -126,6 +126,33 @@ class ValueFiller:
 
         node.epsilon = node.ev_br_weighted - node.ev_weighted
         node.exploitability = np.sum(node.epsilon, axis=1)
+        if post_fn is not None:
+            post_fn(node)
+
+    def get_showdown_values(self, node):
+        """
+        Counterfactual values of going to showdown from node without further betting.
+        """
+        if node.env_state[EnvDictIdxs.current_round] == Poker.FLOP:
+            equity = self._get_call_eq_final_street(
+                reach_probs=node.reach_probs,
+                board_2d=node.env_state[EnvDictIdxs.board_2d],
+            )
+
+        else:  # preflop
+            equity = self._get_call_eq_preflop(node=node)
+
+        self._set_board_cards_to_zero(equity=equity, node=node)
+        return equity * node.env_state[EnvDictIdxs.main_pot] / 2
+
+    def _set_board_cards_to_zero(self, equity, node):
+        lut_holder = self._env_bldr.lut_holder
+        equity[
+            :,
+            lut_holder.get_blocked_range_mask(
+                lut_holder.get_1d_cards(node.env_state[EnvDictIdxs.board_2d])
+            ),
+        ] = 0.0
 
     def _get_fold_eq_preflop(self, node):
         equity = np.zeros(
@@ -231,8 +258,9 @@ class ValueFillerHUNL(ValueFiller):
         )
         # self._block_matrix = self._create_block_matrix()
         self.root_path = Path(__file__).parent.parent.parent.parent.parent.parent
-        self._block_matrix = np.load(self.root_path / "block_matrix.npy")
-        self._texas_lookup = np.load(self.root_path / "texas_lookup.npy")
+        # read-only views shared by all value fillers of the process
+        self._block_matrix = get_array(self.root_path / "block_matrix.npy")
+        self._texas_lookup = get_array(self.root_path / "texas_lookup.npy")
         self.load_matrix_dict()
 
     def evaluate(self, hands, mask=None):
@@ -363,21 +391,9 @@ class ValueFillerHUNL(ValueFiller):
         matrix[:, :] *= self._block_matrix
 
     def _get_possible_hands_mask(self, board_1d):
-        out = np.zeros([1326], dtype=np.float32)
-        used = np.zeros([52], dtype=bool)
-        for card in board_1d:
-            if card != -127:
-                used[card] = 1
-        for card1 in range(52):
-            if not used[card1]:
-                for card2 in range(card1 + 1, 52):
-                    if not used[card2]:
-                        card1_str = self._env.id_1d_to_str_dict[card1]
-                        card2_str = self._env.id_1d_to_str_dict[card2]
-                        hand_str = card1_str + card2_str
-                        hand_index = self._env.str_to_hand_id_dict[hand_str]
-                        out[hand_index] = 1
-        return out
+        return self._env_bldr.lut_holder.get_possible_range_mask(board_1d).astype(
+            np.float32
+        )
 
     def _set_last_round_equity_matrix(self, equity_matrix, board_2d):
         """Constructs the matrix that turns player ranges into showdown equity.
@@ -429,10 +445,11 @@ class ValueFillerHUNL(ValueFiller):
         # self.test_handranks(handranks, board_2d)
         return handranks
 
-    def compute_cf_values_heads_up(self, node):
+    def compute_cf_values_heads_up(self, node, post_fn=None):
         """
         The functionality is extremely simplified compared to n-agent evaluations and made for HU Leduc only!
         Furthermore, this BR implementation is *VERY* inefficient and not suitable for anything much bigger than Leduc.
+        If given, post_fn(node) is called on every node as soon as its values are computed (children first).
         """
         self.set_board(node)
         assert self._tree.n_seats == 2
@@ -450,18 +467,19 @@ class ValueFillerHUNL(ValueFiller):
             equity: -1*reach=always lose. 1*reach=always win. 0=50%/50%
             """
             assert isinstance(node, PlayerActionNode)
+            # Cutoff of a depth-limited tree
+            if node.is_leaf:
+                node.ev = self._tree.leaf_evaluator(node=node, value_filler=self)
+
             # Fold
-            if node.action == Poker.FOLD:
+            elif node.action == Poker.FOLD:
                 equity = self._get_fold_eq(reach_probs=node.reach_probs, node=node)
+                node.ev = equity * node.env_state[EnvDictIdxs.main_pot] / 2
 
             # Check / Call
             else:
-                equity = self._get_call_eq(
-                    reach_probs=node.reach_probs,
-                    board_2d=node.env_state[EnvDictIdxs.board_2d],
-                )
+                node.ev = self.get_showdown_values(node=node)
 
-            node.ev = equity * node.env_state[EnvDictIdxs.main_pot] / 2
             node.ev_br = np.copy(node.ev)
         else:
             N_ACTIONS = len(node.children)
@@ -474,8 +492,15 @@ class ValueFillerHUNL(ValueFiller):
                 dtype=np.float32,
             )
 
-            for i, child in enumerate(node.children):
-                self.compute_cf_values_heads_up(node=child)
+            # children that are not sampled keep zero values, see PublicTree.sample_chance
+            child_idxs = (
+                range(N_ACTIONS)
+                if node.sampled_children is None
+                else node.sampled_children
+            )
+            for i in child_idxs:
+                child = node.children[i]
+                self.compute_cf_values_heads_up(node=child, post_fn=post_fn)
                 ev_all_actions[i] = child.ev
                 ev_br_all_actions[i] = child.ev_br
 
@@ -516,6 +541,20 @@ class ValueFillerHUNL(ValueFiller):
 
         node.epsilon = node.ev_br_weighted - node.ev_weighted
         node.exploitability = np.sum(node.epsilon, axis=1)
+        if post_fn is not None:
+            post_fn(node)
+
+    def get_showdown_values(self, node):
+        """
+        Counterfactual values of going to showdown from node without further betting. Before the river, the equity
+        matrix set by set_board averages over all remaining river cards.
+        """
+        self.set_board(node)
+        equity = self._get_call_eq(
+            reach_probs=node.reach_probs,
+            board_2d=node.env_state[EnvDictIdxs.board_2d],
+        )
+        return equity * node.env_state[EnvDictIdxs.main_pot] / 2
 
     def _get_fold_eq(self, reach_probs, node):
         equity = np.zeros([2, 1326], dtype=np.float32)
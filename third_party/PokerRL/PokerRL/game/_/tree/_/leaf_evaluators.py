@@ -0,0 +1,100 @@
+import numpy as np
+from PokerRL.game.Poker import Poker
+from PokerRL.game.PokerEnvStateDictEnums import EnvDictIdxs
+
+
+class LeafEvaluator:
+    """
+    Gives counterfactual values to the leaves of a depth-limited PublicTree, i.e. the nodes where the betting of the
+    last street before the cutoff street is closed. Leaves are terminal for the fillers and the CFR classes.
+    """
+
+    def __call__(self, node, value_filler):
+        """
+        Returns:
+            np.arr((n_seats, range_size), np.float32): counterfactual value of every hand of every player, given the
+                                                       opponent's reach probabilities in node.reach_probs
+        """
+        raise NotImplementedError
+
+
+class EquityLeafEvaluator(LeafEvaluator):
+    """
+    Rolls the leaf out to showdown without further betting, i.e. the pot is split by the equity over all remaining
+    boards. The equity matrices are cached per board by the value filler.
+    """
+
+    def __call__(self, node, value_filler):
+        return value_filler.get_showdown_values(node=node)
+
+
+class ValueTableLeafEvaluator(LeafEvaluator):
+    """
+    Looks the leaf up in a precomputed table. The table maps the sorted 1d board cards (without undealt cards) to a
+    matrix of shape (range_size, range_size) holding the pot share (-1 to 1) the row hand wins against the column
+    hand, or to one such matrix per seat.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Loads a table saved as an npz file with the arrays "boards" (n_boards, n_board_cards) and
+        "values" (n_boards, range_size, range_size) or (n_boards, n_seats, range_size, range_size).
+        """
+        data = np.load(path)
+        return cls(
+            {
+                board_key(board): values
+                for board, values in zip(data["boards"], data["values"])
+            }
+        )
+
+    def __call__(self, node, value_filler):
+        board_1d = value_filler._env_bldr.lut_holder.get_1d_cards(
+            node.env_state[EnvDictIdxs.board_2d]
+        )
+        values = self.table[board_key(board_1d)]
+        n_seats = node.reach_probs.shape[0]
+        ev = np.zeros(shape=node.reach_probs.shape, dtype=np.float32)
+        for p in range(n_seats):
+            matrix = values if values.ndim == 2 else values[p]
+            ev[p] = np.matmul(matrix, node.reach_probs[1 - p])
+        return ev * node.env_state[EnvDictIdxs.main_pot] / 2
+
+
+class CallableLeafEvaluator(LeafEvaluator):
+    """
+    Wraps a function fn(node) returning the counterfactual values of a leaf, see LeafEvaluator.
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __call__(self, node, value_filler):
+        return np.asarray(self.fn(node), dtype=np.float32)
+
+
+def board_key(board_1d):
+    return tuple(
+        sorted(int(c) for c in board_1d if c != Poker.CARD_NOT_DEALT_TOKEN_1D)
+    )
+
+
+def get_leaf_evaluator(leaf_evaluator, value_table=None):
+    """
+    Args:
+        leaf_evaluator:     None, a LeafEvaluator, a function fn(node) or one of the names "equity" and "table"
+        value_table (str):  npz file of the "table" evaluator
+    """
+    if leaf_evaluator is None or isinstance(leaf_evaluator, LeafEvaluator):
+        return leaf_evaluator
+    if callable(leaf_evaluator):
+        return CallableLeafEvaluator(leaf_evaluator)
+    if leaf_evaluator == "table":
+        return ValueTableLeafEvaluator.from_file(value_table)
+    if leaf_evaluator == "equity":
+        return EquityLeafEvaluator()
+    raise ValueError("Unknown leaf evaluator {}".format(leaf_evaluator))
@@ -20,12 +20,16 @@ class NodeBase:
         self.p_id_acted_last = p_id_acted_last
 
         self.is_terminal = is_terminal
+        # terminal node at the cutoff street of a depth-limited tree, valued by the tree's leaf evaluator
+        self.is_leaf = False
         self.depth = depth
         self.tree = tree
 
         # built in recursion
         self.allowed_actions = []
         self.children = []
+        # indices of the children of a chance node traversed under public chance sampling, None for all of them
+        self.sampled_children = None
 
         self.strategy = None  # p_id_acting_next' strategy: np.arr((range_size, n_actions), np.float32)
         self.reach_probs = None  # reach probs of all players: np.arr((n_seats, range_size), np.float32)
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+from PokerRL.game._.tree._.nodes import ChanceNode, PlayerActionNode
+from PokerRL.game.PokerEnvStateDictEnums import EnvDictIdxs, PlayerDictIdxs
+
+# encoding of p_id_acting_next / p_id_acted_last
+NO_PLAYER = -1
+CHANCE_PLAYER = -2
+
+ARRAY_NAMES = [
+    "parent",
+    "child_ptr",
+    "children",
+    "depth",
+    "is_chance",
+    "is_terminal",
+    "is_leaf",
+    "p_id_acting_next",
+    "p_id_acted_last",
+    "current_player",
+    "action",
+    "allowed_ptr",
+    "allowed_actions",
+    "current_round",
+    "main_pot",
+    "side_pots",
+    "board_2d",
+    "stack",
+    "current_bet",
+    "is_allin",
+    "folded",
+    "root_reach_probs",
+]
+
+
+def _encode_player(p_id, chance_id):
+    if p_id is None:
+        return NO_PLAYER
+    if p_id == chance_id:
+        return CHANCE_PLAYER
+    return p_id
+
+
+def _decode_player(p_id, chance_id):
+    if p_id == NO_PLAYER:
+        return None
+    if p_id == CHANCE_PLAYER:
+        return chance_id
+    return int(p_id)
+
+
+def tree_to_arrays(tree):
+    """
+    Flattens the topology and the public state of every node of a built tree into numpy arrays. Nodes are numbered in
+    depth-first pre-order, so the root has index 0 and children are listed in the order of node.children.
+    """
+    nodes = []
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        node._flat_idx = len(nodes)
+        nodes.append(node)
+        stack.extend(reversed(node.children))
+
+    n = len(nodes)
+    n_seats = tree.n_seats
+    n_board = tree.root.env_state[EnvDictIdxs.board_2d].shape[0]
+    arrays = {
+        "parent": np.full(n, -1, dtype=np.int32),
+        "child_ptr": np.zeros(n + 1, dtype=np.int64),
+        "depth": np.zeros(n, dtype=np.int16),
+        "is_chance": np.zeros(n, dtype=np.bool_),
+        "is_terminal": np.zeros(n, dtype=np.bool_),
+        "is_leaf": np.zeros(n, dtype=np.bool_),
+        "p_id_acting_next": np.zeros(n, dtype=np.int8),
+        "p_id_acted_last": np.zeros(n, dtype=np.int8),
+        "current_player": np.zeros(n, dtype=np.int8),
+        "action": np.full(n, -1, dtype=np.int16),
+        "allowed_ptr": np.zeros(n + 1, dtype=np.int64),
+        "current_round": np.zeros(n, dtype=np.int8),
+        "main_pot": np.zeros(n, dtype=np.int64),
+        "side_pots": np.zeros((n, n_seats), dtype=np.int64),
+        "board_2d": np.zeros((n, n_board, 2), dtype=np.int8),
+        "stack": np.zeros((n, n_seats), dtype=np.int64),
+        "current_bet": np.zeros((n, n_seats), dtype=np.int64),
+        "is_allin": np.zeros((n, n_seats), dtype=np.bool_),
+        "folded": np.zeros((n, n_seats), dtype=np.bool_),
+        "root_reach_probs": np.asarray(tree.root.reach_probs, dtype=np.float32),
+    }
+    children, allowed_actions = [], []
+    for i, node in enumerate(nodes):
+        state = node.env_state
+        if node.parent is not None:
+            arrays["parent"][i] = node.parent._flat_idx
+        children.extend(c._flat_idx for c in node.children)
+        arrays["child_ptr"][i + 1] = len(children)
+        allowed_actions.extend(node.allowed_actions)
+        arrays["allowed_ptr"][i + 1] = len(allowed_actions)
+        arrays["depth"][i] = node.depth
+        arrays["is_chance"][i] = isinstance(node, ChanceNode)
+        arrays["is_terminal"][i] = node.is_terminal
+        arrays["is_leaf"][i] = node.is_leaf
+        arrays["p_id_acting_next"][i] = _encode_player(
+            node.p_id_acting_next, tree.CHANCE_ID
+        )
+        arrays["p_id_acted_last"][i] = _encode_player(
+            node.p_id_acted_last, tree.CHANCE_ID
+        )
+        arrays["current_player"][i] = state[EnvDictIdxs.current_player]
+        if not isinstance(node, ChanceNode):
+            arrays["action"][i] = node.action
+        arrays["current_round"][i] = state[EnvDictIdxs.current_round]
+        arrays["main_pot"][i] = state[EnvDictIdxs.main_pot]
+        arrays["side_pots"][i] = state[EnvDictIdxs.side_pots]
+        arrays["board_2d"][i] = state[EnvDictIdxs.board_2d]
+        for s, seat in enumerate(state[EnvDictIdxs.seats]):
+            arrays["stack"][i, s] = seat[PlayerDictIdxs.stack]
+            arrays["current_bet"][i, s] = seat[PlayerDictIdxs.current_bet]
+            arrays["is_allin"][i, s] = seat[PlayerDictIdxs.is_allin]
+            arrays["folded"][i, s] = seat[PlayerDictIdxs.folded_this_episode]
+    arrays["children"] = np.array(children, dtype=np.int32)
+    arrays["allowed_actions"] = np.array(allowed_actions, dtype=np.int16)
+
+    for node in nodes:
+        del node._flat_idx
+    return arrays
+
+
+def arrays_to_root(tree, arrays):
+    """
+    Recreates the nodes of a tree from the output of tree_to_arrays without replaying the environment.
+    The env_state of the nodes only holds the public information used by the fillers and the CFR classes
+    (round, pots, board, current player and per-seat stacks, bets, all-in and folded flags). They can not be loaded
+    into a PokerEnv.
+    """
+    parent = arrays["parent"]
+    child_ptr = arrays["child_ptr"]
+    allowed_ptr = arrays["allowed_ptr"]
+    is_chance = arrays["is_chance"]
+    n_seats = arrays["stack"].shape[1]
+
+    nodes = [None] * len(parent)
+    for i in range(len(parent)):
+        env_state = {
+            EnvDictIdxs.current_round: int(arrays["current_round"][i]),
+            EnvDictIdxs.main_pot: int(arrays["main_pot"][i]),
+            EnvDictIdxs.side_pots: arrays["side_pots"][i].tolist(),
+            EnvDictIdxs.board_2d: arrays["board_2d"][i],
+            EnvDictIdxs.current_player: int(arrays["current_player"][i]),
+            EnvDictIdxs.seats: [
+                {
+                    PlayerDictIdxs.seat_id: s,
+                    PlayerDictIdxs.stack: int(arrays["stack"][i, s]),
+                    PlayerDictIdxs.current_bet: int(arrays["current_bet"][i, s]),
+                    PlayerDictIdxs.is_allin: bool(arrays["is_allin"][i, s]),
+                    PlayerDictIdxs.folded_this_episode: bool(
+                        arrays["folded"][i, s]
+                    ),
+                }
+                for s in range(n_seats)
+            ],
+        }
+        node_parent = None if parent[i] < 0 else nodes[parent[i]]
+        p_id_acted_last = _decode_player(
+            arrays["p_id_acted_last"][i], tree.CHANCE_ID
+        )
+        if is_chance[i]:
+            node = ChanceNode(
+                env_state=env_state,
+                tree=tree,
+                parent=node_parent,
+                p_id_acted_last=p_id_acted_last,
+                is_terminal=bool(arrays["is_terminal"][i]),
+                depth=int(arrays["depth"][i]),
+            )
+        else:
+            node = PlayerActionNode(
+                env_state=env_state,
+                tree=tree,
+                parent=node_parent,
+                is_terminal=bool(arrays["is_terminal"][i]),
+                p_id_acted_last=p_id_acted_last,
+                action=int(arrays["action"][i]),
+                depth=int(arrays["depth"][i]),
+            )
+        node.p_id_acting_next = _decode_player(
+            arrays["p_id_acting_next"][i], tree.CHANCE_ID
+        )
+        node.is_leaf = bool(arrays["is_leaf"][i])
+        node.allowed_actions = arrays["allowed_actions"][
+            allowed_ptr[i] : allowed_ptr[i + 1]
+        ].tolist()
+        nodes[i] = node
+
+    children = arrays["children"]
+    for i, node in enumerate(nodes):
+        node.children = [nodes[c] for c in children[child_ptr[i] : child_ptr[i + 1]]]
+
+    root = nodes[0]
+    root.reach_probs = np.array(arrays["root_reach_probs"], dtype=np.float32)
+    return root
+
+
+def save_arrays(path, arrays, meta):
+    os.makedirs(path, exist_ok=True)
+    for name in ARRAY_NAMES:
+        np.save(os.path.join(path, name + ".npy"), arrays[name])
+    # written last, a folder without meta.json is an interrupted save
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def load_arrays(path, mmap_mode="r"):
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        meta = json.load(f)
+    arrays = {
+        name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+        for name in ARRAY_NAMES
+    }
+    return arrays, meta
+
+
+def is_saved(path):
+    return os.path.isfile(os.path.join(path, "meta.json"))
+
+
+def tree_key(
+    env,
+    env_bldr,
+    tree_cls_name,
+    stop_at_street,
+    put_out_new_round_after_limit,
+    reach_probs,
+    depth_limited=False,
+):
+    """
+    Hash of everything the topology of a tree built from the current state of env depends on: the game, its betting
+    abstraction, the public root state and the root reach probabilities. Private cards and the order of the deck are
+    not part of it.
+    """
+    state = env.state_dict()
+    args = env.get_args()
+    description = {
+        "tree": tree_cls_name,
+        "env": env_bldr.env_cls.__name__,
+        "stop_at_street": stop_at_street,
+        "put_out_new_round_after_limit": put_out_new_round_after_limit,
+        "depth_limited": depth_limited,
+        "args": {k: v for k, v in sorted(vars(args).items()) if _is_plain(v)},
+        "state": {
+            k: state[k]
+            for k in [
+                EnvDictIdxs.current_round,
+                EnvDictIdxs.side_pots,
+                EnvDictIdxs.main_pot,
+                EnvDictIdxs.board_2d,
+                EnvDictIdxs.last_action,
+                EnvDictIdxs.capped_raise,
+                EnvDictIdxs.current_player,
+                EnvDictIdxs.last_raiser,
+                EnvDictIdxs.n_actions_this_episode,
+                EnvDictIdxs.n_raises_this_round,
+            ]
+        },
+        "seats": [
+            {
+                k: v
+                for k, v in seat.items()
+                if k not in [PlayerDictIdxs.hand, PlayerDictIdxs.hand_rank]
+            }
+            for seat in state[EnvDictIdxs.seats]
+        ],
+    }
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(description, sort_keys=True, default=_to_plain).encode())
+    digest.update(np.ascontiguousarray(reach_probs, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def _is_plain(v):
+    return isinstance(v, (int, float, str, bool, list, tuple, type(None)))
+
+
+def _to_plain(v):
+    if isinstance(v, np.ndarray):
+        return v.tolist()
+    if isinstance(v, np.generic):
+        return v.item()
+    return str(v)
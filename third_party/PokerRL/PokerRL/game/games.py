@@ -290,13 +290,18 @@ class Flop5Holdem(FlopHoldemRules, LimitPokerEnv):
 from pathlib import Path
 
 
-def read_subgame_file(subgame_id):
-    file = (
+def get_subgame_file(subgame_id):
+    return (
         Path(__file__).parent.parent.parent
         / "LibratusEndgames"
         / "subgame{}.txt".format(subgame_id)
     )
-    with file.open("r") as f:
+
+
+def read_subgame_file(subgame_id=None, file=None):
+    if file is None:
+        file = get_subgame_file(subgame_id)
+    with Path(file).open("r") as f:
         for line in f.readlines():
             if "round" in line:
                 round = int(line.strip().split(" ")[1])
@@ -314,6 +319,7 @@ def read_subgame_file(subgame_id):
 class DiscretizedNLHoldemSubGame(DiscretizedNLHoldem):
     CURRENT_ROUND = NotImplemented
     SUBGAME_ID = NotImplemented
+    SUBGAME_FILE = None
 
     def __init__(self, env_args, lut_holder, is_evaluating):
         super().__init__(env_args, lut_holder, is_evaluating)
@@ -386,7 +392,9 @@ class DiscretizedNLHoldemSubGame(DiscretizedNLHoldem):
         return pokerRL_reach
 
     def create_root_env_state(self):
-        round, board, pot, reach1, reach2 = read_subgame_file(self.SUBGAME_ID)
+        round, board, pot, reach1, reach2 = read_subgame_file(
+            self.SUBGAME_ID, self.SUBGAME_FILE
+        )
         deck = DeckOfCards(num_suits=4, num_ranks=13)
         board = np.array(
             [self.str_to_id_dict[card_str] for card_str in board]
@@ -452,6 +460,21 @@ class DiscretizedNLHoldemSubGame3(DiscretizedNLHoldemSubGame):
     SUBGAME_ID = 3
 
 
+class DiscretizedNLHoldemSubGameFile(DiscretizedNLHoldemSubGame):
+    """
+    Endgame read from an arbitrary file in the LibratusEndgames format. The file is a
+    class attribute because envs are created from the class by the env builders, so
+    every env created after ``set_subgame_file`` starts from the new endgame.
+    """
+
+    @classmethod
+    def set_subgame_file(cls, file):
+        libratus_round = read_subgame_file(file=file)[0]
+        cls.SUBGAME_FILE = file
+        # Libratus counts rounds from 1
+        cls.CURRENT_ROUND = libratus_round - 1
+
+
 
 """
 register all new envs here!
@@ -468,4 +491,5 @@ ALL_ENVS = [
     Flop5Holdem,
     DiscretizedNLHoldemSubGame4,
     DiscretizedNLHoldemSubGame3,
+    DiscretizedNLHoldemSubGameFile,
 ]
@@ -15,6 +15,10 @@ class EvalAgentBase:
 
     ALL_MODES = NotImplementedError  # Override with list of all modes
 
+    # Max. number of public states per get_a_probs_for_each_hand_batched call when a PublicTree is filled with the
+    # agent's strategy. Set it if the agent implements that method; if None, the tree is filled one node at a time.
+    PUBLIC_TREE_BATCH_SIZE = None
+
     def __init__(self, t_prof, mode=None, device=None):
         """
         Args:
@@ -48,6 +52,21 @@ class EvalAgentBase:
         """
         raise NotImplementedError
 
+    def get_a_probs_for_each_hand_batched(self, pub_obses, legal_actions_lists):
+        """
+        Batched get_a_probs_for_each_hand for many public states, to be computed in one forward pass over all hands of
+        all states. Does not use or change the state of the internal env wrapper.
+
+        Args:
+            pub_obses (list):               the observation of the internal env wrapper in each state (as returned by
+                                            its get_current_obs)
+            legal_actions_lists (list):     the legal actions in each state
+
+        Returns:
+            np.ndarray(n_states, RANGE_SIZE, N_ACTIONS): the action probabilities for each hand in each state
+        """
+        raise NotImplementedError
+
     def get_a_probs(self):
         """
         Returns:
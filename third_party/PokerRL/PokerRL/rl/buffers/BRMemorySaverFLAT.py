@@ -7,11 +7,16 @@ from PokerRL.rl.buffers._circular_base import BRMemorySaverBase
 
 
 class BRMemorySaverFLAT(BRMemorySaverBase):
-    """Interface for correct BR reward storing"""
+    """
+    Interface for correct BR reward storing. The steps of an episode are collected and added to the buffer in one
+    batch when the terminal is added.
+    """
 
     def __init__(self, env_bldr, buffer):
         super().__init__(env_bldr=env_bldr, buffer=buffer)
         self._range_idx = None
+        # (obs_t, a_t, r_t, mask_t, obs_tp1, done_tp1, mask_tp1) of each step of the current episode
+        self._episode_steps = []
 
     def add_terminal(
         self,
@@ -19,23 +24,11 @@ class BRMemorySaverFLAT(BRMemorySaverBase):
         terminal_obs,
     ):
         if self._intermediate_memory.is_level_1():
-            self._buffer.add_step(
-                pub_obs_t=np.copy(self._intermediate_memory.obs_t),
-                a_t=self._intermediate_memory.action,
-                range_idx=self._range_idx,
-                r_t=reward_p,
-                legal_action_mask_t=rl_util.get_legal_action_mask_np(
-                    n_actions=self._env_bldr.N_ACTIONS,
-                    legal_actions_list=self._intermediate_memory.legal_actions_list_t,
-                ),
-                pub_obs_tp1=np.copy(terminal_obs),
-                done_tp1=True,
-                legal_action_mask_tp1=rl_util.get_legal_action_mask_np(
-                    n_actions=self._env_bldr.N_ACTIONS,
-                    legal_actions_list=self._intermediate_memory.legal_actions_list_tp1,
-                ),
+            self._add_step_to_memory(
+                r_t=reward_p, obs_tp1=np.copy(terminal_obs), done_tp1=True
             )
 
+        self._add_episode_to_buffer()
         self._intermediate_memory.reset()
 
     def add_non_terminal_experience(
@@ -51,25 +44,45 @@ class BRMemorySaverFLAT(BRMemorySaverBase):
             self._add_step_to_memory()
             self._intermediate_memory.step()
 
-    def _add_step_to_memory(self):
-        self._buffer.add_step(
-            pub_obs_t=np.copy(self._intermediate_memory.obs_t),
-            a_t=self._intermediate_memory.action,
+    def _add_step_to_memory(self, r_t=0.0, obs_tp1=None, done_tp1=False):
+        # the intermediate memory replaces its obs arrays instead of writing into them, so no copies are needed
+        mem = self._intermediate_memory
+        self._episode_steps.append(
+            (
+                mem.obs_t,
+                mem.action,
+                r_t,
+                rl_util.get_legal_action_mask_np(
+                    n_actions=self._env_bldr.N_ACTIONS,
+                    legal_actions_list=mem.legal_actions_list_t,
+                ),
+                mem.obs_tp1 if obs_tp1 is None else obs_tp1,
+                done_tp1,
+                rl_util.get_legal_action_mask_np(
+                    n_actions=self._env_bldr.N_ACTIONS,
+                    legal_actions_list=mem.legal_actions_list_tp1,
+                ),
+            )
+        )
+
+    def _add_episode_to_buffer(self):
+        if len(self._episode_steps) == 0:
+            return
+        obs_t, a_t, r_t, mask_t, obs_tp1, done_tp1, mask_tp1 = zip(*self._episode_steps)
+        self._buffer.add_steps(
+            pub_obs_t=np.array(obs_t),
+            a_t=np.array(a_t),
             range_idx=self._range_idx,
-            r_t=0.0,
-            legal_action_mask_t=rl_util.get_legal_action_mask_np(
-                n_actions=self._env_bldr.N_ACTIONS,
-                legal_actions_list=self._intermediate_memory.legal_actions_list_t,
-            ),
-            pub_obs_tp1=np.copy(self._intermediate_memory.obs_tp1),
-            done_tp1=False,
-            legal_action_mask_tp1=rl_util.get_legal_action_mask_np(
-                n_actions=self._env_bldr.N_ACTIONS,
-                legal_actions_list=self._intermediate_memory.legal_actions_list_tp1,
-            ),
+            r_t=np.array(r_t, dtype=np.float32),
+            legal_action_mask_t=np.array(mask_t),
+            pub_obs_tp1=np.array(obs_tp1),
+            done_tp1=np.array(done_tp1, dtype=np.float32),
+            legal_action_mask_tp1=np.array(mask_tp1),
         )
+        self._episode_steps = []
 
     def reset(self, range_idx):
         """Call with env reset"""
         self._range_idx = range_idx
+        self._episode_steps = []
         self._intermediate_memory.reset()
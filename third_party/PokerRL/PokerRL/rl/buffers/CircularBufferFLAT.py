@@ -1,15 +1,29 @@
 # Copyright (c) 2019 Eric Steinberger
 
 
+import contextlib
+import multiprocessing
+
+import numpy as np
 import torch
 from PokerRL.rl.buffers._circular_base import CircularBufferBase
 
 
 class CircularBufferFLAT(CircularBufferBase):
-    def __init__(self, env_bldr, max_size):
+    def __init__(self, env_bldr, max_size, shared=False):
+        """
+        Args:
+            shared (bool):          If True, the storage and the size and top counters are kept in shared memory and
+                                    writes are locked, so processes forked after construction (or the last reset) can
+                                    add steps that are sampled by the process that created the buffer.
+        """
         super().__init__(env_bldr=env_bldr, max_size=max_size)
 
         self.storage_device = torch.device("cpu")
+        self._shared = shared
+        self._lock = multiprocessing.get_context("fork").Lock() if shared else None
+        # [size, top] in shared memory, read and written by all processes if shared
+        self._counters = None
 
         self._pub_obs_t_buffer = None
         self._action_t_buffer = None
@@ -28,6 +42,7 @@ class CircularBufferFLAT(CircularBufferBase):
 
     @property
     def size(self):
+        self._sync_counters()
         return self._size
 
     def add_step(
@@ -41,29 +56,80 @@ class CircularBufferFLAT(CircularBufferBase):
         done_tp1,
         legal_action_mask_tp1,
     ):
-        self._pub_obs_t_buffer[self._top] = torch.from_numpy(pub_obs_t).to(
-            device=self.storage_device
-        )
-        self._action_t_buffer[self._top] = a_t
-        self._range_idx_buffer[self._top] = range_idx
-        self._reward_buffer[self._top] = r_t
-        self._pub_obs_tp1_buffer[self._top] = torch.from_numpy(pub_obs_tp1).to(
-            device=self.storage_device
+        self.add_steps(
+            pub_obs_t=np.expand_dims(pub_obs_t, axis=0),
+            a_t=[a_t],
+            range_idx=range_idx,
+            r_t=[r_t],
+            legal_action_mask_t=np.expand_dims(legal_action_mask_t, axis=0),
+            pub_obs_tp1=np.expand_dims(pub_obs_tp1, axis=0),
+            done_tp1=[float(done_tp1)],
+            legal_action_mask_tp1=np.expand_dims(legal_action_mask_tp1, axis=0),
         )
-        self._legal_action_mask_tp1_buffer[self._top] = torch.from_numpy(
-            legal_action_mask_tp1
-        ).to(device=self.storage_device)
-        self._legal_action_mask_t_buffer[self._top] = torch.from_numpy(
-            legal_action_mask_t
-        ).to(device=self.storage_device)
-        self._done_buffer[self._top] = float(done_tp1)
 
-        if self._size < self._max_size:
-            self._size += 1
-
-        self._top = (self._top + 1) % self._max_size
+    def add_steps(
+        self,
+        pub_obs_t,
+        a_t,
+        range_idx,
+        r_t,
+        legal_action_mask_t,
+        pub_obs_tp1,
+        done_tp1,
+        legal_action_mask_tp1,
+    ):
+        """
+        Adds a batch of n steps, e.g. all steps of an episode, with one copy per field (two if the batch wraps around
+        the end of the buffer).
+
+        Args:
+            pub_obs_t, pub_obs_tp1 (np.ndarray):                        shape (n, pub_obs_size)
+            a_t, r_t, done_tp1 (array-like):                            shape (n,)
+            range_idx (int or array-like):                              one for all steps or shape (n,)
+            legal_action_mask_t, legal_action_mask_tp1 (np.ndarray):    shape (n, N_ACTIONS)
+        """
+        n = len(a_t)
+        if n == 0:
+            return
+        # only the last max_size steps of a batch can be kept
+        skip = max(n - self._max_size, 0)
+        fields = [
+            (self._pub_obs_t_buffer, pub_obs_t),
+            (self._action_t_buffer, a_t),
+            (self._range_idx_buffer, range_idx),
+            (self._reward_buffer, r_t),
+            (self._pub_obs_tp1_buffer, pub_obs_tp1),
+            (self._legal_action_mask_t_buffer, legal_action_mask_t),
+            (self._legal_action_mask_tp1_buffer, legal_action_mask_tp1),
+            (self._done_buffer, done_tp1),
+        ]
+
+        with self._lock if self._shared else contextlib.nullcontext():
+            self._sync_counters()
+            start = (self._top + skip) % self._max_size
+            n_until_end = min(n - skip, self._max_size - start)
+            for buf, values in fields:
+                values = torch.as_tensor(np.asarray(values))
+                if values.dim() == 0:
+                    buf[start : start + n_until_end] = values
+                    buf[: n - skip - n_until_end] = values
+                else:
+                    values = values[skip:]
+                    buf[start : start + n_until_end] = values[:n_until_end]
+                    buf[: n - skip - n_until_end] = values[n_until_end:]
+
+            self._size = min(self._size + n, self._max_size)
+            self._top = (self._top + n) % self._max_size
+            if self._shared:
+                self._counters[0] = self._size
+                self._counters[1] = self._top
+
+    def _sync_counters(self):
+        if self._shared:
+            self._size, self._top = self._counters.tolist()
 
     def sample(self, device, batch_size):
+        self._sync_counters()
         indices = torch.randint(
             0, self._size, (batch_size,), dtype=torch.long, device=device
         )
@@ -80,6 +146,7 @@ class CircularBufferFLAT(CircularBufferBase):
         )
 
     def state_dict(self):
+        self._sync_counters()
         return {
             "pub_obs_t_buffer": self._pub_obs_t_buffer.cpu().clone(),
             "action_t_buffer": self._action_t_buffer.cpu().clone(),
@@ -104,6 +171,10 @@ class CircularBufferFLAT(CircularBufferBase):
         self._done_buffer = state["done_buffer"]
         self._size = state["size"]
         self._top = state["top"]
+        if self._shared:
+            self._share_memory()
+            self._counters[0] = self._size
+            self._counters[1] = self._top
 
     def reset(self):
         super().reset()
@@ -135,3 +206,20 @@ class CircularBufferFLAT(CircularBufferBase):
         self._done_buffer = torch.empty(
             size=(self._max_size,), dtype=torch.float32, device=self.storage_device
         )
+        if self._shared:
+            self._counters = torch.zeros(2, dtype=torch.long)
+            self._share_memory()
+
+    def _share_memory(self):
+        for buf in [
+            self._pub_obs_t_buffer,
+            self._action_t_buffer,
+            self._range_idx_buffer,
+            self._reward_buffer,
+            self._pub_obs_tp1_buffer,
+            self._legal_action_mask_t_buffer,
+            self._legal_action_mask_tp1_buffer,
+            self._done_buffer,
+            self._counters,
+        ]:
+            buf.share_memory_()